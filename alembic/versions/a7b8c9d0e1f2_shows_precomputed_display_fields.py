@@ -0,0 +1,129 @@
+"""add shows precomputed display fields
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-19
+
+Adds genre_names (text[]), short_overview and overview_tokens (text[]) derived from
+genres/overview at write time, so search result building only copies fields.
+Existing rows are backfilled in batches with one UPDATE ... FROM (VALUES ...) per batch, using a
+frozen copy of app.shared.show_display_fields() as of this revision (later changes to the app code
+must not change what this migration writes).
+"""
+import re
+from typing import Any, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "a7b8c9d0e1f2"
+down_revision: Union[str, Sequence[str], None] = "f6a7b8c9d0e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BACKFILL_BATCH_SIZE = 1000
+
+# Frozen copy of app.shared (TMDB_TV_GENRE_ID_TO_NAME, shorten_text, normalize_genres, tokenize).
+_GENRE_ID_TO_NAME = {
+    10759: "action",
+    16: "animation",
+    35: "comedy",
+    80: "crime",
+    99: "documentary",
+    18: "drama",
+    10751: "family",
+    10762: "kids",
+    9648: "mystery",
+    10763: "news",
+    10764: "reality",
+    10765: "sci-fi",
+    10766: "soap",
+    10767: "talk",
+    10768: "war",
+    37: "western",
+}
+_SHORT_OVERVIEW_MAX_LENGTH = 220
+
+
+def _genre_names(value: Any) -> list[str]:
+    if not isinstance(value, list):
+        return []
+    out: list[str] = []
+    for g in value:
+        if isinstance(g, int):
+            out.append(_GENRE_ID_TO_NAME.get(g, str(g)))
+        elif isinstance(g, str):
+            if g.strip():
+                out.append(g.strip())
+        else:
+            out.append(str(g))
+    return out
+
+
+def _short_overview(text: str | None) -> str | None:
+    if not text or not text.strip():
+        return None
+    cleaned = text.strip()
+    if len(cleaned) <= _SHORT_OVERVIEW_MAX_LENGTH:
+        return cleaned
+    return cleaned[: _SHORT_OVERVIEW_MAX_LENGTH - 3].rstrip() + "..."
+
+
+def _overview_tokens(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return sorted({t for t in re.findall(r"[a-z0-9]+", text.lower()) if len(t) > 2})
+
+
+def _backfill_statement(count: int) -> sa.TextClause:
+    values = ", ".join(
+        f"(CAST(:id_{i} AS integer), CAST(:genre_names_{i} AS text[]), "
+        f"CAST(:short_overview_{i} AS varchar), CAST(:overview_tokens_{i} AS text[]))"
+        for i in range(count)
+    )
+    return sa.text(
+        "UPDATE shows SET genre_names = v.genre_names, short_overview = v.short_overview, "
+        "overview_tokens = v.overview_tokens "
+        f"FROM (VALUES {values}) AS v (id, genre_names, short_overview, overview_tokens) "
+        "WHERE shows.id = v.id"
+    )
+
+
+def upgrade() -> None:
+    op.add_column("shows", sa.Column("genre_names", postgresql.ARRAY(sa.Text()), nullable=True))
+    op.add_column("shows", sa.Column("short_overview", sa.String(), nullable=True))
+    op.add_column("shows", sa.Column("overview_tokens", postgresql.ARRAY(sa.Text()), nullable=True))
+
+    bind = op.get_bind()
+    shows = sa.table(
+        "shows",
+        sa.column("id", sa.Integer()),
+        sa.column("genres", sa.JSON()),
+        sa.column("overview", sa.String()),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(shows.c.id, shows.c.genres, shows.c.overview)
+            .where(shows.c.id > last_id)
+            .order_by(shows.c.id)
+            .limit(_BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params: dict[str, Any] = {}
+        for i, row in enumerate(rows):
+            params[f"id_{i}"] = row.id
+            params[f"genre_names_{i}"] = _genre_names(row.genres)
+            params[f"short_overview_{i}"] = _short_overview(row.overview)
+            params[f"overview_tokens_{i}"] = _overview_tokens(row.overview)
+        bind.execute(_backfill_statement(len(rows)), params)
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_column("shows", "overview_tokens")
+    op.drop_column("shows", "short_overview")
+    op.drop_column("shows", "genre_names")
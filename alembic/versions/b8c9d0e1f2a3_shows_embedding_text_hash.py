@@ -0,0 +1,28 @@
+"""add shows.embedding_text_hash
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-19
+
+Hash of the text each stored embedding was computed from. scripts/generate_embeddings.py
+compares it with the current text and re-embeds only changed rows. Existing rows stay NULL
+and are picked up (from the on-disk cache or by re-embedding) on the next run.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b8c9d0e1f2a3"
+down_revision: Union[str, Sequence[str], None] = "a7b8c9d0e1f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("shows", sa.Column("embedding_text_hash", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("shows", "embedding_text_hash")
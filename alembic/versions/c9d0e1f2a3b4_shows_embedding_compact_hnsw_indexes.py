@@ -0,0 +1,40 @@
+"""add compact HNSW indexes on shows.embedding (halfvec and binary-quantized)
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-19
+
+Expression indexes for the compact storage tiers (config.VECTOR_STORAGE_TIER):
+  halfvec – (embedding::halfvec(384)) with halfvec_cosine_ops, about half the size
+  bit     – (binary_quantize(embedding)::bit(384)) with bit_hamming_ops, about 1/32 the size
+shows.embedding stays vector(384) and is used to re-rank the oversampled candidates exactly.
+Requires pgvector >= 0.7. Once a compact tier is live, ix_shows_embedding_hnsw only serves the
+offline paths (batch search, more-like-these, show_neighbors refresh) and may be dropped.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "c9d0e1f2a3b4"
+down_revision: Union[str, Sequence[str], None] = "b8c9d0e1f2a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_shows_embedding_halfvec_hnsw ON shows "
+        "USING hnsw ((embedding::halfvec(384)) halfvec_cosine_ops)"
+        " WITH (m = 16, ef_construction = 64);"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_shows_embedding_bit_hnsw ON shows "
+        "USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops)"
+        " WITH (m = 16, ef_construction = 64);"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_shows_embedding_bit_hnsw;")
+    op.execute("DROP INDEX IF EXISTS ix_shows_embedding_halfvec_hnsw;")
@@ -0,0 +1,36 @@
+"""add embedding_shards table (progress of sharded generate_embeddings runs)
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-19
+
+One row per id-range shard of a `generate_embeddings --workers N` run. Each worker commits its
+scan position (last_id) in the same transaction as the embeddings it wrote, so an interrupted
+run resumes every shard where it stopped. A new run is planned once every shard is finished.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d0e1f2a3b4c5"
+down_revision: Union[str, Sequence[str], None] = "c9d0e1f2a3b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_shards",
+        sa.Column("shard_id", sa.Integer(), primary_key=True),
+        sa.Column("start_id", sa.Integer(), nullable=False),
+        sa.Column("end_id", sa.Integer(), nullable=True),
+        sa.Column("last_id", sa.Integer(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("embedding_shards")
@@ -0,0 +1,31 @@
+"""add tmdb_sync_state table (TMDB /tv/changes delta sync watermark)
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-19
+
+One row per sync feed (name = 'tv_changes'): synced_at is when the last successful
+scripts/sync_tmdb_changes.py run started, so the next run asks TMDB for changes since then.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e1f2a3b4c5d6"
+down_revision: Union[str, Sequence[str], None] = "d0e1f2a3b4c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tmdb_sync_state",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("synced_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tmdb_sync_state")
@@ -0,0 +1,54 @@
+"""keep only the compact HNSW index of the configured storage tier
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-19
+
+c9d0e1f2a3b4 built both compact indexes (halfvec and bit) next to the full-precision one, so
+every embedding write maintained three HNSW graphs. Only the index of VECTOR_STORAGE_TIER (read
+from the environment when the migration runs) is kept: full drops both compact indexes, halfvec
+drops the bit one and bit drops the halfvec one. Dropping ix_shows_embedding_hnsw as well is a
+manual step (see docs/database.md). To switch tiers later, downgrade this revision and upgrade
+again with the new VECTOR_STORAGE_TIER.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app import config
+
+
+revision: str = "f2a3b4c5d6e7"
+down_revision: Union[str, Sequence[str], None] = "e1f2a3b4c5d6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same definitions as c9d0e1f2a3b4.
+_COMPACT_INDEXES = {
+    "halfvec": (
+        "CREATE INDEX IF NOT EXISTS ix_shows_embedding_halfvec_hnsw ON shows "
+        "USING hnsw ((embedding::halfvec(384)) halfvec_cosine_ops)"
+        " WITH (m = 16, ef_construction = 64);"
+    ),
+    "bit": (
+        "CREATE INDEX IF NOT EXISTS ix_shows_embedding_bit_hnsw ON shows "
+        "USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops)"
+        " WITH (m = 16, ef_construction = 64);"
+    ),
+}
+
+
+def upgrade() -> None:
+    tier = config.VECTOR_STORAGE_TIER
+    if tier not in config.VECTOR_RERANK_OVERSAMPLE:
+        raise RuntimeError(f"Unknown VECTOR_STORAGE_TIER={tier!r}")
+    for name, create_sql in _COMPACT_INDEXES.items():
+        if name == tier:
+            op.execute(create_sql)
+        else:
+            op.execute(f"DROP INDEX IF EXISTS ix_shows_embedding_{name}_hnsw;")
+
+
+def downgrade() -> None:
+    for create_sql in _COMPACT_INDEXES.values():
+        op.execute(create_sql)
@@ -0,0 +1,38 @@
+"""add show_neighbors table (precomputed more-like-this)
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-19
+
+Stores the top-N nearest neighbours per show (cosine distance over shows.embedding)
+so /search/more-like-this is a primary-key range read instead of an HNSW search.
+Filled by scripts/build_show_neighbors.py (also run at the end of generate_embeddings).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f6a7b8c9d0e1"
+down_revision: Union[str, Sequence[str], None] = "e5f6a7b8c9d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "show_neighbors",
+        sa.Column("show_id", sa.Integer(), sa.ForeignKey("shows.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("neighbor_id", sa.Integer(), sa.ForeignKey("shows.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("distance", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("show_id", "rank", name="pk_show_neighbors"),
+    )
+    # Reverse lookup: which lists reference a show whose embedding changed.
+    op.create_index("ix_show_neighbors_neighbor_id", "show_neighbors", ["neighbor_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_show_neighbors_neighbor_id", table_name="show_neighbors")
+    op.drop_table("show_neighbors")
@@ -1,29 +1,61 @@
 import logging
+import threading
+from contextlib import asynccontextmanager
 from typing import List
 
-from fastapi import FastAPI, Depends, Request
+from fastapi import FastAPI, Depends, Request, Response
 from fastapi.exceptions import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
+from app import embeddings
 from app.db import get_db
 from app.dependencies import get_current_user_optional
 from app.utils import compute_age
 from app.routers import auth, watchlist
 from app.routers import search
+from app.routers.search import NEXT_CURSOR_HEADER
+from app.thread_budget import effective_thread_metrics
 from app.schemas import RecommendationInput, RecommendationOutput
-from app.logic import recommend_shows
+from app.vector_search import SEARCH_MODE_HEADER
+from app.logic import recommend_shows_with_mode
 from app.exceptions import (
     AppException,
     ErrorResponse,
     INTERNAL_ERROR,
+    SERVICE_UNAVAILABLE,
 )
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="MoodFlix")
+
+
+def _warm_up_embeddings(state) -> None:
+    try:
+        embeddings.warm_up()
+    except Exception as e:
+        state.embedding_warmup_error = f"{type(e).__name__}: {e}"
+        logger.exception("Embedding warmup failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in a background thread: the server accepts connections (liveness, /health/db) right away,
+    # while /health/ready stays 503 until the model is loaded and has run a forward pass.
+    app.state.embedding_warmup_error = None
+    if embeddings.EMBEDDING_WARMUP:
+        threading.Thread(
+            target=_warm_up_embeddings,
+            args=(app.state,),
+            name="embedding-warmup",
+            daemon=True,
+        ).start()
+    yield
+
+
+app = FastAPI(title="MoodFlix", lifespan=lifespan)
 
 app.include_router(auth.router)
 app.include_router(watchlist.router)
@@ -41,6 +73,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, SEARCH_MODE_HEADER],
 )
 
 
@@ -99,11 +132,39 @@ def db_health(db: Session = Depends(get_db)):
     db.execute(text("SELECT 1"))
     return {"status": "connected"}
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Prometheus text format: effective embedding thread budget (see app/thread_budget.py)."""
+    values = effective_thread_metrics(embeddings.THREAD_BUDGET)
+    lines = [
+        "# HELP moodflix_embedding_threads CPU/thread budget for the embedding model in this process.",
+        "# TYPE moodflix_embedding_threads gauge",
+    ]
+    for name, value in values.items():
+        lines.append(f'moodflix_embedding_threads{{setting="{name}",mode="{embeddings.THREAD_BUDGET.mode}"}} {value:g}')
+    return "\n".join(lines) + "\n"
+
+
+@app.get("/health/ready")
+def readiness(request: Request):
+    """Readiness probe: 503 until the embedding model has been loaded and warmed up at startup."""
+    if not embeddings.EMBEDDING_WARMUP or embeddings.is_ready():
+        return {"status": "ready"}
+    error = getattr(request.app.state, "embedding_warmup_error", None)
+    raise AppException(
+        status_code=503,
+        error_code=SERVICE_UNAVAILABLE,
+        message="Embedding model is still warming up." if error is None else "Embedding model failed to load.",
+        details={"embeddings": "warming_up" if error is None else "failed"},
+    )
+
 # -------------------- Recommendations --------------------
 
 @app.post("/recommend", response_model=List[RecommendationOutput])
 def recommend(
     input_data: RecommendationInput,
+    response: Response,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user_optional),
 ):
@@ -111,6 +172,7 @@ def recommend(
     Receive user preferences and return TV show recommendations.
     When authenticated, age is inferred from the user's date_of_birth for content filtering.
     When unauthenticated, use guest_family_safe: True → age 17 (family filter), else age 18 (adult).
+    When the candidates came from a vector search, its mode is reported in the X-Search-Mode header.
     """
     logger.info(
         "[recommend] request payload: query=%r, mood=%s, binge_preference=%s, preferred_genres=%s, "
@@ -130,7 +192,7 @@ def recommend(
         # Guest: guest_family_safe True → apply family filter (age 17), else adult (18)
         age = 17 if getattr(input_data, "guest_family_safe", None) is True else 18
     try:
-        return recommend_shows(input_data, db=db, age=age)
+        results, search_mode = recommend_shows_with_mode(input_data, db=db, age=age)
     except AppException:
         raise
     except Exception as e:
@@ -140,4 +202,7 @@ def recommend(
             error_code="SERVICE_UNAVAILABLE",
             message="Recommendations are temporarily unavailable. Please try again later.",
             details={},
-        ) from e
\ No newline at end of file
+        ) from e
+    if search_mode is not None:
+        response.headers[SEARCH_MODE_HEADER] = search_mode.value
+    return results
\ No newline at end of file
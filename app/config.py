@@ -5,6 +5,8 @@ Adjust these values to change ranking and filtering behavior without editing
 the main recommendation logic. All numeric tuning is centralized here.
 """
 
+import os
+
 # --------------------------------- Recommendation defaults ---------------------------------
 DEFAULT_TOP_N = 20
 DEFAULT_CANDIDATE_TOP_K = 80
@@ -14,6 +16,41 @@ FORM_FLOW_TOP_N = 10
 # If below this (or semantic returns fewer than top_n candidates), we fall back to full DB scan / static fallback.
 SEMANTIC_MIN_EMBEDDINGS = 50
 
+# --------------------------------- Vector search modes (hnsw.ef_search) ---------------------------------
+# Per-request SET LOCAL hnsw.ef_search; raised to at least the query LIMIT so the index can fill it.
+# "exact" mode bypasses the HNSW index instead (full cosine scan).
+HNSW_EF_SEARCH_FAST = 20
+HNSW_EF_SEARCH_BALANCED = 100
+# pgvector upper bound for hnsw.ef_search.
+HNSW_EF_SEARCH_MAX = 1000
+
+# --------------------------------- Vector storage tier ---------------------------------
+# HNSW index that serves ANN queries (env VECTOR_STORAGE_TIER):
+#   "full"    – vector(384) float32 index (ix_shows_embedding_hnsw)
+#   "halfvec" – float16 expression index, ~2x smaller
+#   "bit"     – binary_quantize() expression index (hamming), ~32x smaller
+# Compact tiers fetch OVERSAMPLE x the rows a query needs from their index and re-rank them exactly
+# on shows.embedding. Indexes are created by alembic revision c9d0e1f2a3b4 (pgvector >= 0.7).
+VECTOR_STORAGE_TIER = (os.getenv("VECTOR_STORAGE_TIER") or "full").strip().lower()
+VECTOR_RERANK_OVERSAMPLE = {
+    "full": 1,
+    "halfvec": 2,
+    "bit": 10,
+}
+
+# --------------------------------- In-process exact search (app/local_vector_index.py) ---------------------------------
+# Exact search over a memory-mapped export of shows.embedding instead of pgvector. Used when
+# LOCAL_VECTOR_INDEX_DIR is set, an export exists there (scripts/export_vector_index.py, also run by
+# generate_embeddings) and it holds at most LOCAL_VECTOR_INDEX_MAX_ROWS rows. "off" disables it.
+LOCAL_VECTOR_INDEX = (os.getenv("LOCAL_VECTOR_INDEX") or "auto").strip().lower()
+LOCAL_VECTOR_INDEX_DIR = os.getenv("LOCAL_VECTOR_INDEX_DIR") or None
+# Above this a 384-dim float32 scan (~150 MB per 100k rows) stops being sub-millisecond; use HNSW.
+LOCAL_VECTOR_INDEX_MAX_ROWS = 300_000
+
+# --------------------------------- Precomputed neighbours (more-like-this) ---------------------------------
+# Neighbours stored per show in show_neighbors; also the max top_k served from the table.
+SHOW_NEIGHBORS_TOP_K = 50
+
 # --------------------------------- Age thresholds ---------------------------------
 # When watching with family, treat effective max age as this for rating rules.
 FAMILY_CONTEXT_EFFECTIVE_AGE = 12
@@ -0,0 +1,298 @@
+"""
+Out-of-process embedding workers (EMBEDDING_WORKERS > 0).
+
+Each worker is a spawned process that loads the model once. The web process sends texts over a
+multiprocessing queue and gets vectors back through a shared-memory block: every request owns one
+slot of slot_rows x EMBED_DIM float32, the worker writes into it and replies with only a row count,
+so vectors are never pickled. Forward passes then burn CPU (and hold the GIL) in the workers, not
+in the uvicorn process serving auth and favorites.
+
+A monitor thread watches the worker processes: when one dies (OOM kill, segfault in native code)
+its in-flight request fails at once and the worker is respawned. A worker that dies before it
+finished loading the model is not respawned; once none are left, encode() fails fast. A worker
+that does not answer within timeout_s is terminated and respawned the same way, so its
+shared-memory slot can be reused.
+"""
+
+from __future__ import annotations
+
+import atexit
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait as wait_for_sentinels
+from typing import Callable
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+_DTYPE = np.float32
+# How often the monitor re-checks the worker list (it also wakes when any worker exits).
+_MONITOR_INTERVAL_S = 0.5
+
+
+def _worker_main(index, backend_factory, shape, shm_name, requests, results) -> None:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=_DTYPE, buffer=shm.buf)
+        try:
+            backend = backend_factory()
+        except BaseException as e:
+            results.put(("init_error", index, f"{type(e).__name__}: {e}"))
+            return
+        results.put(("ready", index, None))
+        while True:
+            item = requests.get()
+            if item is None:
+                break
+            request_id, slot, texts = item
+            try:
+                vectors = backend.encode(texts)
+                block[slot, : len(texts)] = vectors
+                results.put((request_id, len(texts), None))
+            except BaseException as e:
+                results.put((request_id, 0, f"{type(e).__name__}: {e}"))
+        del block
+    finally:
+        shm.close()
+
+
+class _Worker:
+    def __init__(self, process, requests) -> None:
+        self.process = process
+        self.requests = requests
+        self.ready = False
+
+
+class EmbeddingWorkerPool:
+    """
+    `workers` processes, each with its own request queue; a request goes to whichever worker is
+    idle, so the pool knows which requests a dead worker took with it.
+    encode() matches the in-process backends: (n, dim) float32, split into slot-sized chunks.
+    """
+
+    def __init__(
+        self,
+        backend_factory: Callable,
+        *,
+        workers: int,
+        dim: int,
+        slot_rows: int = 64,
+        slots: int | None = None,
+        timeout_s: float = 60.0,
+    ):
+        self._dim = int(dim)
+        self._slot_rows = max(1, int(slot_rows))
+        self._timeout_s = timeout_s
+        n_slots = max(1, int(slots or 2 * workers))
+
+        # spawn: never fork a process that may already hold torch/BLAS threads.
+        self._ctx = mp.get_context("spawn")
+        self._backend_factory = backend_factory
+        self._shm = shared_memory.SharedMemory(create=True, size=n_slots * self._slot_rows * self._dim * 4)
+        self._block = np.ndarray((n_slots, self._slot_rows, self._dim), dtype=_DTYPE, buffer=self._shm.buf)
+        self._free_slots: queue.Queue[int] = queue.Queue()
+        for slot in range(n_slots):
+            self._free_slots.put(slot)
+
+        self._results = self._ctx.Queue()
+        # request_id -> (future, worker index)
+        self._pending: dict[int, tuple[Future, int]] = {}
+        self._pending_lock = threading.Lock()
+        # Serializes replacing a worker (monitor thread vs. a request that timed out).
+        self._workers_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False
+
+        n_workers = max(1, int(workers))
+        self._workers: list[_Worker | None] = [self._spawn(i) for i in range(n_workers)]
+        self._idle: queue.Queue[int] = queue.Queue()
+        for i in range(n_workers):
+            self._idle.put(i)
+        self._wait_until_ready()
+
+        self._reader = threading.Thread(target=self._read_results, name="embedding-pool-reader", daemon=True)
+        self._reader.start()
+        self._monitor = threading.Thread(target=self._monitor_workers, name="embedding-pool-monitor", daemon=True)
+        self._monitor.start()
+        atexit.register(self.close)
+
+    def _spawn(self, index: int) -> _Worker:
+        requests = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self._backend_factory, self._block.shape, self._shm.name, requests, self._results),
+            name=f"embedding-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return _Worker(process, requests)
+
+    def _wait_until_ready(self) -> None:
+        for _ in self._workers:
+            try:
+                status, index, error = self._results.get(timeout=self._timeout_s)
+            except queue.Empty:
+                self.close(grace_s=0)
+                raise RuntimeError(
+                    f"Embedding workers did not load the model within {self._timeout_s:.0f}s"
+                ) from None
+            if status != "ready":
+                self.close(grace_s=0)
+                raise RuntimeError(f"Embedding worker failed to start: {error}")
+            self._workers[index].ready = True
+
+    def _read_results(self) -> None:
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            request_id, rows, error = item
+            if request_id == "ready":
+                worker = self._workers[rows]
+                if worker is not None:
+                    worker.ready = True
+                continue
+            if request_id == "init_error":
+                logger.error("Embedding worker %d failed to restart: %s", rows, error)
+                continue
+            with self._pending_lock:
+                future, _ = self._pending.pop(request_id, (None, None))
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(RuntimeError(f"Embedding worker error: {error}"))
+            else:
+                future.set_result(rows)
+
+    def _monitor_workers(self) -> None:
+        while not self._closed:
+            live = {w.process.sentinel: (i, w) for i, w in enumerate(self._workers) if w is not None}
+            if not live:
+                return
+            for sentinel in wait_for_sentinels(list(live), timeout=_MONITOR_INTERVAL_S):
+                if not self._closed:
+                    self._replace_dead_worker(*live[sentinel])
+
+    def _replace_dead_worker(self, index: int, dead: _Worker, *, respawn: bool | None = None) -> None:
+        """respawn defaults to whether the worker had loaded the model."""
+        with self._workers_lock:
+            if self._workers[index] is not dead:
+                return  # already replaced
+            exitcode = dead.process.exitcode
+            if dead.ready if respawn is None else respawn:
+                logger.warning("Embedding worker %d died (exit code %s); respawning it", index, exitcode)
+                self._workers[index] = self._spawn(index)
+            else:
+                # Died while loading the model: a respawn would most likely die the same way.
+                logger.error("Embedding worker %d died before it was ready (exit code %s); not respawning", index, exitcode)
+                self._workers[index] = None
+        with self._pending_lock:
+            lost = [rid for rid, (_, worker) in self._pending.items() if worker == index]
+            futures = [self._pending.pop(rid)[0] for rid in lost]
+        for future in futures:
+            future.set_exception(RuntimeError(f"Embedding worker {index} died (exit code {exitcode})"))
+
+    def _restart_stuck_worker(self, index: int, worker: _Worker) -> None:
+        worker.process.terminate()
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+        # Respawn even if it was still loading: a slow start is not a broken model.
+        self._replace_dead_worker(index, worker, respawn=True)
+
+    def _acquire_worker(self) -> int:
+        deadline = time.monotonic() + self._timeout_s
+        while True:
+            if all(w is None for w in self._workers):
+                raise RuntimeError("No embedding workers are running")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Timed out waiting for an idle embedding worker")
+            try:
+                index = self._idle.get(timeout=min(remaining, _MONITOR_INTERVAL_S))
+            except queue.Empty:
+                continue
+            if self._workers[index] is not None:
+                return index
+            # Given up on: drop its token so it is never handed out again.
+
+    def _encode_chunk(self, texts: list[str]) -> np.ndarray:
+        slot = self._free_slots.get(timeout=self._timeout_s)
+        try:
+            index = self._acquire_worker()
+        except BaseException:
+            self._free_slots.put(slot)
+            raise
+        request_id = next(self._ids)
+        future: Future = Future()
+        try:
+            with self._pending_lock:
+                self._pending[request_id] = (future, index)
+            worker = self._workers[index]
+            if worker is None:
+                raise RuntimeError(f"Embedding worker {index} is not running")
+            worker.requests.put((request_id, slot, texts))
+            rows = future.result(timeout=self._timeout_s)
+        except TimeoutError:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            logger.warning("Embedding worker %d timed out after %.0fs; restarting it", index, self._timeout_s)
+            # Once the stuck worker is gone nothing can write into the slot any more.
+            self._restart_stuck_worker(index, worker)
+            self._free_slots.put(slot)
+            raise
+        except BaseException:
+            # Failed, or the worker died: nothing will write into the slot any more.
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            self._free_slots.put(slot)
+            raise
+        finally:
+            self._idle.put(index)
+        # Copy out before the slot is reused by another request.
+        vectors = self._block[slot, :rows].copy()
+        self._free_slots.put(slot)
+        return vectors
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        if self._closed:
+            raise RuntimeError("Embedding worker pool is closed")
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self._dim), dtype=_DTYPE)
+        chunks = [texts[i : i + self._slot_rows] for i in range(0, len(texts), self._slot_rows)]
+        return np.concatenate([self._encode_chunk(chunk) for chunk in chunks])
+
+    def close(self, *, grace_s: float = 5.0) -> None:
+        """Stop the workers (each gets grace_s to finish its request, then is terminated)."""
+        if self._closed:
+            return
+        self._closed = True
+        workers = [w for w in self._workers if w is not None]
+        for worker in workers:
+            worker.requests.put(None)
+        for worker in workers:
+            worker.process.join(timeout=grace_s)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join(timeout=5)
+        self._results.put(None)
+        with self._pending_lock:
+            for future, _ in self._pending.values():
+                future.set_exception(RuntimeError("Embedding worker pool is closed"))
+            self._pending.clear()
+        del self._block
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
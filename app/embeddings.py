@@ -1,28 +1,280 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import lru_cache
-from typing import List
+from pathlib import Path
+from typing import List, Protocol
 
-from sentence_transformers import SentenceTransformer
+from app.thread_budget import apply_thread_budget, compute_thread_budget, configure_torch
 
+# Before numpy/torch/onnxruntime start their thread pools (OpenMP/BLAS read the env vars at load).
+THREAD_BUDGET = apply_thread_budget(compute_thread_budget())
+
+import numpy as np  # noqa: E402
+
+
+logger = logging.getLogger(__name__)
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 EMBED_DIM = 384
 
+# Embedding backend: "torch" (sentence-transformers, default) or "onnx" (ONNX Runtime, int8).
+# Both produce normalized 384-dim MiniLM vectors, but not bit-identical ones: the backend is part of
+# embedding_text_hash(), so switching it re-embeds the catalog instead of mixing the two.
+EMBEDDING_BACKEND = (os.getenv("EMBEDDING_BACKEND") or "torch").strip().lower()
+# Directory with model.onnx + tokenizer.json, produced by: python -m scripts.export_onnx_embedding_model
+EMBEDDING_ONNX_MODEL_DIR = Path(
+    os.getenv("EMBEDDING_ONNX_MODEL_DIR")
+    or Path(__file__).resolve().parents[1] / "models" / "all-MiniLM-L6-v2-onnx-int8"
+)
+# Same truncation as the sentence-transformers config for all-MiniLM-L6-v2.
+MAX_SEQ_LENGTH = 256
+# Load the model and run a warmup batch at app startup (lifespan); /health/ready reports 503 until done.
+# Set to 0 to load lazily on the first query instead (readiness is then not gated on the model).
+EMBEDDING_WARMUP = (os.getenv("EMBEDDING_WARMUP") or "1").strip().lower() not in ("0", "false", "no", "off")
+# Micro-batching for concurrent embed_text() calls: requests arriving within this window (or until the
+# batch is full) share one forward pass. Caps the latency added to a lone query. 0 disables batching.
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS") or 5)
+EMBEDDING_BATCH_MAX_SIZE = max(1, int(os.getenv("EMBEDDING_BATCH_MAX_SIZE") or 32))
+# Run the model in this many separate worker processes (app/embedding_pool.py) instead of in the web
+# process. Sized independently of uvicorn --workers; 0 = in-process (default).
+EMBEDDING_WORKERS = max(0, int(os.getenv("EMBEDDING_WORKERS") or 0))
+
+# Short query + show-length document: covers both request shapes and several sequence lengths.
+_WARMUP_TEXTS = [
+    "cozy mystery",
+    "dark sci-fi thriller about time travel with short episodes",
+    "Feel-good family comedy. Comedy, Family. A widowed dad raises three kids with help from "
+    "his brother-in-law and best friend, in a house full of noise, chores and bedtime stories.",
+]
+
+_ready = threading.Event()
+
+
+class EmbeddingBackend(Protocol):
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Return a (len(texts), EMBED_DIM) float32 array of L2-normalized embeddings."""
+        ...
+
+
+class TorchEmbeddingBackend:
+    """sentence-transformers on PyTorch (imported here so the ONNX backend never loads torch)."""
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+
+        configure_torch(THREAD_BUDGET)
+        self._model = SentenceTransformer(model_name)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        vectors = self._model.encode(texts, normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class OnnxEmbeddingBackend:
+    """
+    ONNX Runtime over a dynamically quantized (int8) MiniLM export.
+    Reproduces sentence-transformers' pipeline: tokenize, forward pass, mean pooling, L2 normalize.
+    """
+
+    def __init__(self, model_dir: Path = EMBEDDING_ONNX_MODEL_DIR):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_BACKEND=onnx requires the onnxruntime and tokenizers packages"
+            ) from e
+
+        model_path = Path(model_dir) / "model.onnx"
+        tokenizer_path = Path(model_dir) / "tokenizer.json"
+        if not model_path.is_file() or not tokenizer_path.is_file():
+            raise RuntimeError(
+                f"ONNX embedding model not found in {model_dir}. "
+                "Run: python -m scripts.export_onnx_embedding_model"
+            )
+
+        self._tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self._tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self._tokenizer.enable_padding()
+        options = ort.SessionOptions()
+        if THREAD_BUDGET.intra_op_threads is not None:
+            options.intra_op_num_threads = THREAD_BUDGET.intra_op_threads
+            options.inter_op_num_threads = THREAD_BUDGET.inter_op_threads
+        self._session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, EMBED_DIM), dtype=np.float32)
+        encodings = self._tokenizer.encode_batch(list(texts))
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self._session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+_BACKENDS = {
+    "torch": TorchEmbeddingBackend,
+    "onnx": OnnxEmbeddingBackend,
+}
+# Runtime and weight precision per backend, hashed with the text (see embedding_text_hash).
+_BACKEND_VARIANTS = {
+    "torch": "torch-fp32",
+    "onnx": "onnx-int8",
+}
+
+
+@lru_cache(maxsize=1)
+def _get_backend() -> EmbeddingBackend:
+    backend_cls = _BACKENDS.get(EMBEDDING_BACKEND)
+    if backend_cls is None:
+        raise RuntimeError(
+            f"Unknown EMBEDDING_BACKEND={EMBEDDING_BACKEND!r}; expected one of {sorted(_BACKENDS)}"
+        )
+    if EMBEDDING_WORKERS > 0:
+        from app.embedding_pool import EmbeddingWorkerPool
+
+        # Workers build backend_cls() themselves; this process never loads the model.
+        return EmbeddingWorkerPool(backend_cls, workers=EMBEDDING_WORKERS, dim=EMBED_DIM)
+    return backend_cls()
+
+
+class MicroBatcher:
+    """
+    Collects single-text encode requests on a queue; one daemon thread drains up to max_batch_size
+    of them (waiting at most max_wait_s after the first), runs one encode() and resolves each future.
+    With concurrency > 1 (worker pool backend) up to that many batches are encoded at once; the next
+    batch keeps filling while all are busy.
+    """
+
+    def __init__(self, encode, *, max_batch_size: int, max_wait_s: float, concurrency: int = 1):
+        self._encode = encode
+        self._max_batch_size = max(1, int(max_batch_size))
+        self._max_wait_s = max(0.0, float(max_wait_s))
+        self._queue: queue.Queue[tuple[str, Future]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._concurrency = max(1, int(concurrency))
+        self._in_flight = threading.Semaphore(self._concurrency)
+        self._executor = (
+            ThreadPoolExecutor(self._concurrency, thread_name_prefix="embedding-batch")
+            if self._concurrency > 1
+            else None
+        )
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._queue.put((text, future))
+        self._ensure_thread()
+        return future
+
+    def _ensure_thread(self) -> None:
+        # Started lazily (and restarted after fork, where the parent's thread does not exist).
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self) -> list[tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._max_wait_s
+        while len(batch) < self._max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, batch: list[tuple[str, Future]]) -> None:
+        try:
+            vectors = self._encode([text for text, _ in batch])
+            if len(vectors) != len(batch):
+                # Otherwise the unmatched callers would wait forever on their futures.
+                raise RuntimeError(f"Embedding backend returned {len(vectors)} vectors for {len(batch)} texts")
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._in_flight.release()
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+    def _run(self) -> None:
+        while True:
+            self._in_flight.acquire()
+            batch = self._next_batch()
+            if self._executor is None:
+                self._process(batch)
+            else:
+                self._executor.submit(self._process, batch)
+
 
 @lru_cache(maxsize=1)
-def _get_model() -> SentenceTransformer:
-    return SentenceTransformer(MODEL_NAME)
+def _get_batcher() -> MicroBatcher:
+    return MicroBatcher(
+        lambda texts: _get_backend().encode(texts),
+        max_batch_size=EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_s=EMBEDDING_BATCH_MAX_WAIT_MS / 1000.0,
+        concurrency=max(1, EMBEDDING_WORKERS),
+    )
+
+
+def embedding_text_hash(text: str) -> str:
+    """
+    sha256 of model name + backend variant + text: equal hashes mean the stored vector is still
+    valid for this text and was produced by the same runtime and quantization.
+    """
+    variant = _BACKEND_VARIANTS.get(EMBEDDING_BACKEND, EMBEDDING_BACKEND)
+    return hashlib.sha256(f"{MODEL_NAME}\n{variant}\n{text}".encode("utf-8")).hexdigest()
+
+
+def warm_up() -> float:
+    """Load the backend and run one warmup batch; marks embeddings ready. Returns elapsed seconds."""
+    start = time.perf_counter()
+    _get_backend().encode(_WARMUP_TEXTS)
+    elapsed = time.perf_counter() - start
+    _ready.set()
+    logger.info("Embedding backend %r warmed up in %.2fs", EMBEDDING_BACKEND, elapsed)
+    return elapsed
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
 
 
 def embed_text(text: str) -> List[float]:
-    model = _get_model()
-    vec = model.encode(text, normalize_embeddings=True)
-    return vec.tolist()
+    if EMBEDDING_BATCH_MAX_WAIT_MS <= 0:
+        return _get_backend().encode([text])[0].tolist()
+    return _get_batcher().submit(text).result().tolist()
 
 
 def embed_texts(texts: list[str]) -> list[list[float]]:
-    model = _get_model()
-    vectors = model.encode(texts, normalize_embeddings=True, show_progress_bar=False)
+    vectors = _get_backend().encode(list(texts))
     return [v.tolist() for v in vectors]
-
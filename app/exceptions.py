@@ -35,6 +35,7 @@ SERVICE_UNAVAILABLE = "SERVICE_UNAVAILABLE"  # DB or TMDB timeout / failure
 QUERY_REQUIRED = "QUERY_REQUIRED"
 EMBEDDING_ERROR = "EMBEDDING_ERROR"
 SEARCH_FAILED = "SEARCH_FAILED"
+INVALID_CURSOR = "INVALID_CURSOR"
 
 # Generic
 INTERNAL_ERROR = "INTERNAL_ERROR"
@@ -0,0 +1,198 @@
+"""
+In-process exact vector search over a memory-mapped export of shows.embedding.
+
+scripts/export_vector_index.py writes ids-<gen>.npy (int64, ascending) and embeddings-<gen>.npy
+(float32, L2-normalized rows) to LOCAL_VECTOR_INDEX_DIR, then points the CURRENT file at <gen>.
+Queries are one BLAS matrix-vector product plus argpartition: exact cosine ranking with no
+pgvector round trip and no HNSW recall loss. Used instead of pgvector when the export exists and
+holds at most LOCAL_VECTOR_INDEX_MAX_ROWS rows (see get_local_vector_index()).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import config
+from app.models import Show
+
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+# How often a process re-reads CURRENT to pick up a new export.
+_RELOAD_CHECK_SECONDS = 5.0
+
+
+def _ids_path(directory: Path, generation: str) -> Path:
+    return directory / f"ids-{generation}.npy"
+
+
+def _matrix_path(directory: Path, generation: str) -> Path:
+    return directory / f"embeddings-{generation}.npy"
+
+
+class LocalVectorIndex:
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray, generation: str = ""):
+        self.ids = ids
+        self.matrix = matrix
+        self.generation = generation
+
+    @classmethod
+    def load(cls, directory: Path, generation: str) -> "LocalVectorIndex":
+        ids = np.load(_ids_path(directory, generation), mmap_mode="r")
+        matrix = np.load(_matrix_path(directory, generation), mmap_mode="r")
+        if ids.shape[0] != matrix.shape[0]:
+            raise ValueError(f"Vector index {generation}: {ids.shape[0]} ids for {matrix.shape[0]} rows")
+        return cls(ids, matrix, generation)
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def vector(self, show_id: int) -> Optional[np.ndarray]:
+        pos = int(np.searchsorted(self.ids, show_id))
+        if pos < len(self) and int(self.ids[pos]) == show_id:
+            return np.asarray(self.matrix[pos])
+        return None
+
+    def _distances(self, query: Sequence[float] | np.ndarray) -> np.ndarray:
+        q = np.asarray(query, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        return 1.0 - self.matrix @ q
+
+    def distance(self, query: Sequence[float] | np.ndarray, show_id: int) -> Optional[float]:
+        """Cosine distance of one show, computed exactly as search() computes it (None if not indexed)."""
+        pos = int(np.searchsorted(self.ids, show_id))
+        if pos < len(self) and int(self.ids[pos]) == show_id:
+            return float(self._distances(query)[pos])
+        return None
+
+    def search(
+        self,
+        query: Sequence[float] | np.ndarray,
+        k: int,
+        *,
+        exclude_ids: Iterable[int] = (),
+        after: tuple[float, int] | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Exact top-k as (show_id, cosine distance), ordered by (distance, id).
+        `after` is a (distance, id) keyset: only rows strictly after it are returned.
+        """
+        distances = self._distances(query)
+        ids = self.ids
+
+        mask = None
+        exclude = list(exclude_ids)
+        if exclude:
+            mask = np.isin(ids, exclude, invert=True)
+        if after is not None:
+            d0, id0 = float(after[0]), int(after[1])
+            keep = (distances > d0) | ((distances == d0) & (ids > id0))
+            mask = keep if mask is None else mask & keep
+        if mask is not None:
+            positions = np.flatnonzero(mask)
+            distances = distances[positions]
+        else:
+            positions = None
+
+        k = min(int(k), int(distances.shape[0]))
+        if k <= 0:
+            return []
+        top = np.argpartition(distances, k - 1)[:k] if k < distances.shape[0] else np.arange(distances.shape[0])
+        top_ids = ids[top] if positions is None else ids[positions[top]]
+        top_distances = distances[top]
+        order = np.lexsort((top_ids, top_distances))
+        return [(int(top_ids[i]), float(top_distances[i])) for i in order]
+
+
+def write_vector_index(directory: Path, ids: np.ndarray, matrix: np.ndarray) -> str:
+    """Write a new generation (rows sorted by id, normalized) and switch CURRENT to it. Returns the generation."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    ids = np.asarray(ids, dtype=np.int64)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    order = np.argsort(ids, kind="stable")
+    ids, matrix = ids[order], matrix[order]
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    generation = f"{time.time_ns()}"
+    np.save(_ids_path(directory, generation), ids)
+    np.save(_matrix_path(directory, generation), matrix)
+    _switch_current(directory, generation)
+    return generation
+
+
+def _switch_current(directory: Path, generation: str) -> None:
+    tmp = directory / f"{CURRENT_FILE}.tmp"
+    tmp.write_text(generation)
+    os.replace(tmp, directory / CURRENT_FILE)
+    # Readers that still map an old generation keep working (POSIX unlink semantics).
+    for path in directory.glob("*.npy"):
+        if not path.name.endswith(f"-{generation}.npy"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def _read_current(directory: Path) -> Optional[str]:
+    try:
+        return (directory / CURRENT_FILE).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+_lock = threading.Lock()
+_loaded: Optional[LocalVectorIndex] = None
+_last_check = float("-inf")
+
+
+def get_local_vector_index() -> Optional[LocalVectorIndex]:
+    """The active in-process index, or None when disabled, not exported or over the size limit."""
+    global _loaded, _last_check
+    if config.LOCAL_VECTOR_INDEX == "off" or not config.LOCAL_VECTOR_INDEX_DIR:
+        return None
+    now = time.monotonic()
+    if now - _last_check >= _RELOAD_CHECK_SECONDS:
+        with _lock:
+            if now - _last_check >= _RELOAD_CHECK_SECONDS:
+                directory = Path(config.LOCAL_VECTOR_INDEX_DIR)
+                generation = _read_current(directory)
+                if generation is None:
+                    _loaded = None
+                elif _loaded is None or _loaded.generation != generation:
+                    try:
+                        _loaded = LocalVectorIndex.load(directory, generation)
+                        logger.info("Loaded local vector index %s (%d rows)", generation, len(_loaded))
+                    except (OSError, ValueError) as e:
+                        logger.warning("Local vector index %s unavailable: %s", generation, e)
+                        _loaded = None
+                _last_check = now
+    index = _loaded
+    if index is None or len(index) > config.LOCAL_VECTOR_INDEX_MAX_ROWS:
+        return None
+    return index
+
+
+def reset_local_vector_index() -> None:
+    """Forget the loaded index and re-read CURRENT on the next call."""
+    global _loaded, _last_check
+    with _lock:
+        _loaded = None
+        _last_check = float("-inf")
+
+
+def rows_for_hits(db: Session, hits: list[tuple[int, float]]) -> list[tuple[Show, float]]:
+    """Load the Show rows for (id, distance) hits, keeping hit order; ids deleted since the export are skipped."""
+    if not hits:
+        return []
+    shows = {show.id: show for show in db.query(Show).filter(Show.id.in_([show_id for show_id, _ in hits])).all()}
+    return [(shows[show_id], distance) for show_id, distance in hits if show_id in shows]
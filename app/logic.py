@@ -17,6 +17,7 @@ from app.schemas import (
     BingePreference,
     Mood,
     EpisodeLengthPreference,
+    SearchMode,
     WatchingContext,
 )
 from app.data import get_all_shows
@@ -24,6 +25,8 @@ from app.tmdb import get_tv_details_cached
 from app.embeddings import EMBED_DIM, embed_text
 from app.models import Show
 from app.shared import TMDB_TV_GENRE_ID_TO_NAME, shorten_text
+from app.local_vector_index import get_local_vector_index, rows_for_hits
+from app.vector_search import ann_candidates, candidate_distance, resolve_search_mode, search_mode_settings
 from app import config
 from sqlalchemy import text
 from sqlalchemy.orm import Session
@@ -319,7 +322,7 @@ def _convert_show_row(row: Show) -> dict:
         "title": row.title,
         "recommendation_reason": None,
         "genres": genres,
-        "short_summary": _build_short_summary(row.overview),
+        "short_summary": getattr(row, "short_overview", None) or _build_short_summary(row.overview),
         "content_rating": getattr(row, "content_rating", None),
         "average_episode_length": getattr(row, "average_episode_length", None),
         "number_of_seasons": getattr(row, "number_of_seasons", None),
@@ -382,14 +385,16 @@ def _fetch_candidate_rows(db: Session, query_vec: list[float], top_k: int) -> li
     if len(query_vec) != EMBED_DIM:
         return []
 
-    distance_expr = Show.embedding.cosine_distance(query_vec)
-    return (
-        db.query(Show)
-        .filter(Show.embedding.isnot(None))
-        .order_by(distance_expr.asc())
-        .limit(top_k)
-        .all()
-    )
+    local_index = get_local_vector_index()
+    if local_index is not None:
+        return [show for show, _ in rows_for_hits(db, local_index.search(query_vec, top_k))]
+
+    candidates = ann_candidates(query_vec, rows_needed=top_k)
+    distance_expr = candidate_distance(query_vec, candidates)
+    q = db.query(Show).filter(Show.embedding.isnot(None))
+    if candidates is not None:
+        q = q.join(candidates, candidates.c.id == Show.id)
+    return q.order_by(distance_expr.asc()).limit(top_k).all()
 
 
 def _build_recommendation_reason(
@@ -467,8 +472,25 @@ def recommend_shows(
     top_n: Optional[int] = None,
     candidate_top_k: Optional[int] = None,
 ) -> List[RecommendationOutput]:
+    """recommend_shows_with_mode() without the search mode."""
+    outputs, _ = recommend_shows_with_mode(
+        user_input, db=db, age=age, top_n=top_n, candidate_top_k=candidate_top_k
+    )
+    return outputs
+
+
+def recommend_shows_with_mode(
+    user_input: RecommendationInput,
+    *,
+    db: Optional[Session] = None,
+    age: Optional[int] = None,
+    top_n: Optional[int] = None,
+    candidate_top_k: Optional[int] = None,
+) -> tuple[List[RecommendationOutput], Optional[SearchMode]]:
     """
-    Recommend shows based on user input.
+    Recommend shows based on user input; also returns the vector search mode the candidates
+    came from (exact for the local vector index), or None when no vector search supplied them
+    (form flow, full DB scan or static fallback).
 
     Age is inferred from authenticated user's date_of_birth when available.
     When age is None (unauthenticated), defaults to 18 (adult) so age filtering is skipped.
@@ -476,6 +498,9 @@ def recommend_shows(
     Data source priority:
     1) Postgres `shows` table (if db provided and has rows)
     2) Static dataset in app/data.py (fallback for empty DB or DB errors)
+
+    Query path: candidate retrieval runs in user_input.mode (default exact in Family context,
+    where filters discard most candidates, else balanced).
     """
     if top_n is None:
         top_n = config.DEFAULT_TOP_N
@@ -528,12 +553,23 @@ def recommend_shows(
 
     shows: list[dict] = []
     source_path: str = "fallback"
+    candidate_mode: Optional[SearchMode] = None
 
     if query_text and db is not None:
         source_path = "semantic"
         try:
             query_vec = embed_text(query_text)
-            candidate_rows = _fetch_candidate_rows(db, query_vec, candidate_top_k)
+            if get_local_vector_index() is not None:
+                # In-process exact scan; no planner settings to apply.
+                candidate_mode = SearchMode.EXACT
+                candidate_rows = _fetch_candidate_rows(db, query_vec, candidate_top_k)
+            else:
+                candidate_mode = resolve_search_mode(
+                    user_input.mode,
+                    family_context=user_input.watching_context == WatchingContext.FAMILY,
+                )
+                with search_mode_settings(db, candidate_mode, rows_needed=candidate_top_k):
+                    candidate_rows = _fetch_candidate_rows(db, query_vec, candidate_top_k)
             shows = _load_shows_from_rows(candidate_rows)
             # Debug: DB total vs semantic-search candidates (only shows with non-null embedding are candidates).
             db_total = db.query(Show).count()
@@ -1371,4 +1407,4 @@ def recommend_shows(
             logger.info("Kids/Family: filled remaining slots with Family-genre fallback (used %d of %d).", min(need, len(family_only)), len(family_only))
 
     logger.info("[recommend] final_result_count=%d (requested top_n=%d)", len(outputs), top_n)
-    return outputs
+    return outputs, (candidate_mode if source_path == "semantic" else None)
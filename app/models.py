@@ -1,8 +1,14 @@
-from sqlalchemy import Column, Integer, String, Date, Float, JSON, DateTime, func, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Date, Float, JSON, DateTime, func, ForeignKey, event
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from pgvector.sqlalchemy import Vector
 
 from app.db import Base
+from app.shared import show_display_fields
+
+
+# Postgres text[]; JSON list on SQLite (tests create tables there).
+TextArray = ARRAY(Text).with_variant(JSON(), "sqlite")
 
 
 class User(Base):
@@ -67,9 +73,62 @@ class Show(Base):
     number_of_seasons = Column(Integer, nullable=True)
     original_language = Column(String, nullable=True)
 
+    # Display fields derived from genres/overview at write time (see _sync_show_display_fields),
+    # so search result building only copies fields. NULL on rows not yet backfilled.
+    genre_names = Column(TextArray, nullable=True)
+    short_overview = Column(String, nullable=True)
+    overview_tokens = Column(TextArray, nullable=True)
+
     # Vector embedding for semantic search / recommendations (MiniLM 384 dims)
     embedding = Column(Vector(384), nullable=True)
+    # app.embeddings.embedding_text_hash() of the text the stored embedding was computed from;
+    # scripts/generate_embeddings.py only re-embeds rows whose text hash changed.
+    embedding_text_hash = Column(String(64), nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
-    watchlist_items = relationship("WatchlistItem", back_populates="show")  # User-facing: Favorites
\ No newline at end of file
+    watchlist_items = relationship("WatchlistItem", back_populates="show")  # User-facing: Favorites
+
+
+@event.listens_for(Show, "before_insert")
+@event.listens_for(Show, "before_update")
+def _sync_show_display_fields(_mapper, _connection, target: Show) -> None:
+    """Keep precomputed display columns in step with genres/overview on every ORM write."""
+    for name, value in show_display_fields(target.genres, target.overview).items():
+        setattr(target, name, value)
+
+
+class ShowNeighbor(Base):
+    """Precomputed more-like-this: top-N neighbours per show by embedding cosine distance.
+    PK (show_id, rank) so a show's list is a primary-key range read. Rebuilt by
+    scripts/build_show_neighbors.py for shows whose embeddings changed."""
+
+    __tablename__ = "show_neighbors"
+
+    show_id = Column(Integer, ForeignKey("shows.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)  # 1 = closest
+    neighbor_id = Column(Integer, ForeignKey("shows.id", ondelete="CASCADE"), index=True, nullable=False)
+    distance = Column(Float, nullable=False)
+
+class EmbeddingShard(Base):
+    """Progress of one id-range shard of a sharded scripts/generate_embeddings.py run (--workers N).
+    Shows with start_id < id <= end_id (NULL = no upper bound); last_id is committed together with
+    the embeddings written up to it, so a restarted worker resumes after it."""
+
+    __tablename__ = "embedding_shards"
+
+    shard_id = Column(Integer, primary_key=True)
+    start_id = Column(Integer, nullable=False)
+    end_id = Column(Integer, nullable=True)
+    last_id = Column(Integer, nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class TmdbSyncState(Base):
+    """Watermark of a TMDB delta sync feed (scripts/sync_tmdb_changes.py): start of the last successful run."""
+
+    __tablename__ = "tmdb_sync_state"
+
+    name = Column(String, primary_key=True)
+    synced_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,25 +1,51 @@
+import base64
+import binascii
 from datetime import date
 import json
 import logging
 import re
+import secrets
 from pathlib import Path
-from typing import List
+from threading import RLock
+from typing import Iterable, List
 
-from fastapi import APIRouter, Depends
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
-from sqlalchemy import or_
+from sqlalchemy import or_, select, text, tuple_
 
+from app import config
 from app.db import get_db
-from app.embeddings import EMBED_DIM, embed_text
-from app.models import Show
-from app.schemas import SemanticSearchRequest, SemanticSearchResult, MoreLikeThisRequest
-from app.shared import TMDB_TV_GENRE_ID_TO_NAME, shorten_text
+from app.embeddings import EMBED_DIM, embed_text, embed_texts
+from app.models import Show, ShowNeighbor, User, WatchlistItem
+from app.schemas import (
+    SemanticSearchRequest,
+    SemanticSearchResult,
+    SemanticSearchBatchRequest,
+    SemanticSearchBatchResponse,
+    MoreLikeThisRequest,
+    MoreLikeTheseRequest,
+    SearchMode,
+)
+from app.shared import normalize_genres, shorten_text, tokenize as _tokenize
+from app.dependencies import get_current_user_optional
+from app.local_vector_index import get_local_vector_index, rows_for_hits
+from app.vector_search import (
+    SEARCH_MODE_HEADER,
+    ann_candidates,
+    candidate_distance,
+    resolve_search_mode,
+    search_mode_settings,
+    spherical_kmeans,
+)
 from app.exceptions import (
     AppException,
     QUERY_REQUIRED,
     EMBEDDING_ERROR,
     SEARCH_FAILED,
+    INVALID_CURSOR,
+    CREDENTIALS_INVALID,
     SHOW_NOT_FOUND,
     SHOW_NO_EMBEDDING,
 )
@@ -45,21 +71,9 @@ def _short_overview(text: str | None) -> str:
     return shorten_text(text, fallback="No overview available.")
 
 
-def normalize_genres(value) -> list[str]:
-    if not isinstance(value, list):
-        return []
-
-    out: list[str] = []
-    for g in value:
-        if isinstance(g, int):
-            out.append(TMDB_TV_GENRE_ID_TO_NAME.get(g, str(g)))
-        elif isinstance(g, str):
-            cleaned = g.strip()
-            if cleaned:
-                out.append(cleaned)
-        else:
-            out.append(str(g))
-    return out
+def _display_overview(show) -> str:
+    """Precomputed shows.short_overview when present, else shorten the raw overview."""
+    return getattr(show, "short_overview", None) or _short_overview(show.overview)
 
 
 # Stopwords to exclude from explanation overlap logic (avoids "themes around 'about'").
@@ -72,12 +86,6 @@ _STOPWORDS = frozenset({
 })
 
 
-def _tokenize(text: str | None) -> set[str]:
-    if not text:
-        return set()
-    return {t for t in re.findall(r"[a-z0-9]+", text.lower()) if len(t) > 2}
-
-
 def _distance_bucket(distance: float | None) -> str:
     if distance is None:
         return "A relevant semantic match"
@@ -113,6 +121,148 @@ HYBRID_KEYWORD_WEIGHT = 0.4   # weight for keyword match score
 DEFAULT_DISTANCE_WHEN_NO_SEMANTIC = 0.5  # used for keyword-only candidates in response
 RELEVANCE_FLOOR_COMBINED_SCORE = 0.32  # exclude weak matches; may return fewer than top_k
 
+# Cursor pagination: page 1 is the hybrid ranking above; later pages walk the pure distance
+# ordering with a keyset predicate, skipping ids already shown on page 1.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+SEMANTIC_SEARCH_MAX_DEPTH = 500  # stop issuing cursors once this many results were served
+CURSOR_EMBEDDING_CACHE_TTL_SECONDS = 15 * 60
+CURSOR_EMBEDDING_CACHE_MAX_SIZE = 1024
+
+_CURSOR_CACHE_LOCK = RLock()
+# Query embedding per cursor session, so later pages do not re-run the model.
+_CURSOR_EMBEDDINGS: TTLCache[str, list[float]] = TTLCache(
+    maxsize=CURSOR_EMBEDDING_CACHE_MAX_SIZE,
+    ttl=CURSOR_EMBEDDING_CACHE_TTL_SECONDS,
+)
+
+
+def _invalid_cursor() -> AppException:
+    return AppException(
+        status_code=400,
+        error_code=INVALID_CURSOR,
+        message="Invalid or expired cursor; restart the search from the first page.",
+        details={},
+    )
+
+
+def _encode_cursor(state: dict) -> str:
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(token: str) -> dict:
+    """
+    Decode a cursor token into its state:
+    s (session id), q (query), d/i (last distance/id or None), b (backend that computed d),
+    n (results served), x (page-1 ids).
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(state, dict):
+            raise ValueError("cursor state must be an object")
+        state["s"] = str(state["s"])
+        state["q"] = str(state["q"])
+        state["d"] = float(state["d"]) if state.get("d") is not None else None
+        state["i"] = int(state["i"]) if state.get("i") is not None else None
+        state["b"] = str(state.get("b") or "")
+        state["n"] = int(state["n"])
+        state["x"] = [int(x) for x in state.get("x") or []]
+    except (KeyError, TypeError, ValueError, binascii.Error, UnicodeError):
+        raise _invalid_cursor() from None
+    return state
+
+
+def _cache_cursor_embedding(session_id: str, query_vec: list[float]) -> None:
+    with _CURSOR_CACHE_LOCK:
+        _CURSOR_EMBEDDINGS[session_id] = query_vec
+
+
+def _cursor_embedding(session_id: str, query: str) -> list[float]:
+    """Cached query embedding for a cursor session; re-embeds on expiry or on another worker."""
+    with _CURSOR_CACHE_LOCK:
+        cached = _CURSOR_EMBEDDINGS.get(session_id)
+    if cached is not None:
+        return cached
+    query_vec = embed_text(query)
+    _cache_cursor_embedding(session_id, query_vec)
+    return query_vec
+
+
+def _rows_needed_for_depth(rows_to_skip: int, top_k: int) -> int:
+    """
+    Rows the HNSW scan must yield so top_k remain after the keyset predicate and exclusions
+    discard the rows_to_skip nearest ones (2x margin for recall). Feeds hnsw.ef_search.
+    """
+    return 2 * (rows_to_skip + top_k)
+
+
+# Backends that compute cursor distances: the in-process float32 matrix or pgvector.
+_LOCAL_BACKEND = "local"
+_PGVECTOR_BACKEND = "pgvector"
+
+
+def _search_backend() -> str:
+    return _LOCAL_BACKEND if get_local_vector_index() is not None else _PGVECTOR_BACKEND
+
+
+def _keyset_for_backend(
+    db: Session, query_vec: list[float], after: tuple[float, int], backend: str
+) -> tuple[float, int]:
+    """
+    The (distance, id) keyset in the distances of `backend`. A cursor issued by the other backend
+    (e.g. by another worker) can differ in the last bits, which would skip or repeat the rows at
+    the page boundary, so the last row's distance is recomputed; kept as is if that row is gone.
+    """
+    last_id = after[1]
+    if backend == _LOCAL_BACKEND:
+        distance = get_local_vector_index().distance(query_vec, last_id)
+    else:
+        distance = db.execute(
+            select(Show.embedding.cosine_distance(query_vec)).where(Show.id == last_id)
+        ).scalar()
+    return (float(distance), last_id) if distance is not None else after
+
+
+def _fetch_semantic_page(
+    db: Session,
+    query_vec: list[float],
+    *,
+    after: tuple[float, int] | None,
+    exclude_ids: list[int],
+    top_k: int,
+    depth: int,
+    mode: SearchMode,
+) -> tuple[list[tuple[Show, float]], SearchMode]:
+    """
+    Next top_k rows in (distance, id) order after the (distance, id) keyset, excluding page-1 ids,
+    and the mode they were searched with (exact for the local index).
+    """
+    local_index = get_local_vector_index()
+    if local_index is not None:
+        hits = local_index.search(query_vec, top_k, exclude_ids=exclude_ids, after=after)
+        return rows_for_hits(db, hits), SearchMode.EXACT
+
+    rows_needed = _rows_needed_for_depth(depth + len(exclude_ids), top_k)
+    with search_mode_settings(db, mode, rows_needed=rows_needed):
+        candidates = ann_candidates(query_vec, rows_needed=rows_needed)
+        distance_expr = candidate_distance(query_vec, candidates)
+        # Inner query: ORDER BY distance alone, so the HNSW index scan can serve it (an index
+        # ordering operator cannot also sort by id). It yields every row up to the page.
+        inner = select(Show.id.label("id"), distance_expr.label("distance")).where(Show.embedding.isnot(None))
+        if candidates is not None:
+            inner = inner.join(candidates, candidates.c.id == Show.id)
+        if exclude_ids:
+            inner = inner.where(Show.id.notin_(exclude_ids))
+        page = inner.order_by(distance_expr.asc()).limit(rows_needed).subquery("ann_page")
+        # Outer query: the keyset predicate and its (distance, id) order over those rows only, so
+        # equal-distance rows at a page boundary are neither dropped nor repeated.
+        q = db.query(Show, page.c.distance).join(page, page.c.id == Show.id)
+        if after is not None:
+            q = q.filter(tuple_(page.c.distance, page.c.id) > tuple_(after[0], after[1]))
+        rows = q.order_by(page.c.distance.asc(), page.c.id.asc()).limit(top_k).all()
+    return rows, mode
+
 
 def _query_terms(query: str) -> list[str]:
     """Tokenize query into words (alphanumeric, length > 2) for keyword matching. Excludes stopwords."""
@@ -151,14 +301,25 @@ def _fetch_keyword_candidates(db: Session, query: str, limit: int) -> list[tuple
     return scored[:limit]
 
 
-def _build_fallback_match_reason(query: str, title: str, genres: list[str], overview: str | None, distance: float | None) -> str:
+def _build_fallback_match_reason(
+    query: str,
+    title: str,
+    genres: list[str],
+    overview: str | None,
+    distance: float | None,
+    *,
+    overview_tokens: Iterable[str] | None = None,
+) -> str:
+    """overview_tokens: precomputed shows.overview_tokens; when given, the overview is not re-tokenized."""
     query_tokens = _tokenize(query) - _STOPWORDS
     title_tokens = _tokenize(title)
-    overview_tokens = _tokenize(overview)
     genre_tokens = _tokenize(" ".join(genres))
 
     overlap_title = query_tokens & title_tokens
-    overlap_overview = query_tokens & overview_tokens
+    if overview_tokens is not None:
+        overlap_overview = query_tokens.intersection(overview_tokens)
+    else:
+        overlap_overview = query_tokens & _tokenize(overview)
     overlap_genres = query_tokens & genre_tokens
     distance_phrase = _distance_bucket(distance)
     score = _match_score_percent(distance)
@@ -179,11 +340,117 @@ def _build_fallback_match_reason(query: str, title: str, genres: list[str], over
     return f"{prefix} based on plot and tone similarity."
 
 
+def _to_search_result(
+    show,
+    *,
+    query: str,
+    distance: float | None,
+    default_distance: float = float("inf"),
+) -> SemanticSearchResult:
+    """
+    Build one result with an explanation; `show` is a Show or any row with the same fields.
+    Uses the precomputed display columns (genre_names, short_overview, overview_tokens) and only
+    derives them from genres/overview for rows written before those columns existed.
+    """
+    genres = getattr(show, "genre_names", None)
+    if genres is None:
+        genres = normalize_genres(show.genres)
+    overview_tokens = getattr(show, "overview_tokens", None)
+    first_air_date = show.first_air_date.isoformat() if isinstance(show.first_air_date, date) else None
+    return SemanticSearchResult(
+        id=show.id,
+        title=show.title,
+        genres=genres,
+        overview=_display_overview(show),
+        poster_url=show.poster_url,
+        vote_average=show.vote_average,
+        first_air_date=first_air_date,
+        distance=distance if distance is not None else default_distance,
+        ai_match_reason=_build_fallback_match_reason(
+            query=query,
+            title=show.title,
+            genres=genres,
+            overview=show.overview,
+            distance=distance,
+            overview_tokens=overview_tokens,
+        ),
+    )
+
+
+def _semantic_search_next_page(
+    db: Session,
+    response: Response,
+    *,
+    cursor: str,
+    query: str,
+    top_k: int,
+    mode: SearchMode,
+) -> list[SemanticSearchResult]:
+    """Page 2+: keyset page over the distance ordering, continuing from the cursor."""
+    state = _decode_cursor(cursor)
+    if state["q"] != query:
+        raise _invalid_cursor()
+
+    top_k = min(top_k, SEMANTIC_SEARCH_MAX_DEPTH - state["n"])
+    if top_k <= 0:
+        return []
+
+    query_vec = _cursor_embedding(state["s"], query)
+    if len(query_vec) != EMBED_DIM:
+        raise AppException(
+            status_code=500,
+            error_code=EMBEDDING_ERROR,
+            message="Embedding failed; please try again.",
+            details={},
+        )
+
+    after = (state["d"], state["i"]) if state["d"] is not None and state["i"] is not None else None
+    backend = _search_backend()
+    try:
+        if after is not None and state["b"] != backend:
+            after = _keyset_for_backend(db, query_vec, after, backend)
+        rows, effective_mode = _fetch_semantic_page(
+            db,
+            query_vec,
+            after=after,
+            exclude_ids=state["x"],
+            top_k=top_k,
+            depth=state["n"],
+            mode=mode,
+        )
+    except Exception as e:
+        logger.exception("Semantic search page query failed")
+        raise AppException(
+            status_code=503,
+            error_code=SEARCH_FAILED,
+            message="Search is temporarily unavailable. Please try again later.",
+            details={},
+        ) from e
+    response.headers[SEARCH_MODE_HEADER] = effective_mode.value
+
+    results = [
+        _to_search_result(show, query=query, distance=float(distance) if distance is not None else None)
+        for show, distance in rows
+    ]
+
+    depth = state["n"] + len(rows)
+    if len(rows) == top_k and depth < SEMANTIC_SEARCH_MAX_DEPTH:
+        last_show, last_distance = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(
+            {**state, "d": float(last_distance), "i": last_show.id, "b": backend, "n": depth}
+        )
+    return results
+
+
 @router.post("/semantic", response_model=List[SemanticSearchResult])
-def semantic_search(payload: SemanticSearchRequest, db: Session = Depends(get_db)):
+def semantic_search(payload: SemanticSearchRequest, response: Response, db: Session = Depends(get_db)):
     """
     Hybrid search: semantic (pgvector) + keyword (title/overview ILIKE).
     Both candidate sets are merged, deduplicated by show id, and ranked by a combined score.
+
+    Pagination: when more results exist, the X-Next-Cursor response header carries an opaque
+    token; send it back as `cursor` (same query) for the next page. Later pages follow pure
+    semantic distance order and reuse the cached query embedding.
     """
     query = payload.query.strip()
     if not query:
@@ -195,6 +462,11 @@ def semantic_search(payload: SemanticSearchRequest, db: Session = Depends(get_db
         )
 
     top_k = min(int(payload.top_k or 10), 50)
+    mode = resolve_search_mode(payload.mode)
+    if payload.cursor:
+        return _semantic_search_next_page(
+            db, response, cursor=payload.cursor, query=query, top_k=top_k, mode=mode
+        )
     pool_size = max(top_k * HYBRID_SEMANTIC_POOL_MULTIPLIER, top_k * HYBRID_KEYWORD_POOL_MULTIPLIER, 20)
 
     # --- 1. Semantic candidates: top pool_size by vector similarity ---
@@ -206,15 +478,24 @@ def semantic_search(payload: SemanticSearchRequest, db: Session = Depends(get_db
             message="Embedding failed; please try again.",
             details={},
         )
-    distance_expr = Show.embedding.cosine_distance(query_vec).label("distance")
+    local_index = get_local_vector_index()
     try:
-        semantic_rows = (
-            db.query(Show, distance_expr)
-            .filter(Show.embedding.isnot(None))
-            .order_by(distance_expr.asc())
-            .limit(pool_size)
-            .all()
-        )
+        if local_index is not None:
+            semantic_rows = rows_for_hits(db, local_index.search(query_vec, pool_size))
+            mode = SearchMode.EXACT
+        else:
+            with search_mode_settings(db, mode, rows_needed=pool_size):
+                candidates = ann_candidates(query_vec, rows_needed=pool_size)
+                distance_expr = candidate_distance(query_vec, candidates).label("distance")
+                semantic_query = db.query(Show, distance_expr).filter(Show.embedding.isnot(None))
+                if candidates is not None:
+                    semantic_query = semantic_query.join(candidates, candidates.c.id == Show.id)
+                semantic_rows = (
+                    semantic_query
+                    .order_by(distance_expr.asc())
+                    .limit(pool_size)
+                    .all()
+                )
     except Exception as e:
         logger.exception("Semantic search DB query failed")
         raise AppException(
@@ -223,6 +504,7 @@ def semantic_search(payload: SemanticSearchRequest, db: Session = Depends(get_db
             message="Search is temporarily unavailable. Please try again later.",
             details={},
         ) from e
+    response.headers[SEARCH_MODE_HEADER] = mode.value
 
     # --- 2. Keyword candidates: top pool_size by term match in title/overview ---
     keyword_rows = _fetch_keyword_candidates(db, query, pool_size)
@@ -259,32 +541,23 @@ def semantic_search(payload: SemanticSearchRequest, db: Session = Depends(get_db
     filtered_entries = [e for e in sorted_entries if _combined_score(e) >= RELEVANCE_FLOOR_COMBINED_SCORE]
 
     # --- 5. Build response: SemanticSearchResult with real or default distance ---
-    results: list[SemanticSearchResult] = []
-    for entry in filtered_entries:
-        show = entry["show"]
-        dist = entry["semantic_distance"]
-        distance_value = dist if dist is not None else DEFAULT_DISTANCE_WHEN_NO_SEMANTIC
-        first_air_date = show.first_air_date.isoformat() if isinstance(show.first_air_date, date) else None
-        genres = normalize_genres(show.genres)
-        match_reason = _build_fallback_match_reason(
+    results: list[SemanticSearchResult] = [
+        _to_search_result(
+            entry["show"],
             query=query,
-            title=show.title,
-            genres=genres,
-            overview=show.overview,
-            distance=dist,
+            distance=entry["semantic_distance"],
+            default_distance=DEFAULT_DISTANCE_WHEN_NO_SEMANTIC,
         )
-        results.append(
-            SemanticSearchResult(
-                id=show.id,
-                title=show.title,
-                genres=genres,
-                overview=_short_overview(show.overview),
-                poster_url=show.poster_url,
-                vote_average=show.vote_average,
-                first_air_date=first_air_date,
-                distance=distance_value,
-                ai_match_reason=match_reason,
-            )
+        for entry in filtered_entries
+    ]
+
+    # --- 6. Next-page cursor when semantic candidates remain beyond what page 1 showed ---
+    shown_ids = [r.id for r in results]
+    if any(show.id not in shown_ids for show, _ in semantic_rows):
+        session_id = secrets.token_urlsafe(12)
+        _cache_cursor_embedding(session_id, query_vec)
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(
+            {"s": session_id, "q": query, "d": None, "i": None, "b": None, "n": len(results), "x": shown_ids}
         )
 
     # #region agent log — debug /search/semantic final list returned to frontend
@@ -309,52 +582,304 @@ def semantic_search(payload: SemanticSearchRequest, db: Session = Depends(get_db
     return results
 
 
-@router.post("/more-like-this", response_model=List[SemanticSearchResult])
-def more_like_this(payload: MoreLikeThisRequest, db: Session = Depends(get_db)):
-    show = db.query(Show).filter(Show.id == payload.show_id).first()
-    if show is None:
+def _vector_literal(vec: list[float]) -> str:
+    """Serialize an embedding to pgvector's text input format ('[x,y,...]')."""
+    return "[" + ",".join(repr(float(x)) for x in vec) + "]"
+
+
+# One statement for the whole batch: unnest the query vectors (keeping their order) and run
+# a per-query top-k ANN lookup via LATERAL, so each inner ORDER BY ... LIMIT can use the HNSW index.
+_BATCH_SEMANTIC_SQL = text(
+    """
+    SELECT q.ord, s.id, s.title, s.genres, s.overview, s.poster_url,
+           s.vote_average, s.first_air_date, s.genre_names, s.short_overview,
+           s.overview_tokens, s.distance
+    FROM unnest(CAST(:query_vecs AS text[])) WITH ORDINALITY AS q(vec, ord)
+    CROSS JOIN LATERAL (
+        SELECT shows.id, shows.title, shows.genres, shows.overview, shows.poster_url,
+               shows.vote_average, shows.first_air_date, shows.genre_names,
+               shows.short_overview, shows.overview_tokens,
+               shows.embedding <=> CAST(q.vec AS vector) AS distance
+        FROM shows
+        WHERE shows.embedding IS NOT NULL
+        ORDER BY shows.embedding <=> CAST(q.vec AS vector)
+        LIMIT :top_k
+    ) AS s
+    ORDER BY q.ord, s.distance
+    """
+)
+
+
+@router.post("/semantic/batch", response_model=SemanticSearchBatchResponse)
+def semantic_search_batch(
+    payload: SemanticSearchBatchRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    """
+    Batch semantic search for offline callers (newsletters, precomputed carousels).
+    All queries are embedded in one model call and searched with one LATERAL SQL statement.
+    Pure vector similarity (no keyword merge); results are keyed by the trimmed query text.
+    """
+    queries: list[str] = []
+    for raw in payload.queries:
+        q = (raw or "").strip()
+        if not q:
+            raise AppException(
+                status_code=400,
+                error_code=QUERY_REQUIRED,
+                message="Query cannot be empty",
+                details={},
+            )
+        if q not in queries:
+            queries.append(q)
+
+    top_k = min(int(payload.top_k or 10), 50)
+    mode = resolve_search_mode(payload.mode)
+
+    query_vecs = embed_texts(queries)
+    if len(query_vecs) != len(queries) or any(len(v) != EMBED_DIM for v in query_vecs):
         raise AppException(
-            status_code=404,
-            error_code=SHOW_NOT_FOUND,
-            message="Show not found",
-            details={"show_id": payload.show_id},
+            status_code=500,
+            error_code=EMBEDDING_ERROR,
+            message="Embedding failed; please try again.",
+            details={},
         )
-    if show.embedding is None:
+
+    try:
+        with search_mode_settings(db, mode, rows_needed=top_k):
+            rows = db.execute(
+                _BATCH_SEMANTIC_SQL,
+                {"query_vecs": [_vector_literal(v) for v in query_vecs], "top_k": top_k},
+            ).all()
+    except Exception as e:
+        logger.exception("Batch semantic search DB query failed")
         raise AppException(
-            status_code=400,
-            error_code=SHOW_NO_EMBEDDING,
-            message="Show does not have an embedding",
-            details={"show_id": payload.show_id},
-        )
+            status_code=503,
+            error_code=SEARCH_FAILED,
+            message="Search is temporarily unavailable. Please try again later.",
+            details={},
+        ) from e
+    response.headers[SEARCH_MODE_HEADER] = mode.value
 
-    top_k = min(int(payload.top_k or 10), 50)
-    distance_expr = Show.embedding.cosine_distance(show.embedding).label("distance")
+    results: dict[str, list[SemanticSearchResult]] = {q: [] for q in queries}
+    for row in rows:
+        query = queries[int(row.ord) - 1]
+        distance = float(row.distance) if row.distance is not None else None
+        results[query].append(_to_search_result(row, query=query, distance=distance))
+
+    return SemanticSearchBatchResponse(results=results)
+
+
+@router.post("/more-like-this", response_model=List[SemanticSearchResult])
+def more_like_this(payload: MoreLikeThisRequest, db: Session = Depends(get_db)):
+    """
+    Similar shows by show_id. Served from the precomputed show_neighbors table (primary-key range read);
+    falls back to a live ANN query when the show's neighbours have not been built yet.
+    """
+    top_k = min(int(payload.top_k or 10), config.SHOW_NEIGHBORS_TOP_K)
 
     rows = (
-        db.query(Show, distance_expr)
-        .filter(Show.embedding.isnot(None))
-        .filter(Show.id != show.id)
-        .order_by(distance_expr.asc())
+        db.query(Show, ShowNeighbor.distance)
+        .join(ShowNeighbor, ShowNeighbor.neighbor_id == Show.id)
+        .filter(ShowNeighbor.show_id == payload.show_id)
+        .order_by(ShowNeighbor.rank.asc())
         .limit(top_k)
         .all()
     )
 
-    results: list[SemanticSearchResult] = []
-    for row, distance in rows:
-        first_air_date = row.first_air_date.isoformat() if isinstance(row.first_air_date, date) else None
-        results.append(
-            SemanticSearchResult(
-                id=row.id,
-                title=row.title,
-                genres=normalize_genres(row.genres),
-                overview=_short_overview(row.overview),
-                poster_url=row.poster_url,
-                vote_average=row.vote_average,
-                first_air_date=first_air_date,
-                distance=float(distance) if distance is not None else float("inf"),
+    if not rows:
+        # Only fetch existence / has-embedding flags; the vector itself stays in Postgres.
+        source = (
+            db.query(Show.id, Show.embedding.isnot(None).label("has_embedding"))
+            .filter(Show.id == payload.show_id)
+            .first()
+        )
+        if source is None:
+            raise AppException(
+                status_code=404,
+                error_code=SHOW_NOT_FOUND,
+                message="Show not found",
+                details={"show_id": payload.show_id},
+            )
+        if not source.has_embedding:
+            raise AppException(
+                status_code=400,
+                error_code=SHOW_NO_EMBEDDING,
+                message="Show does not have an embedding",
+                details={"show_id": payload.show_id},
             )
+
+        local_index = get_local_vector_index()
+        source_vec = local_index.vector(payload.show_id) if local_index is not None else None
+        if source_vec is not None:
+            hits = local_index.search(source_vec, top_k, exclude_ids=[payload.show_id])
+            return [_to_similar_result(show, distance) for show, distance in rows_for_hits(db, hits)]
+
+        source_embedding = (
+            select(Show.embedding).where(Show.id == payload.show_id).scalar_subquery()
+        )
+        # +1: the source show is its own nearest candidate.
+        candidates = ann_candidates(source_embedding, rows_needed=top_k + 1)
+        distance_expr = candidate_distance(source_embedding, candidates).label("distance")
+        similar_query = (
+            db.query(Show, distance_expr)
+            .filter(Show.embedding.isnot(None))
+            .filter(Show.id != payload.show_id)
+        )
+        if candidates is not None:
+            similar_query = similar_query.join(candidates, candidates.c.id == Show.id)
+        rows = (
+            similar_query
+            .order_by(distance_expr.asc())
+            .limit(top_k)
+            .all()
         )
 
+    results = [_to_similar_result(row, distance) for row, distance in rows]
     results.sort(key=lambda r: r.distance)
     return results
 
+
+# Shared select list for the more-like-these statements (precomputed display columns included).
+_SIMILAR_COLUMNS = """
+    shows.id, shows.title, shows.genres, shows.overview, shows.poster_url, shows.vote_average,
+    shows.first_air_date, shows.genre_names, shows.short_overview, shows.overview_tokens
+"""
+
+# Single taste: the normalized mean of the seed embeddings is computed by the aggregate in the
+# derived table and fed straight into one ANN query; no vector leaves Postgres.
+_CENTROID_SIMILAR_SQL = text(
+    f"""
+    SELECT s.*
+    FROM (
+        SELECT l2_normalize(avg(embedding)) AS centroid
+        FROM shows
+        WHERE id = ANY(:seed_ids) AND embedding IS NOT NULL
+    ) AS c
+    CROSS JOIN LATERAL (
+        SELECT {_SIMILAR_COLUMNS}, shows.embedding <=> c.centroid AS distance
+        FROM shows
+        WHERE shows.embedding IS NOT NULL AND NOT (shows.id = ANY(:seed_ids))
+        ORDER BY shows.embedding <=> c.centroid
+        LIMIT :top_k
+    ) AS s
+    WHERE c.centroid IS NOT NULL
+    ORDER BY s.distance
+    """
+)
+
+# Several tastes: one LATERAL ANN per centroid, deduplicated by show (best rank wins) and
+# interleaved by per-centroid rank so every taste cluster is represented near the top.
+_MULTI_CENTROID_SIMILAR_SQL = text(
+    f"""
+    SELECT m.*
+    FROM (
+        SELECT DISTINCT ON (s.id) s.*
+        FROM unnest(CAST(:centroids AS text[])) WITH ORDINALITY AS c(vec, ord)
+        CROSS JOIN LATERAL (
+            SELECT ranked.*, row_number() OVER (ORDER BY ranked.distance) AS taste_rank
+            FROM (
+                SELECT {_SIMILAR_COLUMNS}, shows.embedding <=> CAST(c.vec AS vector) AS distance
+                FROM shows
+                WHERE shows.embedding IS NOT NULL AND NOT (shows.id = ANY(:seed_ids))
+                ORDER BY shows.embedding <=> CAST(c.vec AS vector)
+                LIMIT :top_k
+            ) AS ranked
+        ) AS s
+        ORDER BY s.id, s.taste_rank, s.distance
+    ) AS m
+    ORDER BY m.taste_rank, m.distance
+    LIMIT :top_k
+    """
+)
+
+
+def _to_similar_result(row, distance: float | None) -> SemanticSearchResult:
+    """More-like-this style result (no match reason); `row` is a Show or a row with the same fields."""
+    first_air_date = row.first_air_date.isoformat() if isinstance(row.first_air_date, date) else None
+    genres = getattr(row, "genre_names", None)
+    return SemanticSearchResult(
+        id=row.id,
+        title=row.title,
+        genres=genres if genres is not None else normalize_genres(row.genres),
+        overview=_display_overview(row),
+        poster_url=row.poster_url,
+        vote_average=row.vote_average,
+        first_air_date=first_air_date,
+        distance=float(distance) if distance is not None else float("inf"),
+    )
+
+
+@router.post("/more-like-these", response_model=List[SemanticSearchResult])
+def more_like_these(
+    payload: MoreLikeTheseRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User | None = Depends(get_current_user_optional),
+):
+    """
+    Recommendations from several shows at once (default: the caller's favorites).
+    clusters=1 ranks by similarity to the normalized centroid of the seeds; clusters>1 runs k-means
+    over the seed embeddings and interleaves the nearest shows to each taste centroid.
+    Seed shows are excluded. One ANN statement replaces one more-like-this call per favorite.
+    """
+    if payload.show_ids is not None:
+        seed_ids = sorted(set(payload.show_ids))
+    elif current_user is not None:
+        seed_ids = [
+            show_id
+            for (show_id,) in db.query(WatchlistItem.show_id)
+            .filter(WatchlistItem.user_id == current_user.id)
+            .filter(WatchlistItem.show_id.isnot(None))
+            .distinct()
+            .all()
+        ]
+    else:
+        raise AppException(
+            status_code=401,
+            error_code=CREDENTIALS_INVALID,
+            message="Log in to use your favorites, or provide show_ids",
+            details={},
+        )
+    if not seed_ids:
+        return []
+
+    top_k = min(int(payload.top_k or 10), 50)
+    mode = resolve_search_mode(payload.mode)
+
+    try:
+        if payload.clusters <= 1:
+            statement = _CENTROID_SIMILAR_SQL
+            params: dict = {"seed_ids": seed_ids, "top_k": top_k}
+        else:
+            seed_vectors = [
+                vec
+                for (vec,) in db.query(Show.embedding)
+                .filter(Show.id.in_(seed_ids))
+                .filter(Show.embedding.isnot(None))
+                .all()
+            ]
+            if not seed_vectors:
+                return []
+            centroids = spherical_kmeans(seed_vectors, payload.clusters)
+            statement = _MULTI_CENTROID_SIMILAR_SQL
+            params = {
+                "seed_ids": seed_ids,
+                "top_k": top_k,
+                "centroids": [_vector_literal(c) for c in centroids],
+            }
+        # The seeds are the nearest rows to their own centroid and are filtered out after the scan.
+        with search_mode_settings(db, mode, rows_needed=top_k + len(seed_ids)):
+            rows = db.execute(statement, params).all()
+    except Exception as e:
+        logger.exception("More-like-these query failed")
+        raise AppException(
+            status_code=503,
+            error_code=SEARCH_FAILED,
+            message="Search is temporarily unavailable. Please try again later.",
+            details={},
+        ) from e
+    response.headers[SEARCH_MODE_HEADER] = mode.value
+
+    return [_to_similar_result(row, row.distance) for row in rows]
@@ -1,6 +1,6 @@
 from datetime import date
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field, EmailStr, model_validator
 
 
@@ -32,6 +32,12 @@ class WatchingContext(str, Enum):
     FAMILY = "family"
 
 
+class SearchMode(str, Enum):
+    FAST = "fast"            # low hnsw.ef_search: autocomplete-style latency
+    BALANCED = "balanced"    # default hnsw.ef_search
+    EXACT = "exact"          # bypass the HNSW index: exact cosine scan, full recall
+
+
 class RecommendationInput(BaseModel):
     binge_preference: BingePreference = Field(
         BingePreference.BINGE,
@@ -73,6 +79,11 @@ class RecommendationInput(BaseModel):
         description="For unauthenticated users only: True = apply family/general safety filter (under 18), False/None = adult (18+). Ignored when authenticated.",
     )
 
+    mode: Optional[SearchMode] = Field(
+        None,
+        description="Vector search recall/latency mode for the query path (default: exact in family context, else balanced)",
+    )
+
 
 # --------------------------------- OUTPUT ---------------------------------
 class RecommendationOutput(BaseModel):
@@ -252,6 +263,11 @@ class WatchlistTitle(BaseModel):
 class SemanticSearchRequest(BaseModel):
     query: str = Field(..., min_length=1, description="Natural language search query")
     top_k: int = Field(10, ge=1, le=50, description="Number of results to return (max 50)")
+    cursor: Optional[str] = Field(
+        None,
+        description="Opaque token from the previous page's X-Next-Cursor header; omit for the first page",
+    )
+    mode: Optional[SearchMode] = Field(None, description="Recall/latency mode (fast, balanced, exact); default balanced")
 
 
 class SemanticSearchResult(BaseModel):
@@ -266,6 +282,40 @@ class SemanticSearchResult(BaseModel):
     distance: float = Field(..., description="Cosine distance (lower is more similar)")
 
 
+class SemanticSearchBatchRequest(BaseModel):
+    queries: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Natural language search queries (max 100); duplicates are searched once",
+    )
+    top_k: int = Field(10, ge=1, le=50, description="Number of results to return per query (max 50)")
+    mode: Optional[SearchMode] = Field(None, description="Recall/latency mode (fast, balanced, exact); default balanced")
+
+
+class SemanticSearchBatchResponse(BaseModel):
+    results: Dict[str, List[SemanticSearchResult]] = Field(
+        default_factory=dict,
+        description="Top-k results keyed by the (trimmed) query text",
+    )
+
+
 class MoreLikeThisRequest(BaseModel):
     show_id: int = Field(..., ge=1, description="Show id to find similar titles for")
-    top_k: int = Field(10, ge=1, le=50, description="Number of results to return (max 50)")
\ No newline at end of file
+    top_k: int = Field(10, ge=1, le=50, description="Number of results to return (max 50)")
+
+
+class MoreLikeTheseRequest(BaseModel):
+    show_ids: Optional[List[int]] = Field(
+        None,
+        max_length=200,
+        description="Seed show ids; omit to use the authenticated caller's favorites",
+    )
+    top_k: int = Field(10, ge=1, le=50, description="Number of results to return (max 50)")
+    clusters: int = Field(
+        1,
+        ge=1,
+        le=5,
+        description="1 = one normalized centroid; >1 = k-means taste centroids with interleaved results",
+    )
+    mode: Optional[SearchMode] = Field(None, description="Recall/latency mode (fast, balanced, exact); default balanced")
@@ -4,6 +4,9 @@ Shared constants and small helper utilities used across backend modules and scri
 
 from __future__ import annotations
 
+import re
+from typing import Any
+
 
 # TMDB TV genre id -> normalized lowercase genre name.
 TMDB_TV_GENRE_ID_TO_NAME: dict[int, str] = {
@@ -40,3 +43,41 @@ def shorten_text(text: str | None, *, fallback: str, max_length: int = 220) -> s
         cleaned = text.strip()
         return cleaned if len(cleaned) <= max_length else cleaned[: max_length - 3].rstrip() + "..."
     return fallback
+
+
+def normalize_genres(value: Any) -> list[str]:
+    """Display genre names from stored genres (TMDB ids mapped to names, unknown ids kept as strings)."""
+    if not isinstance(value, list):
+        return []
+
+    out: list[str] = []
+    for g in value:
+        if isinstance(g, int):
+            out.append(TMDB_TV_GENRE_ID_TO_NAME.get(g, str(g)))
+        elif isinstance(g, str):
+            cleaned = g.strip()
+            if cleaned:
+                out.append(cleaned)
+        else:
+            out.append(str(g))
+    return out
+
+
+def tokenize(text: str | None) -> set[str]:
+    """Lowercase alphanumeric tokens longer than 2 characters (match-reason overlap logic)."""
+    if not text:
+        return set()
+    return {t for t in re.findall(r"[a-z0-9]+", text.lower()) if len(t) > 2}
+
+
+def show_display_fields(genres: Any, overview: str | None) -> dict[str, Any]:
+    """
+    Derived columns stored on shows at write time so result building only copies fields:
+    genre_names, short_overview (None when blank; callers apply their own fallback), overview_tokens.
+    """
+    short = shorten_text(overview, fallback="")
+    return {
+        "genre_names": normalize_genres(genres),
+        "short_overview": short or None,
+        "overview_tokens": sorted(tokenize(overview)),
+    }
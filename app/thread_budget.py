@@ -0,0 +1,135 @@
+"""
+CPU thread budget for the embedding model.
+
+Each uvicorn worker (and each embedding pool worker) that loads torch or ONNX Runtime would
+otherwise start one intra-op thread per host core, so N workers oversubscribe the CPU N times
+and p99 latency collapses under concurrent encodes. The budget divides the CPUs this container
+may actually use (affinity and cgroup quota) by the number of model-running processes.
+
+EMBEDDING_THREADS: "auto" (default) = cpus // processes, an integer = that many threads per
+process, "off" = leave library defaults alone. WEB_CONCURRENCY is the uvicorn worker count.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+# Read by OpenMP / MKL / OpenBLAS when they initialize, so set before numpy or torch are imported.
+BLAS_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+@dataclass(frozen=True)
+class ThreadBudget:
+    mode: str
+    cpus: int
+    cgroup_cpu_quota: Optional[float]
+    processes: int
+    intra_op_threads: Optional[int]
+    inter_op_threads: Optional[int]
+
+
+def cgroup_cpu_quota(root: Path = Path("/sys/fs/cgroup")) -> Optional[float]:
+    """CPUs allowed by the cgroup CFS quota (v2 cpu.max or v1 cfs_quota_us), None when unlimited."""
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus(quota: Optional[float]) -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        cpus = os.cpu_count() or 1
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return max(1, cpus)
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name) or default))
+    except ValueError:
+        return default
+
+
+def compute_thread_budget(*, cgroup_root: Path = Path("/sys/fs/cgroup")) -> ThreadBudget:
+    mode = (os.getenv("EMBEDDING_THREADS") or "auto").strip().lower()
+    quota = cgroup_cpu_quota(cgroup_root)
+    cpus = available_cpus(quota)
+    # Processes that run the model: every web worker, times its embedding pool workers if enabled.
+    processes = _int_env("WEB_CONCURRENCY", 1) * max(1, int(os.getenv("EMBEDDING_WORKERS") or 0))
+
+    if mode == "off":
+        return ThreadBudget(mode, cpus, quota, processes, None, None)
+    if mode == "auto":
+        intra = max(1, cpus // processes)
+    else:
+        try:
+            intra = max(1, int(mode))
+        except ValueError:
+            raise RuntimeError(f"EMBEDDING_THREADS must be 'auto', 'off' or an integer, got {mode!r}") from None
+        mode = "fixed"
+    # Single requests are one graph; inter-op parallelism only adds threads competing for the same cores.
+    return ThreadBudget(mode, cpus, quota, processes, intra, 1)
+
+
+def apply_thread_budget(budget: ThreadBudget) -> ThreadBudget:
+    """Export the budget to the BLAS/OpenMP env vars (explicitly set values win)."""
+    if budget.intra_op_threads is not None:
+        for name in BLAS_THREAD_ENV_VARS:
+            os.environ.setdefault(name, str(budget.intra_op_threads))
+    return budget
+
+
+def configure_torch(budget: ThreadBudget) -> None:
+    """Apply the budget to torch's intra/inter-op pools (called right after torch is imported)."""
+    if budget.intra_op_threads is None:
+        return
+    import torch
+
+    torch.set_num_threads(budget.intra_op_threads)
+    try:
+        torch.set_num_interop_threads(budget.inter_op_threads)
+    except RuntimeError:
+        # Only settable before the first parallel op; keep whatever is already running.
+        pass
+
+
+def effective_thread_metrics(budget: ThreadBudget) -> dict[str, float]:
+    """Budget inputs/outputs plus what the loaded libraries actually use (torch is not imported here)."""
+    metrics: dict[str, float] = {
+        "cpus_available": budget.cpus,
+        "model_processes": budget.processes,
+    }
+    if budget.cgroup_cpu_quota is not None:
+        metrics["cgroup_cpu_quota"] = budget.cgroup_cpu_quota
+    if budget.intra_op_threads is not None:
+        metrics["budget_intra_op_threads"] = budget.intra_op_threads
+        metrics["budget_inter_op_threads"] = budget.inter_op_threads
+    for name in BLAS_THREAD_ENV_VARS:
+        value = os.getenv(name)
+        if value and value.isdigit():
+            metrics[f"env_{name.lower()}"] = int(value)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        metrics["torch_intra_op_threads"] = torch.get_num_threads()
+        metrics["torch_inter_op_threads"] = torch.get_num_interop_threads()
+    return metrics
@@ -6,6 +6,8 @@ import logging
 from threading import RLock
 import requests
 from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 # Read API key from environment variables.
@@ -34,6 +36,63 @@ TMDB_CACHE_TTL_SECONDS = _int_env("TMDB_CACHE_TTL_SECONDS", 6 * 60 * 60)
 TMDB_CACHE_MAX_SIZE = _int_env("TMDB_CACHE_MAX_SIZE", 1024)
 TMDB_NEGATIVE_CACHE_TTL_SECONDS = _int_env("TMDB_NEGATIVE_CACHE_TTL_SECONDS", 2 * 60)
 
+# Connection pool per host, sized to the enrichment thread pool in app.logic (same env var).
+TMDB_HTTP_POOL_SIZE = _int_env("TMDB_ENRICH_MAX_WORKERS", 5)
+# Retries for idempotent GETs: connection errors and 5xx only. Read timeouts are not retried (a slow
+# TMDB is not asked again), and neither is 429 (callers treat it as "no enrichment" rather than make
+# a recommendation wait). A call can still make 1 + TMDB_HTTP_RETRIES attempts, each bounded by the
+# (2, 5) connect/read timeout, plus the backoff between them and any Retry-After on a 5xx: roughly
+# 3x the single-request timeout in the worst case.
+TMDB_HTTP_RETRIES = 2
+TMDB_HTTP_BACKOFF_SECONDS = 0.2
+
+_SESSION_LOCK = RLock()
+_SESSION: requests.Session | None = None
+
+
+def _new_session() -> requests.Session:
+    retry = Retry(
+        total=TMDB_HTTP_RETRIES,
+        read=0,
+        backoff_factor=TMDB_HTTP_BACKOFF_SECONDS,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=TMDB_HTTP_POOL_SIZE,
+        pool_maxsize=TMDB_HTTP_POOL_SIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _session() -> requests.Session:
+    """
+    The process-wide TMDB session: keep-alive connections are reused across calls and
+    enrichment threads instead of a TCP+TLS handshake per request.
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = _new_session()
+        return _SESSION
+
+
+def _reset_session_after_fork() -> None:
+    # Pooled sockets must not be shared with a forked child (e.g. gunicorn/uvicorn workers).
+    global _SESSION
+    _SESSION = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_session_after_fork)
+
+
 _CACHE_LOCK = RLock()
 _POSITIVE_CACHE: TTLCache[str, dict] = TTLCache(
     maxsize=TMDB_CACHE_MAX_SIZE,
@@ -66,6 +125,49 @@ def _cache_key_for_tmdb_id(tmdb_id: int | None) -> str | None:
         return None
 
 
+def parse_content_rating(data: dict) -> str | None:
+    """
+    Rating from a /tv/{id}/content_ratings payload (or the appended `content_ratings` object):
+    US rating if available, otherwise first rating; normalized (strip + upper).
+    """
+    results = data.get("results") or []
+    us_rating = None
+    first_rating = None
+    for item in results:
+        rating = (item.get("rating") or "").strip().upper()
+        if not rating:
+            continue
+        if first_rating is None:
+            first_rating = rating
+        if (item.get("iso_3166_1") or "").upper() == "US":
+            us_rating = rating
+            break
+    return us_rating or first_rating
+
+
+def parse_tv_details(data: dict) -> dict:
+    """number_of_seasons, average_episode_length and original_language from a /tv/{id} payload."""
+    number_of_seasons = data.get("number_of_seasons")
+    if number_of_seasons is not None and not isinstance(number_of_seasons, int):
+        number_of_seasons = None
+    run_times = data.get("episode_run_time") or []
+    average_episode_length = None
+    if run_times:
+        valid = [int(x) for x in run_times if isinstance(x, (int, float)) and x > 0]
+        if valid:
+            average_episode_length = int(round(sum(valid) / len(valid)))
+    original_language = data.get("original_language")
+    if original_language is not None and not isinstance(original_language, str):
+        original_language = None
+    elif original_language:
+        original_language = original_language.strip() or None
+    return {
+        "number_of_seasons": number_of_seasons,
+        "average_episode_length": average_episode_length,
+        "original_language": original_language,
+    }
+
+
 def _fetch_tv_content_ratings_uncached(tmdb_id: int) -> str | None:
     """
     Fetch content ratings for a TV series from TMDB.
@@ -75,7 +177,7 @@ def _fetch_tv_content_ratings_uncached(tmdb_id: int) -> str | None:
         return None
     url = f"{BASE_URL}/tv/{tmdb_id}/content_ratings"
     try:
-        response = requests.get(
+        response = _session().get(
             url,
             params={"api_key": TMDB_API_KEY},
             timeout=(2, 5),
@@ -89,19 +191,7 @@ def _fetch_tv_content_ratings_uncached(tmdb_id: int) -> str | None:
         data = response.json()
     except ValueError:
         return None
-    results = data.get("results") or []
-    us_rating = None
-    first_rating = None
-    for item in results:
-        rating = (item.get("rating") or "").strip().upper()
-        if not rating:
-            continue
-        if first_rating is None:
-            first_rating = rating
-        if (item.get("iso_3166_1") or "").upper() == "US":
-            us_rating = rating
-            break
-    return us_rating or first_rating
+    return parse_content_rating(data)
 
 
 def _fetch_tv_details_uncached(tmdb_id: int) -> dict | None:
@@ -113,7 +203,7 @@ def _fetch_tv_details_uncached(tmdb_id: int) -> dict | None:
         return None
     url = f"{BASE_URL}/tv/{tmdb_id}"
     try:
-        response = requests.get(
+        response = _session().get(
             url,
             params={"api_key": TMDB_API_KEY, "language": "en-US"},
             timeout=(2, 5),
@@ -127,25 +217,7 @@ def _fetch_tv_details_uncached(tmdb_id: int) -> dict | None:
         data = response.json()
     except (requests.HTTPError, ValueError):
         return None
-    number_of_seasons = data.get("number_of_seasons")
-    if number_of_seasons is not None and not isinstance(number_of_seasons, int):
-        number_of_seasons = None
-    run_times = data.get("episode_run_time") or []
-    average_episode_length = None
-    if run_times:
-        valid = [int(x) for x in run_times if isinstance(x, (int, float)) and x > 0]
-        if valid:
-            average_episode_length = int(round(sum(valid) / len(valid)))
-    original_language = data.get("original_language")
-    if original_language is not None and not isinstance(original_language, str):
-        original_language = None
-    elif original_language:
-        original_language = original_language.strip() or None
-    return {
-        "number_of_seasons": number_of_seasons,
-        "average_episode_length": average_episode_length,
-        "original_language": original_language,
-    }
+    return parse_tv_details(data)
 
 
 def _search_tv_show_uncached(title: str, *, year: int | str | None = None) -> dict | None:
@@ -162,7 +234,7 @@ def _search_tv_show_uncached(title: str, *, year: int | str | None = None) -> di
 
     # Keep timeouts low so recommendations don't hang when TMDB is slow.
     # (connect timeout, read timeout)
-    response = requests.get(url, params=params, timeout=(2, 5))
+    response = _session().get(url, params=params, timeout=(2, 5))
 
     # Rate limited / blocked: treat as optional enrichment
     if response.status_code == 429:
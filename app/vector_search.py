@@ -0,0 +1,163 @@
+"""
+Per-request pgvector tuning shared by /search and /recommend.
+
+A SearchMode maps to transaction-local planner settings: fast/balanced set hnsw.ef_search,
+exact disables index scans so ORDER BY embedding <=> query is an exact cosine scan.
+
+With a compact storage tier (config.VECTOR_STORAGE_TIER = halfvec | bit), ann_candidates() takes
+an oversampled candidate set from the compact HNSW index in a MATERIALIZED CTE; the caller joins it
+to shows and orders by candidate_distance(), which re-ranks exactly those candidates on their
+full-precision embedding.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+import numpy as np
+from pgvector.sqlalchemy import BIT, HALFVEC, VECTOR
+from sqlalchemy import cast, func, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import CTE
+
+from app import config
+from app.embeddings import EMBED_DIM
+from app.models import Show
+from app.schemas import SearchMode
+
+
+# Response header reporting the mode a vector query actually ran with.
+SEARCH_MODE_HEADER = "X-Search-Mode"
+
+_EF_SEARCH_BY_MODE = {
+    SearchMode.FAST: config.HNSW_EF_SEARCH_FAST,
+    SearchMode.BALANCED: config.HNSW_EF_SEARCH_BALANCED,
+}
+
+
+def resolve_search_mode(requested: Optional[SearchMode], *, family_context: bool = False) -> SearchMode:
+    """Explicit mode wins; otherwise exact for family context (filters discard most candidates), else balanced."""
+    if requested is not None:
+        return requested
+    return SearchMode.EXACT if family_context else SearchMode.BALANCED
+
+
+# Mode applied by the enclosing search_mode_settings() block (None outside one).
+_active_mode: ContextVar[Optional[SearchMode]] = ContextVar("vector_search_mode", default=None)
+
+
+def storage_tier() -> str:
+    tier = config.VECTOR_STORAGE_TIER
+    if tier not in config.VECTOR_RERANK_OVERSAMPLE:
+        raise RuntimeError(
+            f"Unknown VECTOR_STORAGE_TIER={tier!r}; expected one of {sorted(config.VECTOR_RERANK_OVERSAMPLE)}"
+        )
+    return tier
+
+
+def ann_candidate_limit(rows_needed: int) -> int:
+    """Rows to take from the tier's index: rows_needed x oversample, capped at what HNSW can return."""
+    oversample = config.VECTOR_RERANK_OVERSAMPLE[storage_tier()]
+    return max(1, min(config.HNSW_EF_SEARCH_MAX, int(rows_needed) * oversample))
+
+
+def hnsw_ef_search(mode: SearchMode, rows_needed: int) -> int | None:
+    """ef_search for mode, raised to the rows the index must yield (HNSW never returns more). None for exact."""
+    base = _EF_SEARCH_BY_MODE.get(mode)
+    if base is None:
+        return None
+    return max(1, min(config.HNSW_EF_SEARCH_MAX, max(base, ann_candidate_limit(rows_needed))))
+
+
+def ann_candidates(query: Any, *, rows_needed: int) -> CTE | None:
+    """
+    MATERIALIZED CTE (id, embedding) of the top candidates by the compact index for the halfvec/bit
+    tiers, else None. `query` is a list of floats or a SQL expression of type vector. The ORDER BY
+    expressions match the expression indexes from migration c9d0e1f2a3b4 exactly, so the planner
+    can use them. Callers join the CTE to shows and order by candidate_distance(): that ORDER BY is
+    over the CTE's rows, so it cannot be answered by walking the full-precision HNSW index and
+    applying the candidates as a post-filter (which would lose recall).
+    Skipped in exact mode: exact recall means ranking every row on the full vector.
+    """
+    tier = storage_tier()
+    if tier == "full" or _active_mode.get() == SearchMode.EXACT:
+        return None
+    if tier == "halfvec":
+        order = cast(Show.embedding, HALFVEC(EMBED_DIM)).cosine_distance(cast(query, HALFVEC(EMBED_DIM)))
+    else:
+        order = cast(func.binary_quantize(Show.embedding), BIT(EMBED_DIM)).hamming_distance(
+            func.binary_quantize(cast(query, VECTOR(EMBED_DIM)))
+        )
+    return (
+        select(Show.id, Show.embedding)
+        .where(Show.embedding.isnot(None))
+        .order_by(order)
+        .limit(ann_candidate_limit(rows_needed))
+        .cte("ann_candidates")
+        .prefix_with("MATERIALIZED")
+    )
+
+
+def candidate_distance(query: Any, candidates: CTE | None) -> ColumnElement:
+    """Full-precision cosine distance to order by: the candidates' embedding, or shows.embedding without a tier."""
+    embedding = Show.embedding if candidates is None else candidates.c.embedding
+    return embedding.cosine_distance(query)
+
+
+def _settings_for(mode: SearchMode, rows_needed: int) -> list[tuple[str, str]]:
+    if mode == SearchMode.EXACT:
+        return [("enable_indexscan", "off")]
+    return [("hnsw.ef_search", str(hnsw_ef_search(mode, rows_needed)))]
+
+
+@contextmanager
+def search_mode_settings(db: Session, mode: SearchMode, *, rows_needed: int) -> Iterator[SearchMode]:
+    """
+    Apply mode with SET LOCAL for the queries inside the block, then restore the defaults so
+    later statements in the same request transaction (e.g. id lookups) plan normally.
+    """
+    settings = _settings_for(mode, rows_needed)
+    for name, value in settings:
+        # SET does not take bind parameters; values come from the fixed table above.
+        db.execute(text(f"SET LOCAL {name} = {value}"))
+    token = _active_mode.set(mode)
+    try:
+        yield mode
+    finally:
+        _active_mode.reset(token)
+    # Not in a finally: after a failed statement the transaction is aborted and rollback resets these.
+    for name, _ in settings:
+        db.execute(text(f"SET LOCAL {name} = DEFAULT"))
+
+
+def spherical_kmeans(vectors: np.ndarray, k: int, *, iterations: int = 10) -> np.ndarray:
+    """
+    Cosine k-means over L2-normalized rows; returns up to k normalized centroids (k x dim).
+    Deterministic farthest-point seeding, so the same favorites always give the same tastes.
+    """
+    x = np.asarray(vectors, dtype=np.float32)
+    x = x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+    k = max(1, min(int(k), len(x)))
+
+    centroid = x.mean(axis=0)
+    seeds = [int(np.argmax(x @ centroid))]
+    while len(seeds) < k:
+        similarity = (x @ x[seeds].T).max(axis=1)
+        seeds.append(int(np.argmin(similarity)))
+    centroids = x[seeds].copy()
+
+    for _ in range(iterations):
+        labels = np.argmax(x @ centroids.T, axis=1)
+        updated = centroids.copy()
+        for j in range(k):
+            members = x[labels == j]
+            if len(members):
+                mean = members.mean(axis=0)
+                updated[j] = mean / max(float(np.linalg.norm(mean)), 1e-12)
+        if np.allclose(updated, centroids):
+            break
+        centroids = updated
+    return centroids
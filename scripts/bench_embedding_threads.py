@@ -0,0 +1,112 @@
+"""
+Benchmark query-embedding latency under concurrency, with and without the thread budget.
+Run from project root: python -m scripts.bench_embedding_threads --processes 4 --concurrency 8
+Starts --processes interpreters (standing in for uvicorn workers), each firing --concurrency
+threads of embed_text() calls at once, first with EMBEDDING_THREADS=off (library defaults:
+one thread per core in every process) and then with EMBEDDING_THREADS=auto.
+Micro-batching is disabled so each call is its own forward pass.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import statistics
+import threading
+import time
+
+# Do not import app.embeddings here: it would export the budget to the env inherited by the children.
+
+_QUERIES = [
+    "cozy mystery",
+    "dark sci-fi thriller about time travel",
+    "feel-good workplace comedy with short episodes",
+    "historical drama about a royal family",
+    "animated adventure for kids and parents",
+    "gritty crime series set in a small town",
+]
+
+
+def _worker(mode, processes, concurrency, requests, barrier, results) -> None:
+    os.environ["EMBEDDING_THREADS"] = mode
+    os.environ["WEB_CONCURRENCY"] = str(processes)
+    os.environ["EMBEDDING_BATCH_MAX_WAIT_MS"] = "0"
+    from app import embeddings
+
+    embeddings.warm_up()
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def run(offset: int) -> None:
+        local = []
+        for i in range(requests):
+            start = time.perf_counter()
+            embeddings.embed_text(_QUERIES[(offset + i) % len(_QUERIES)])
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=run, args=(t,)) for t in range(concurrency)]
+    barrier.wait()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put(latencies)
+
+
+def _run(mode: str, args: argparse.Namespace) -> dict:
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.pop(name, None)
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(args.processes + 1)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(mode, args.processes, args.concurrency, args.requests, barrier, results))
+        for _ in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+    barrier.wait()  # every process has loaded and warmed up the model
+    start = time.perf_counter()
+    latencies = [x for _ in procs for x in results.get()]
+    wall = time.perf_counter() - start
+    for p in procs:
+        p.join()
+
+    latencies.sort()
+
+    def pct(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "throughput_rps": len(latencies) / wall,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Embedding latency under concurrency, with/without the thread budget.")
+    p.add_argument("--processes", type=int, default=2, help="Simulated web workers (processes)")
+    p.add_argument("--concurrency", type=int, default=8, help="Concurrent requests per process")
+    p.add_argument("--requests", type=int, default=20, help="Sequential requests per thread")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    print(f"{args.processes} processes x {args.concurrency} threads x {args.requests} requests")
+    print(f"{'mode':<6} {'requests':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for mode in ("off", "auto"):
+        r = _run(mode, args)
+        print(
+            f"{r['mode']:<6} {r['requests']:>8} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+            f"{r['p99_ms']:>8.1f} {r['throughput_rps']:>8.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
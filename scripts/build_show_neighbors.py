@@ -0,0 +1,123 @@
+"""
+Precompute nearest neighbours per show into show_neighbors (backs /search/more-like-this).
+Run from project root: python -m scripts.build_show_neighbors
+By default only shows with an embedding but no stored neighbours are filled; use --all for a full rebuild.
+scripts/generate_embeddings.py calls refresh_show_neighbors() for the shows it re-embedded.
+"""
+import argparse
+from typing import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import config
+from app.db import SessionLocal
+from app.schemas import SearchMode
+from app.vector_search import search_mode_settings
+
+
+# Per source show: ANN top-k via LATERAL (inner ORDER BY ... LIMIT uses the HNSW index),
+# ranked with row_number() outside the LATERAL so the index scan is not blocked by the window.
+# Runs with hnsw.ef_search raised to at least k: the index never returns more than ef_search rows.
+_REFRESH_SQL = text(
+    """
+    INSERT INTO show_neighbors (show_id, rank, neighbor_id, distance)
+    SELECT src.id,
+           row_number() OVER (PARTITION BY src.id ORDER BY n.distance, n.id),
+           n.id,
+           n.distance
+    FROM shows AS src
+    CROSS JOIN LATERAL (
+        SELECT s.id, s.embedding <=> src.embedding AS distance
+        FROM shows AS s
+        WHERE s.embedding IS NOT NULL AND s.id <> src.id
+        ORDER BY s.embedding <=> src.embedding
+        LIMIT :k
+    ) AS n
+    WHERE src.id = ANY(:ids) AND src.embedding IS NOT NULL
+    """
+)
+
+_DELETE_SQL = text("DELETE FROM show_neighbors WHERE show_id = ANY(:ids)")
+
+# Lists that point at a changed show carry a stale distance (or a neighbour that moved away).
+_REFERENCING_SQL = text("SELECT DISTINCT show_id FROM show_neighbors WHERE neighbor_id = ANY(:ids)")
+
+_MISSING_SQL = text(
+    """
+    SELECT s.id FROM shows AS s
+    WHERE s.embedding IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM show_neighbors AS n WHERE n.show_id = s.id)
+    ORDER BY s.id
+    """
+)
+
+_ALL_SQL = text("SELECT id FROM shows WHERE embedding IS NOT NULL ORDER BY id")
+
+
+def _chunks(ids: list[int], size: int) -> Iterable[list[int]]:
+    for i in range(0, len(ids), size):
+        yield ids[i : i + size]
+
+
+def refresh_show_neighbors(
+    db: Session,
+    changed_ids: Iterable[int],
+    *,
+    k: int = config.SHOW_NEIGHBORS_TOP_K,
+    batch_size: int = 200,
+    include_referencing: bool = True,
+) -> int:
+    """
+    Recompute neighbour lists for shows whose embeddings changed (and, by default, for shows
+    whose stored lists reference them). Commits per batch. Returns the number of shows refreshed.
+
+    Note: a changed show can also enter the top-k of a show that does not list it yet; those
+    lists catch up on the next --all rebuild.
+    """
+    ids = sorted({int(i) for i in changed_ids})
+    if not ids:
+        return 0
+    if include_referencing:
+        referencing = {row[0] for row in db.execute(_REFERENCING_SQL, {"ids": ids})}
+        ids = sorted(set(ids) | referencing)
+
+    refreshed = 0
+    for chunk in _chunks(ids, max(1, int(batch_size))):
+        db.execute(_DELETE_SQL, {"ids": chunk})
+        with search_mode_settings(db, SearchMode.BALANCED, rows_needed=int(k)):
+            db.execute(_REFRESH_SQL, {"ids": chunk, "k": int(k)})
+        db.commit()
+        refreshed += len(chunk)
+    return refreshed
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Precompute nearest neighbours per show into show_neighbors.")
+    p.add_argument("--all", action="store_true", help="Rebuild neighbours for every show with an embedding")
+    p.add_argument("--batch-size", type=int, default=200, help="Source shows per INSERT statement")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    db = SessionLocal()
+    try:
+        sql = _ALL_SQL if args.all else _MISSING_SQL
+        ids = [row[0] for row in db.execute(sql)]
+        print(f"Found {len(ids)} shows to refresh (all={bool(args.all)}, k={config.SHOW_NEIGHBORS_TOP_K}).")
+        refreshed = refresh_show_neighbors(
+            db,
+            ids,
+            batch_size=args.batch_size,
+            include_referencing=False,
+        )
+        print(f"✅ Refreshed neighbours for {refreshed} shows")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
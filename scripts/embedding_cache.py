@@ -0,0 +1,57 @@
+"""
+On-disk cache of embedding vectors keyed by app.embeddings.embedding_text_hash(), which covers the
+model, the backend and its quantization, so torch and int8 ONNX vectors never share an entry.
+Used by scripts/generate_embeddings.py so texts embedded once (in any database, or before a
+TMDB resync rewrote the rows) are never run through the model again.
+A single SQLite file: hash -> float32 bytes. Path: EMBEDDING_CACHE_PATH (default .cache/embeddings.sqlite3).
+"""
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+
+
+DEFAULT_CACHE_PATH = Path(
+    os.getenv("EMBEDDING_CACHE_PATH")
+    or Path(__file__).resolve().parents[1] / ".cache" / "embeddings.sqlite3"
+)
+
+# SQLite's default limit on bound parameters per statement is 999 on older builds.
+_LOOKUP_CHUNK = 500
+
+
+class EmbeddingCache:
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, *, dim: int):
+        self.path = Path(path)
+        self.dim = int(dim)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def get_many(self, hashes: Iterable[str]) -> dict[str, list[float]]:
+        keys = list(dict.fromkeys(hashes))
+        found: dict[str, list[float]] = {}
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[i : i + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})", chunk
+            )
+            for key, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                if vector.shape[0] == self.dim:
+                    found[key] = vector.tolist()
+        return found
+
+    def put_many(self, items: Iterable[tuple[str, Sequence[float]]]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (hash, vector) VALUES (?, ?)",
+            ((key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
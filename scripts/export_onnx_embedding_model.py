@@ -0,0 +1,88 @@
+"""
+Export all-MiniLM-L6-v2 to ONNX and quantize its weights to int8 (for EMBEDDING_BACKEND=onnx).
+Run from project root: python -m scripts.export_onnx_embedding_model
+Writes model.onnx + tokenizer.json to EMBEDDING_ONNX_MODEL_DIR (default models/all-MiniLM-L6-v2-onnx-int8).
+Needs torch, transformers and onnxruntime at export time; serving only needs onnxruntime + tokenizers.
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from app.embeddings import EMBEDDING_ONNX_MODEL_DIR, MODEL_NAME
+
+
+def _token_embeddings_module(model):
+    """Pin the forward signature to (input_ids, attention_mask, token_type_ids) -> last_hidden_state."""
+    import torch
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.inner(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+            ).last_hidden_state
+
+    return TokenEmbeddings(model).eval()
+
+
+def export_onnx_model(model_name: str, out_dir: Path, *, quantize: bool = True, opset: int = 17) -> Path:
+    """Export the transformer (token embeddings only; pooling runs in numpy) and return the model path."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = _token_embeddings_module(AutoModel.from_pretrained(model_name))
+
+    sample = tokenizer(["a cozy detective show"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    model_path = out_dir / "model.onnx"
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32_path = Path(tmp) / "model_fp32.onnx" if quantize else model_path
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+                str(fp32_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=opset,
+                dynamo=False,
+            )
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantize_dynamic(str(fp32_path), str(model_path), weight_type=QuantType.QInt8)
+
+    # Fast tokenizer -> tokenizer.json, loaded at serve time with the tokenizers package (no transformers).
+    tokenizer.backend_tokenizer.save(str(out_dir / "tokenizer.json"))
+    return model_path
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Export the embedding model to ONNX (int8) for EMBEDDING_BACKEND=onnx.")
+    p.add_argument("--model", default=MODEL_NAME, help="Hugging Face model id")
+    p.add_argument("--out-dir", type=Path, default=EMBEDDING_ONNX_MODEL_DIR, help="Output directory")
+    p.add_argument("--no-quantize", action="store_true", help="Keep fp32 weights (for debugging parity)")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    model_path = export_onnx_model(args.model, args.out_dir, quantize=not args.no_quantize)
+    size_mb = model_path.stat().st_size / (1024 * 1024)
+    print(f"✅ Exported {args.model} to {model_path} ({size_mb:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
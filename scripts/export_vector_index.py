@@ -0,0 +1,77 @@
+"""
+Export shows.embedding to the memory-mapped matrix used for in-process exact search
+(app/local_vector_index.py). Run from project root: python -m scripts.export_vector_index
+Writes to LOCAL_VECTOR_INDEX_DIR; running API processes pick up the new export within seconds.
+scripts/generate_embeddings.py calls export_vector_index() after it updates embeddings.
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import config
+from app.db import SessionLocal
+from app.embeddings import EMBED_DIM
+from app.local_vector_index import write_vector_index
+from app.models import Show
+
+
+def export_vector_index(db: Session, directory: Path, *, batch_size: int = 5000) -> int:
+    """Stream every stored embedding (keyset by id) into a new index generation. Returns the row count."""
+    count = db.query(Show).filter(Show.embedding.isnot(None)).count()
+    ids = np.empty(count, dtype=np.int64)
+    matrix = np.empty((count, EMBED_DIM), dtype=np.float32)
+
+    filled = 0
+    last_id = 0
+    while filled < count:
+        rows = (
+            db.query(Show.id, Show.embedding)
+            .filter(Show.embedding.isnot(None), Show.id > last_id)
+            .order_by(Show.id.asc())
+            .limit(min(batch_size, count - filled))
+            .all()
+        )
+        if not rows:
+            break
+        for show_id, embedding in rows:
+            ids[filled] = show_id
+            matrix[filled] = np.asarray(embedding, dtype=np.float32)
+            filled += 1
+        last_id = rows[-1][0]
+
+    # Rows deleted between COUNT and the scan leave the tail unfilled.
+    write_vector_index(directory, ids[:filled], matrix[:filled])
+    return filled
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Export embeddings for in-process exact vector search.")
+    p.add_argument(
+        "--dir",
+        type=Path,
+        default=config.LOCAL_VECTOR_INDEX_DIR,
+        help="Output directory (default: LOCAL_VECTOR_INDEX_DIR)",
+    )
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.dir:
+        print("Set LOCAL_VECTOR_INDEX_DIR or pass --dir.")
+        return 1
+
+    db = SessionLocal()
+    try:
+        exported = export_vector_index(db, Path(args.dir))
+        note = "" if exported <= config.LOCAL_VECTOR_INDEX_MAX_ROWS else " (above LOCAL_VECTOR_INDEX_MAX_ROWS: pgvector stays in use)"
+        print(f"✅ Exported {exported} embeddings to {args.dir}{note}")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,16 +1,43 @@
 """
 Generate and store embeddings for shows in the same Postgres DB that FastAPI uses.
-Run from project root: python -m scripts.generate_embeddings
+Run from project root: python -m scripts.generate_embeddings [--workers N]
 Uses the same .env so the script connects to the same database.
-Commits update shows.embedding for many rows.
+Incremental: a show is re-embedded only when the hash of build_embedding_text() differs from
+shows.embedding_text_hash; vectors for texts seen before come from the on-disk cache
+(scripts/embedding_cache.py). A reader thread (keyset scan of id/title/genres/overview), the
+encoder and a writer thread run as a pipeline joined by bounded queues, so DB round trips overlap
+with encoding. The writer binary-COPYs each batch into a temp table and applies it with one
+UPDATE ... FROM (see write_embeddings). Commits per batch, then refreshes show_neighbors for the
+updated shows and, when LOCAL_VECTOR_INDEX_DIR is set, re-exports the in-process vector index.
+--workers N splits the ids into N shards, each run by its own process and model; progress is
+committed to embedding_shards, so an interrupted run resumes every shard where it stopped.
+--marked-only scans just the shows without a stored hash or vector, e.g. those marked by
+scripts/sync_tmdb_changes.py, instead of the whole table.
 """
 import argparse
-from typing import Any
-
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from sqlalchemy import func, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from app import config
 from app.db import SessionLocal
-from app.embeddings import EMBED_DIM, embed_texts
-from app.models import Show
+from app.embeddings import EMBED_DIM, THREAD_BUDGET, embed_texts, embedding_text_hash
+from app.local_vector_index import CURRENT_FILE
+from app.models import EmbeddingShard, Show
 from app.shared import TMDB_TV_GENRE_ID_TO_NAME
+from app.thread_budget import BLAS_THREAD_ENV_VARS
+from scripts.build_show_neighbors import refresh_show_neighbors
+from scripts.embedding_cache import EmbeddingCache
+from scripts.export_vector_index import export_vector_index
+from scripts.pg_copy import binary_int4, binary_text, binary_vector, copy_binary
+from scripts.rebuild_vector_indexes import rebuild_hnsw_indexes
 
 
 EXPECTED_DIM = EMBED_DIM
@@ -106,7 +133,8 @@ def _infer_embedding_descriptors(overview: str | None, genres: list[str]) -> lis
 
 
 def build_embedding_text(show: Show) -> str:
-    """Build a single text blob for embedding: title, genres, overview, themes."""
+    """Build a single text blob for embedding: title, genres, overview, themes.
+    Accepts a Show or any row with title/genres/overview attributes."""
     title = (show.title or "").strip() or "Unknown"
     genres_str = _genres_to_string(show.genres)
     overview = (show.overview or "").strip()
@@ -125,64 +153,408 @@ def build_embedding_text(show: Show) -> str:
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Generate and store embeddings for shows in Postgres.")
-    p.add_argument("--limit", type=int, default=None, help="Optional limit on number of shows to process")
-    p.add_argument("--force", action="store_true", help="Regenerate embeddings even if already present")
+    p.add_argument("--limit", type=int, default=None, help="Optional limit on number of shows to update")
+    p.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-embed every show, ignoring stored text hashes and the on-disk cache",
+    )
     p.add_argument("--batch-size", type=int, default=100, help="Batch size for embedding generation")
+    p.add_argument("--no-cache", action="store_true", help="Do not read or write the on-disk embedding cache")
+    p.add_argument(
+        "--marked-only",
+        action="store_true",
+        help="Only scan shows with no embedding_text_hash or embedding (e.g. marked by scripts.sync_tmdb_changes)",
+    )
+    p.add_argument(
+        "--skip-neighbors",
+        action="store_true",
+        help="Do not refresh show_neighbors for re-embedded shows (run scripts.build_show_neighbors later)",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes, each with its own model, over id-range shards tracked in embedding_shards",
+    )
+    p.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help="After a bulk load, rebuild the HNSW indexes concurrently and swap them in (scripts.rebuild_vector_indexes)",
+    )
     return p.parse_args()
 
 
+def write_embeddings(db: Session, batch: list[tuple[int, Any, str]]) -> None:
+    """
+    Store (show_id, vector, text_hash) rows (the caller commits). On Postgres: binary COPY into a temp
+    table and one UPDATE ... FROM, instead of an UPDATE per row with the vector as a text literal.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        db.execute(
+            update(Show),
+            [{"id": show_id, "embedding": vec, "embedding_text_hash": h} for show_id, vec, h in batch],
+        )
+        return
+    # Temp tables are not WAL-logged; ON COMMIT DELETE ROWS empties it for the next batch.
+    db.execute(
+        text(
+            "CREATE TEMP TABLE IF NOT EXISTS embedding_updates "
+            f"(id integer NOT NULL, embedding vector({EXPECTED_DIM}) NOT NULL, embedding_text_hash varchar(64)) "
+            "ON COMMIT DELETE ROWS"
+        )
+    )
+    copy_binary(
+        db,
+        "embedding_updates",
+        ("id", "embedding", "embedding_text_hash"),
+        (binary_int4, binary_vector, binary_text),
+        batch,
+    )
+    db.execute(
+        text(
+            "UPDATE shows SET embedding = t.embedding, embedding_text_hash = t.embedding_text_hash "
+            "FROM embedding_updates t WHERE shows.id = t.id"
+        )
+    )
+
+
+_DONE = object()
+# Batches buffered between stages: enough to keep the encoder busy, bounded so memory is too.
+PIPELINE_QUEUE_BATCHES = 2
+
+
+class _Pipeline:
+    """Shared stop flag and first error for the reader/encoder/writer stages."""
+
+    def __init__(self) -> None:
+        self.stop = threading.Event()
+        self.errors: list[BaseException] = []
+
+    def fail(self, exc: BaseException) -> None:
+        self.errors.append(exc)
+        self.stop.set()
+
+    def put(self, q: queue.Queue, item: Any) -> bool:
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, q: queue.Queue) -> Any:
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+
+def embed_shows(
+    session_factory: Callable[[], Session],
+    *,
+    batch_size: int,
+    force: bool = False,
+    marked_only: bool = False,
+    cache: Optional[EmbeddingCache] = None,
+    limit: Optional[int] = None,
+    shard: Optional[tuple[int, int, Optional[int]]] = None,
+    total: Optional[int] = None,
+    label: str = "",
+) -> tuple[list[int], dict[str, int]]:
+    """
+    Re-embed shows whose text changed. Three stages joined by bounded queues so DB reads and writes
+    overlap with encoding: reader thread (keyset scan + text hashing) -> encoder (calling thread) ->
+    writer thread. shard = (shard_id, last_id, end_id) limits the scan to last_id < id <= end_id and
+    commits the scan position to embedding_shards with every batch. marked_only skips shows that
+    have both a stored hash and a vector. Returns (updated ids, stats).
+    """
+    pipeline = _Pipeline()
+    to_encode: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_BATCHES)
+    to_write: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_BATCHES)
+    stats = {"scanned": 0, "unchanged": 0, "embedded": 0, "from_cache": 0}
+    embedded_ids: list[int] = []
+    shard_id, start_after, end_id = shard if shard is not None else (None, 0, None)
+
+    def read() -> None:
+        reader_db = session_factory()
+        try:
+            # Whether a text changed is only known after build_embedding_text(), so every show is
+            # scanned; only the columns it needs are read, and of the vector only whether it is missing.
+            stmt = (
+                select(
+                    Show.id,
+                    Show.title,
+                    Show.genres,
+                    Show.overview,
+                    Show.embedding_text_hash,
+                    Show.embedding.is_(None).label("embedding_missing"),
+                )
+                .order_by(Show.id.asc())
+                .limit(batch_size)
+            )
+            if end_id is not None:
+                stmt = stmt.where(Show.id <= end_id)
+            if marked_only:
+                stmt = stmt.where(or_(Show.embedding_text_hash.is_(None), Show.embedding.is_(None)))
+            last_id = start_after
+            queued = 0
+            while limit is None or queued < limit:
+                rows = reader_db.execute(stmt.where(Show.id > last_id)).all()
+                # Do not sit idle in a transaction while the encoder catches up.
+                reader_db.commit()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                stats["scanned"] += len(rows)
+
+                pending: list[tuple[int, str, str]] = []
+                for row in rows:
+                    text = build_embedding_text(row)
+                    text_hash = embedding_text_hash(text)
+                    if not force and not row.embedding_missing and row.embedding_text_hash == text_hash:
+                        stats["unchanged"] += 1
+                        continue
+                    pending.append((row.id, text, text_hash))
+                if limit is not None:
+                    pending = pending[: limit - queued]
+                queued += len(pending)
+                # Sharded runs record progress even for batches with nothing to re-embed.
+                if (pending or shard_id is not None) and not pipeline.put(to_encode, (pending, last_id)):
+                    return
+        except BaseException as e:
+            pipeline.fail(e)
+        finally:
+            reader_db.close()
+            pipeline.put(to_encode, _DONE)
+
+    def write() -> None:
+        writer_db = session_factory()
+        try:
+            while (item := pipeline.get(to_write)) is not _DONE:
+                batch, scanned_to = item
+                if batch:
+                    write_embeddings(writer_db, batch)
+                if shard_id is not None:
+                    writer_db.execute(
+                        update(EmbeddingShard)
+                        .where(EmbeddingShard.shard_id == shard_id)
+                        .values(last_id=scanned_to, updated_at=func.now())
+                    )
+                writer_db.commit()
+                if batch:
+                    embedded_ids.extend(show_id for show_id, _, _ in batch)
+                    print(
+                        f"✅ {label}Scanned {stats['scanned']}/{total if total is not None else '?'}: "
+                        f"{len(embedded_ids)} updated ({stats['embedded']} embedded, {stats['from_cache']} from cache)"
+                    )
+        except BaseException as e:
+            pipeline.fail(e)
+        finally:
+            writer_db.close()
+
+    reader = threading.Thread(target=read, name="embeddings-reader", daemon=True)
+    writer = threading.Thread(target=write, name="embeddings-writer", daemon=True)
+    reader.start()
+    writer.start()
+    try:
+        while (item := pipeline.get(to_encode)) is not _DONE:
+            pending, scanned_to = item
+            vectors_by_hash: dict[str, list[float]] = {}
+            if cache is not None and not force and pending:
+                vectors_by_hash = cache.get_many(text_hash for _, _, text_hash in pending)
+            to_embed = {text_hash: text for _, text, text_hash in pending if text_hash not in vectors_by_hash}
+            if to_embed:
+                vectors = embed_texts(list(to_embed.values()))
+                if len(vectors) != len(to_embed):
+                    raise RuntimeError("Embedding generator returned a different number of vectors than inputs")
+                fresh = dict(zip(to_embed.keys(), vectors))
+                if cache is not None:
+                    cache.put_many(fresh.items())
+                vectors_by_hash.update(fresh)
+
+            batch = []
+            for show_id, _, text_hash in pending:
+                vec = vectors_by_hash[text_hash]
+                if len(vec) != EXPECTED_DIM:
+                    raise RuntimeError(
+                        f"Embedding dim mismatch for show_id={show_id}: got {len(vec)} expected {EXPECTED_DIM}"
+                    )
+                batch.append((show_id, vec, text_hash))
+            stats["embedded"] += len(to_embed)
+            stats["from_cache"] += len(pending) - len(to_embed)
+            if not pipeline.put(to_write, (batch, scanned_to)):
+                break
+        pipeline.put(to_write, _DONE)
+    except BaseException as e:
+        pipeline.fail(e)
+    reader.join()
+    writer.join()
+    if pipeline.errors:
+        raise pipeline.errors[0]
+
+    if shard_id is not None:
+        with session_factory() as db:
+            db.execute(
+                update(EmbeddingShard)
+                .where(EmbeddingShard.shard_id == shard_id)
+                .values(finished_at=func.now(), updated_at=func.now())
+            )
+            db.commit()
+    return embedded_ids, stats
+
+
+def plan_shards(db: Session, workers: int) -> list[tuple[int, int, Optional[int]]]:
+    """
+    (shard_id, last_id, end_id) to run: the unfinished shards of an interrupted run, or else a new
+    plan splitting the current ids into `workers` ranges with equal numbers of shows.
+    """
+    unfinished = (
+        db.query(EmbeddingShard)
+        .filter(EmbeddingShard.finished_at.is_(None))
+        .order_by(EmbeddingShard.shard_id)
+        .all()
+    )
+    if unfinished:
+        return [(s.shard_id, s.last_id, s.end_id) for s in unfinished]
+
+    db.query(EmbeddingShard).delete()
+    total = db.query(func.count(Show.id)).scalar() or 0
+    bounds = [0]
+    for i in range(1, workers):
+        offset = i * total // workers
+        if offset == 0:
+            continue
+        boundary = db.execute(select(Show.id).order_by(Show.id).offset(offset - 1).limit(1)).scalar()
+        if boundary is not None and boundary > bounds[-1]:
+            bounds.append(boundary)
+    # The last shard is open-ended so shows inserted while the run is going are covered too.
+    plan = [(i, start, end) for i, (start, end) in enumerate(zip(bounds, [*bounds[1:], None]))]
+    db.add_all(EmbeddingShard(shard_id=i, start_id=start, end_id=end, last_id=start) for i, start, end in plan)
+    db.commit()
+    return plan
+
+
+def _shard_executor(workers: int) -> Executor:
+    """Spawned worker processes, each loading its own model with an equal share of the CPUs."""
+    if THREAD_BUDGET.mode == "auto":
+        # Inherited by the children before they import numpy/torch (see app.thread_budget).
+        threads = str(max(1, THREAD_BUDGET.cpus // workers))
+        os.environ["EMBEDDING_THREADS"] = threads
+        for name in BLAS_THREAD_ENV_VARS:
+            os.environ[name] = threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _shard_worker(
+    shard: tuple[int, int, Optional[int]], batch_size: int, force: bool, marked_only: bool, use_cache: bool
+):
+    cache = EmbeddingCache(dim=EXPECTED_DIM) if use_cache else None
+    try:
+        return embed_shows(
+            SessionLocal,
+            batch_size=batch_size,
+            force=force,
+            marked_only=marked_only,
+            cache=cache,
+            shard=shard,
+            label=f"[shard {shard[0]}] ",
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def run_sharded(
+    db: Session, workers: int, *, batch_size: int, force: bool, marked_only: bool, use_cache: bool
+) -> tuple[list[int], dict[str, int]]:
+    shards = plan_shards(db, workers)
+    print(f"Running {len(shards)} shards on {min(workers, len(shards))} worker processes.")
+    embedded_ids: list[int] = []
+    stats: dict[str, int] = {}
+    with _shard_executor(min(workers, len(shards))) as pool:
+        futures = [pool.submit(_shard_worker, shard, batch_size, force, marked_only, use_cache) for shard in shards]
+        for future in as_completed(futures):
+            ids, shard_stats = future.result()
+            embedded_ids.extend(ids)
+            for key, value in shard_stats.items():
+                stats[key] = stats.get(key, 0) + value
+    return embedded_ids, stats
+
+
 def main() -> int:
     args = parse_args()
 
     batch_size = max(1, int(args.batch_size))
     limit = int(args.limit) if args.limit is not None else None
     force = bool(args.force)
+    marked_only = bool(args.marked_only)
+    workers = max(1, int(args.workers))
+    if workers > 1 and limit is not None:
+        raise SystemExit("--limit cannot be combined with --workers")
 
     db = SessionLocal()
     try:
-        base_query = db.query(Show).order_by(Show.id.asc())
-        if not force:
-            base_query = base_query.filter(Show.embedding.is_(None))
-
-        total = base_query.count()
-        if limit is not None:
-            total = min(total, limit)
-
-        print(f"Found {total} shows to embed (force={force}, batch_size={batch_size}).")
+        query = db.query(Show)
+        if marked_only:
+            query = query.filter(or_(Show.embedding_text_hash.is_(None), Show.embedding.is_(None)))
+        total = query.count()
+        print(
+            f"Scanning {total} shows (force={force}, marked_only={marked_only}, batch_size={batch_size}, "
+            f"cache={not args.no_cache}, workers={workers})."
+        )
         if total == 0:
             return 0
 
-        processed = 0
-        offset = 0
-
-        while processed < total:
-            remaining = total - processed
-            this_batch = min(batch_size, remaining)
-
-            if force:
-                rows = base_query.offset(offset).limit(this_batch).all()
-                offset += this_batch
+        if workers > 1:
+            embedded_ids, stats = run_sharded(
+                db,
+                workers,
+                batch_size=batch_size,
+                force=force,
+                marked_only=marked_only,
+                use_cache=not args.no_cache,
+            )
+        else:
+            cache = None if args.no_cache else EmbeddingCache(dim=EXPECTED_DIM)
+            try:
+                embedded_ids, stats = embed_shows(
+                    SessionLocal,
+                    batch_size=batch_size,
+                    force=force,
+                    marked_only=marked_only,
+                    cache=cache,
+                    limit=limit,
+                    total=total,
+                )
+            finally:
+                if cache is not None:
+                    cache.close()
+
+        print(
+            f"Done: {len(embedded_ids)} updated, {stats['unchanged']} unchanged, "
+            f"{stats['embedded']} embedded, {stats['from_cache']} from cache."
+        )
+
+        # Before the neighbour refresh, which queries the index.
+        if args.rebuild_index and embedded_ids:
+            if db.get_bind().dialect.name == "postgresql":
+                rebuild_hnsw_indexes(db.get_bind())
             else:
-                # No offset in non-force mode because the filtered set shrinks as we write embeddings.
-                rows = base_query.limit(this_batch).all()
+                print("Skipping --rebuild-index: HNSW indexes need PostgreSQL")
 
-            if not rows:
-                break
-
-            texts = [build_embedding_text(s) for s in rows]
-            vectors = embed_texts(texts)
+        if embedded_ids and not args.skip_neighbors:
+            refreshed = refresh_show_neighbors(db, embedded_ids)
+            print(f"✅ Refreshed neighbours for {refreshed} shows")
 
-            if len(vectors) != len(rows):
-                raise RuntimeError("Embedding generator returned a different number of vectors than inputs")
-
-            for show, vec in zip(rows, vectors):
-                if len(vec) != EXPECTED_DIM:
-                    raise RuntimeError(f"Embedding dim mismatch for show_id={show.id}: got {len(vec)} expected {EXPECTED_DIM}")
-                show.embedding = vec
-
-            db.commit()
-            processed += len(rows)
-            print(f"✅ Embedded {processed}/{total}")
+        if config.LOCAL_VECTOR_INDEX != "off" and config.LOCAL_VECTOR_INDEX_DIR:
+            index_dir = Path(config.LOCAL_VECTOR_INDEX_DIR)
+            if embedded_ids or not (index_dir / CURRENT_FILE).exists():
+                exported = export_vector_index(db, index_dir)
+                print(f"✅ Exported {exported} embeddings to the local vector index ({index_dir})")
 
         return 0
     finally:
@@ -191,4 +563,3 @@ def main() -> int:
 
 if __name__ == "__main__":
     raise SystemExit(main())
-
@@ -1,15 +1,65 @@
+"""
+Ingest popular TV shows from TMDB into shows.
+Run from project root: python -m scripts.ingest_tmdb [--pages N] [--restart]
+                   or: python -m scripts.ingest_tmdb --from-export tv_series_ids.json.gz
+
+Pages are fetched concurrently (asyncio + httpx) under a token-bucket rate limiter matched to
+TMDB's limits; 429/5xx responses and transport errors are retried with jittered exponential
+backoff, honouring Retry-After. Each show's seasons, episode length, language and content
+rating come from one /tv/{id}?append_to_response=content_ratings call at ingest time, so live
+requests rarely need TMDB for filtering metadata. A single writer upserts fetched pages (one
+INSERT ... ON CONFLICT per batch, refreshing shows that already exist) and then records them in
+a checkpoint file, so a rerun after a crash resumes with the pages that are still missing.
+
+--from-export bootstraps the catalog offline from a TMDB daily ID export (gzip JSONL, one show
+per line): the file is streamed, filtered by popularity, COPYed into a temp staging table and
+merged into shows with one INSERT ... SELECT ... ON CONFLICT. No network access is needed.
+"""
+import argparse
+import asyncio
+import gzip
+import json
 import os
-import requests
-from datetime import datetime
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+import httpx
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.db import SessionLocal
 from app.models import Show
+from app.shared import show_display_fields
+from app.tmdb import parse_content_rating, parse_tv_details
+from scripts.pg_copy import copy_rows
 
 
 TMDB_API_KEY = os.getenv("TMDB_API_KEY")
 TMDB_PAGES = int(os.getenv("TMDB_PAGES", "2"))
 TMDB_BASE = "https://api.themoviedb.org/3"
+# TMDB allows roughly 50 requests/second per IP; stay a little under it.
+TMDB_RATE_LIMIT_PER_SECOND = float(os.getenv("TMDB_RATE_LIMIT_PER_SECOND", "40"))
+TMDB_INGEST_CONCURRENCY = int(os.getenv("TMDB_INGEST_CONCURRENCY", "8"))
+# /tv/popular serves at most this many pages.
+TMDB_MAX_PAGES = 500
+
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+REQUEST_TIMEOUT_SECONDS = 10.0
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Pages already fetched are written together: up to this many pages (20 shows each) per statement.
+WRITE_BATCH_PAGES = 10
+
+# Daily exports list every show ever added, mostly long-tail entries nobody searches for.
+EXPORT_MIN_POPULARITY = 1.0
+
+DEFAULT_CHECKPOINT = Path(__file__).resolve().parents[1] / ".cache" / "ingest_tmdb_checkpoint.json"
 
 
 def parse_date(date_str: str | None):
@@ -21,67 +71,420 @@ def parse_date(date_str: str | None):
         return None
 
 
-def fetch_popular_tv(page: int):
-    url = f"{TMDB_BASE}/tv/popular"
-    params = {"api_key": TMDB_API_KEY, "page": page}
-    r = requests.get(url, params=params, timeout=30)
-    r.raise_for_status()
-    return r.json()
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After as delta-seconds or an HTTP date; None if absent or unparseable."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2**attempt)))
+
+
+class TMDBClient:
+    def __init__(self, http: httpx.AsyncClient, limiter: TokenBucket, *, api_key: str, max_retries: int = MAX_RETRIES):
+        self._http = http
+        self._limiter = limiter
+        self._api_key = api_key
+        self._max_retries = max_retries
+
+    async def get_json(self, path: str, **params: Any) -> dict:
+        for attempt in range(self._max_retries + 1):
+            await self._limiter.acquire()
+            try:
+                r = await self._http.get(path, params={"api_key": self._api_key, **params})
+            except httpx.TransportError:
+                if attempt == self._max_retries:
+                    raise
+                await asyncio.sleep(backoff_seconds(attempt))
+                continue
+            if r.status_code in _RETRY_STATUSES and attempt < self._max_retries:
+                delay = retry_after_seconds(r.headers.get("Retry-After"))
+                await asyncio.sleep(delay if delay is not None else backoff_seconds(attempt))
+                continue
+            r.raise_for_status()
+            return r.json()
+        raise RuntimeError("unreachable")
+
+    async def popular_tv(self, page: int) -> dict:
+        return await self.get_json("/tv/popular", page=page)
+
+    async def tv_details(self, tmdb_id: int) -> Optional[dict]:
+        """/tv/{id} with content ratings appended; None if the show is gone."""
+        try:
+            return await self.get_json(f"/tv/{tmdb_id}", append_to_response="content_ratings", language="en-US")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    async def tv_metadata(self, tmdb_id: int) -> dict:
+        """Filtering metadata from one tv_details call; {} if the show is gone."""
+        data = await self.tv_details(tmdb_id)
+        return tv_metadata(data) if data is not None else {}
+
+    async def tv_changes(self, page: int, *, start_date: str, end_date: str) -> dict:
+        return await self.get_json("/tv/changes", page=page, start_date=start_date, end_date=end_date)
+
+
+def tv_metadata(details: dict) -> dict:
+    """content_rating, average_episode_length, number_of_seasons, original_language from a tv_details payload."""
+    return {
+        **parse_tv_details(details),
+        "content_rating": parse_content_rating(details.get("content_ratings") or {}),
+    }
+
+
+class Checkpoint:
+    """
+    Completed pages, persisted atomically after each write is committed. Only crash recovery:
+    ingest_popular clears it once every page is done, so the next run refreshes all pages.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.completed: set[int] = set()
+        if self.path.exists():
+            self.completed = set(json.loads(self.path.read_text()).get("completed_pages", []))
+
+    def mark(self, *pages: int) -> None:
+        self.completed.update(pages)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"completed_pages": sorted(self.completed)}))
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.completed.clear()
+        self.path.unlink(missing_ok=True)
 
 
-def main():
+# Refreshed on conflict by default; title and genres are left alone (sync_tmdb_changes adds them).
+REFRESH_COLUMNS = ("overview", "popularity", "vote_average", "vote_count", "short_overview", "overview_tokens")
+# From /tv/{id} (see TMDBClient.tv_metadata); a missing value keeps what the row already has.
+_METADATA_COLUMNS = ("content_rating", "average_episode_length", "number_of_seasons", "original_language")
+
+
+def show_row(item: dict) -> Optional[dict]:
+    """Column values for one TMDB result (plus any tv_metadata merged in), or None when it lacks an id or name."""
+    tmdb_id = item.get("id")
+    title = item.get("name")
+    if not tmdb_id or not title:
+        return None
+
+    poster_path = item.get("poster_path")
+    poster_url = (
+        f"https://image.tmdb.org/t/p/w500{poster_path}"
+        if poster_path
+        else None
+    )
+    genres = item.get("genre_ids")  # ids for now
+    overview = item.get("overview")
+    # Core inserts skip the ORM before_insert hook, so derive the display columns here.
+    return {
+        "tmdb_id": tmdb_id,
+        "title": title,
+        "overview": overview,
+        "poster_url": poster_url,
+        "genres": genres,
+        "popularity": item.get("popularity"),
+        "vote_average": item.get("vote_average"),
+        "vote_count": item.get("vote_count"),
+        "first_air_date": parse_date(item.get("first_air_date")),
+        **{name: item.get(name) for name in _METADATA_COLUMNS},
+        **show_display_fields(genres, overview),
+    }
+
+
+def upsert_shows(
+    db: Session, results: list[dict], *, refresh: tuple[str, ...] = REFRESH_COLUMNS
+) -> tuple[int, int]:
+    """
+    Write TMDB results with one INSERT ... ON CONFLICT (tmdb_id) DO UPDATE ... RETURNING.
+    Existing shows get fresh `refresh` columns (default: popularity, votes, overview) and poster.
+    Returns (inserted, updated).
+    """
+    # /tv/popular shifts while it is paged, so a batch can repeat a show; one statement may
+    # touch a row only once, and the last copy is the freshest.
+    rows = list({row["tmdb_id"]: row for row in map(show_row, results) if row}.values())
+    if not rows:
+        return 0, 0
+
+    stmt = pg_insert(Show).values(rows)
+    set_ = {name: stmt.excluded[name] for name in refresh}
+    # Keep the poster (and metadata) we have when TMDB drops it or the details were not fetched.
+    for name in ("poster_url", *_METADATA_COLUMNS):
+        set_[name] = func.coalesce(stmt.excluded[name], getattr(Show, name))
+    # xmax is 0 only for rows this statement inserted (not ones it updated).
+    stmt = stmt.on_conflict_do_update(index_elements=[Show.tmdb_id], set_=set_).returning(
+        literal_column("xmax = 0")
+    )
+
+    flags = [bool(flag) for flag in db.execute(stmt).scalars()]
+    db.commit()
+    inserted = sum(flags)
+    return inserted, len(flags) - inserted
+
+
+async def _show_metadata(client: TMDBClient, item: dict) -> dict:
+    """Metadata is enrichment: a show whose /tv/{id} keeps failing is still stored, without it."""
+    if not item.get("id"):
+        return {}
+    try:
+        return await client.tv_metadata(item["id"])
+    except httpx.HTTPError as e:
+        print(f"⚠️ No metadata for TMDB id {item['id']}: {e}")
+        return {}
+
+
+async def ingest_popular(
+    pages: int,
+    *,
+    session_factory: Callable[[], Session] = SessionLocal,
+    checkpoint: Checkpoint,
+    api_key: str,
+    base_url: str = TMDB_BASE,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    rate_per_second: float = TMDB_RATE_LIMIT_PER_SECOND,
+    concurrency: int = TMDB_INGEST_CONCURRENCY,
+    details: bool = True,
+) -> dict[str, int]:
+    """
+    Fetch the pages not in the checkpoint concurrently; one writer stores and checkpoints them.
+    The checkpoint is cleared once all pages are stored.
+    """
+    all_pages = range(1, min(pages, TMDB_MAX_PAGES) + 1)
+    pending = [p for p in all_pages if p not in checkpoint.completed]
+    stats = {"pages": 0, "inserted": 0, "updated": 0}
+    if not pending:
+        # Left over from a run that finished every page: nothing to resume, refresh them all.
+        checkpoint.clear()
+        pending = list(all_pages)
+        if not pending:
+            return stats
+
+    page_queue: asyncio.Queue[int] = asyncio.Queue()
+    for page in pending:
+        page_queue.put_nowait(page)
+    # Bounded: fetchers wait for the writer instead of buffering the whole catalog in memory.
+    results_queue: asyncio.Queue[Optional[tuple[int, list[dict]]]] = asyncio.Queue(maxsize=concurrency * 2)
+    limiter = TokenBucket(rate_per_second)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=REQUEST_TIMEOUT_SECONDS, transport=transport) as http:
+        client = TMDBClient(http, limiter, api_key=api_key)
+
+        async def fetcher() -> None:
+            while True:
+                try:
+                    page = page_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                data = await client.popular_tv(page)
+                results = data.get("results", [])
+                if details:
+                    # One /tv/{id} per show, all in flight at once; the shared bucket paces them.
+                    metadata = await asyncio.gather(*(_show_metadata(client, item) for item in results))
+                    results = [
+                        {**item, **{k: v for k, v in meta.items() if v is not None}}
+                        for item, meta in zip(results, metadata)
+                    ]
+                await results_queue.put((page, results))
+
+        async def writer() -> None:
+            db = session_factory()
+            try:
+                done = False
+                while not done:
+                    batch = [await results_queue.get()]
+                    while len(batch) < WRITE_BATCH_PAGES and not results_queue.empty():
+                        batch.append(results_queue.get_nowait())
+                    if batch[-1] is None:
+                        batch.pop()
+                        done = True
+                    if not batch:
+                        continue
+                    results = [item for _, page_results in batch for item in page_results]
+                    inserted, updated = await asyncio.to_thread(upsert_shows, db, results)
+                    checkpoint.mark(*(page for page, _ in batch))
+                    stats["pages"] += len(batch)
+                    stats["inserted"] += inserted
+                    stats["updated"] += updated
+            finally:
+                db.close()
+
+        writer_task = asyncio.create_task(writer())
+        fetchers = [asyncio.create_task(fetcher()) for _ in range(max(1, min(concurrency, len(pending))))]
+        fetching = asyncio.gather(*fetchers)
+        try:
+            await asyncio.wait({fetching, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+            if writer_task.done():
+                writer_task.result()  # the writer only stops before the sentinel on an error
+            try:
+                await fetching
+            except BaseException:
+                for task in fetchers:
+                    task.cancel()
+                raise
+            finally:
+                # Store and checkpoint every page fetched so far, even when another page failed.
+                await results_queue.put(None)
+                await writer_task
+        finally:
+            for task in [*fetchers, writer_task]:
+                task.cancel()
+            await asyncio.gather(*fetchers, writer_task, return_exceptions=True)
+    checkpoint.clear()
+    return stats
+
+
+def iter_export_rows(path: Path, *, min_popularity: float) -> Iterator[tuple[int, str, float]]:
+    """(tmdb_id, title, popularity) per line of a TMDB ID export, streamed; adult and unpopular entries skipped."""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue  # blank or truncated line (e.g. a partial download)
+            tmdb_id = item.get("id")
+            title = item.get("name") or item.get("original_name")
+            popularity = item.get("popularity")
+            if item.get("adult") or not isinstance(tmdb_id, int) or not title:
+                continue
+            if not isinstance(popularity, (int, float)) or popularity < min_popularity:
+                continue
+            yield tmdb_id, title, float(popularity)
+
+
+# Exports carry no overview or genres, so new rows get the display columns of an empty show
+# (see app.shared.show_display_fields); existing rows only get a fresh popularity.
+_EXPORT_MERGE_SQL = """
+WITH merged AS (
+    INSERT INTO shows (tmdb_id, title, popularity, genre_names, overview_tokens)
+    SELECT DISTINCT ON (tmdb_id) tmdb_id, title, popularity, '{}'::text[], '{}'::text[]
+    FROM tmdb_export_staging
+    ORDER BY tmdb_id
+    ON CONFLICT (tmdb_id) DO UPDATE SET popularity = EXCLUDED.popularity
+    RETURNING xmax = 0 AS inserted
+)
+SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged
+"""
+
+
+def ingest_export(db: Session, path: Path, *, min_popularity: float = EXPORT_MIN_POPULARITY) -> dict[str, int]:
+    """Stream an export into a temp staging table with COPY, then merge it into shows in one statement."""
+    if db.get_bind().dialect.name != "postgresql":
+        raise RuntimeError("--from-export needs PostgreSQL (it bulk-loads with COPY)")
+    db.execute(
+        text(
+            "CREATE TEMP TABLE tmdb_export_staging "
+            "(tmdb_id integer NOT NULL, title text NOT NULL, popularity double precision) ON COMMIT DROP"
+        )
+    )
+    loaded = copy_rows(
+        db,
+        "tmdb_export_staging",
+        ("tmdb_id", "title", "popularity"),
+        iter_export_rows(path, min_popularity=min_popularity),
+    )
+    inserted, updated = db.execute(text(_EXPORT_MERGE_SQL)).one()
+    db.commit()
+    return {"rows": loaded, "inserted": inserted, "updated": updated}
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Ingest popular TV shows from TMDB into shows.")
+    p.add_argument("--pages", type=int, default=TMDB_PAGES, help="Pages of /tv/popular to ingest (20 shows each)")
+    p.add_argument("--concurrency", type=int, default=TMDB_INGEST_CONCURRENCY, help="Concurrent page fetches")
+    p.add_argument(
+        "--rate",
+        type=float,
+        default=TMDB_RATE_LIMIT_PER_SECOND,
+        help="Max TMDB requests per second (token bucket)",
+    )
+    p.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT, help="Checkpoint file of completed pages")
+    p.add_argument("--restart", action="store_true", help="Ignore the checkpoint and ingest every page again")
+    p.add_argument(
+        "--no-details",
+        action="store_true",
+        help="Skip the per-show /tv/{id} call (seasons, episode length, language, content rating)",
+    )
+    p.add_argument(
+        "--from-export",
+        type=Path,
+        metavar="PATH",
+        help="Load a TMDB daily ID export (.json.gz JSONL) instead of calling the API",
+    )
+    p.add_argument(
+        "--min-popularity",
+        type=float,
+        default=EXPORT_MIN_POPULARITY,
+        help="With --from-export: skip shows below this popularity",
+    )
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.from_export:
+        with SessionLocal() as db:
+            stats = ingest_export(db, args.from_export, min_popularity=args.min_popularity)
+        print(f"✅ Done. rows={stats['rows']} inserted={stats['inserted']} updated={stats['updated']}")
+        return 0
+
     if not TMDB_API_KEY:
         raise RuntimeError("TMDB_API_KEY is missing. Put it in your .env file")
 
-    db: Session = SessionLocal()
-    inserted = 0
-    skipped = 0
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.restart:
+        checkpoint.clear()
+    if checkpoint.completed:
+        print(f"Resuming: {len(checkpoint.completed)} pages already ingested ({args.checkpoint}).")
 
-    try:
-        for page in range(1, TMDB_PAGES + 1):
-            data = fetch_popular_tv(page)
-            results = data.get("results", [])
-
-            for item in results:
-                tmdb_id = item.get("id")
-                title = item.get("name")
-                if not tmdb_id or not title:
-                    continue
-
-                exists = db.query(Show).filter(Show.tmdb_id == tmdb_id).first()
-                if exists:
-                    skipped += 1
-                    continue
-
-                poster_path = item.get("poster_path")
-                poster_url = (
-                    f"https://image.tmdb.org/t/p/w500{poster_path}"
-                    if poster_path
-                    else None
-                )
-
-                show = Show(
-                    tmdb_id=tmdb_id,
-                    title=title,
-                    overview=item.get("overview"),
-                    poster_url=poster_url,
-                    genres=item.get("genre_ids"),  # ids for now
-                    popularity=item.get("popularity"),
-                    vote_average=item.get("vote_average"),
-                    vote_count=item.get("vote_count"),
-                    first_air_date=parse_date(item.get("first_air_date")),
-                )
-
-                db.add(show)
-                inserted += 1
-
-            db.commit()
-
-        print(f"✅ Done. inserted={inserted} skipped={skipped}")
-
-    finally:
-        db.close()
+    stats = asyncio.run(
+        ingest_popular(
+            args.pages,
+            checkpoint=checkpoint,
+            api_key=TMDB_API_KEY,
+            rate_per_second=args.rate,
+            concurrency=args.concurrency,
+            details=not args.no_details,
+        )
+    )
+    print(f"✅ Done. pages={stats['pages']} inserted={stats['inserted']} updated={stats['updated']}")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
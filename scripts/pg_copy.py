@@ -0,0 +1,105 @@
+"""
+Bulk-load rows into a Postgres table with COPY ... FROM STDIN, in text format (copy_rows) or
+binary format (copy_binary, for vectors: no float-to-text round trip).
+Works with both drivers the project ships (psycopg2, the default for postgresql:// URLs, and
+psycopg 3 for postgresql+psycopg://). Rows are sent in chunks so memory stays bounded.
+"""
+import io
+import struct
+from itertools import islice
+from typing import Any, Callable, Iterable, Sequence
+
+from sqlalchemy.orm import Session
+
+
+COPY_CHUNK_ROWS = 10_000
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def copy_text_value(value: Any) -> str:
+    """One field in COPY text format; None is \\N. Ints, floats and strings only."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).translate(_ESCAPES)
+
+
+def copy_text_lines(rows: Iterable[Sequence[Any]]) -> str:
+    return "".join("\t".join(map(copy_text_value, row)) + "\n" for row in rows)
+
+
+# Binary COPY format: signature, flags, header extension length; rows; -1 field count trailer.
+_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_BINARY_TRAILER = struct.pack("!h", -1)
+_BINARY_NULL = struct.pack("!i", -1)
+
+
+def binary_int4(value: int | None) -> bytes:
+    return _BINARY_NULL if value is None else struct.pack("!ii", 4, value)
+
+
+def binary_text(value: str | None) -> bytes:
+    if value is None:
+        return _BINARY_NULL
+    data = value.encode("utf-8")
+    return struct.pack("!i", len(data)) + data
+
+
+def binary_vector(value: Sequence[float] | None) -> bytes:
+    """pgvector's binary input: int16 dim, int16 unused, dim float4 (all big-endian)."""
+    if value is None:
+        return _BINARY_NULL
+    dim = len(value)
+    return struct.pack(f"!ihh{dim}f", 4 + 4 * dim, dim, 0, *value)
+
+
+def binary_copy_data(rows: Iterable[Sequence[Any]], encoders: Sequence[Callable[[Any], bytes]]) -> bytes:
+    field_count = struct.pack("!h", len(encoders))
+    parts = [_BINARY_HEADER]
+    for row in rows:
+        parts.append(field_count)
+        parts.extend(encode(value) for encode, value in zip(encoders, row))
+    parts.append(_BINARY_TRAILER)
+    return b"".join(parts)
+
+
+def _copy(cur: Any, sql: str, data: str | bytes) -> None:
+    if hasattr(cur, "copy"):  # psycopg 3
+        with cur.copy(sql) as copy:
+            copy.write(data)
+    else:  # psycopg2
+        cur.copy_expert(sql, io.BytesIO(data) if isinstance(data, bytes) else io.StringIO(data))
+
+
+def copy_rows(db: Session, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """COPY rows into table (in the session's transaction); returns the number of rows sent."""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    dbapi_conn = db.connection().connection.driver_connection
+    rows = iter(rows)
+    total = 0
+    with dbapi_conn.cursor() as cur:
+        while chunk := list(islice(rows, COPY_CHUNK_ROWS)):
+            _copy(cur, sql, copy_text_lines(chunk))
+            total += len(chunk)
+    return total
+
+
+def copy_binary(
+    db: Session,
+    table: str,
+    columns: Sequence[str],
+    encoders: Sequence[Callable[[Any], bytes]],
+    rows: Iterable[Sequence[Any]],
+) -> int:
+    """Like copy_rows, in binary format; encoders (binary_int4, binary_text, ...) match columns."""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT binary)"
+    dbapi_conn = db.connection().connection.driver_connection
+    rows = iter(rows)
+    total = 0
+    with dbapi_conn.cursor() as cur:
+        while chunk := list(islice(rows, COPY_CHUNK_ROWS)):
+            _copy(cur, sql, binary_copy_data(chunk, encoders))
+            total += len(chunk)
+    return total
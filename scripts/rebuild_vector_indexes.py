@@ -0,0 +1,132 @@
+"""
+Rebuild the HNSW indexes on shows.embedding without blocking live search.
+Run from project root: python -m scripts.rebuild_vector_indexes [--maintenance-work-mem 2GB]
+Also run by scripts/generate_embeddings.py --rebuild-index after a bulk load.
+
+An HNSW graph that absorbed a full re-embed row by row is slower to query and worse at recall
+than one built in a single pass. For each index this builds a replacement with CREATE INDEX
+CONCURRENTLY (same definition, read from pg_indexes), using a large maintenance_work_mem and
+parallel maintenance workers, swaps the names in one short transaction, drops the old index
+CONCURRENTLY and finally runs ANALYZE shows. Reads and writes continue throughout.
+"""
+import argparse
+import re
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.db import engine as default_engine
+from app.thread_budget import available_cpus
+
+
+# Full-precision index (migration c8d9e0f1a2b3) and the compact tiers (c9d0e1f2a3b4).
+SHOWS_HNSW_INDEXES = (
+    "ix_shows_embedding_hnsw",
+    "ix_shows_embedding_halfvec_hnsw",
+    "ix_shows_embedding_bit_hnsw",
+)
+DEFAULT_MAINTENANCE_WORK_MEM = "1GB"
+# The rename only needs a brief lock; give up rather than queue live queries behind it.
+SWAP_LOCK_TIMEOUT = "5s"
+
+_CREATE_INDEX_RE = re.compile(r"^CREATE (UNIQUE )?INDEX (\S+) ON ", re.IGNORECASE)
+_SIZE_RE = re.compile(r"^\d+\s*(kB|MB|GB|TB)?$")
+_IDENTIFIER_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def replacement_index_sql(indexdef: str, new_name: str) -> str:
+    """Turn pg_indexes.indexdef into CREATE INDEX CONCURRENTLY <new_name> with the same definition."""
+    sql, count = _CREATE_INDEX_RE.subn(
+        lambda m: f"CREATE {m.group(1) or ''}INDEX CONCURRENTLY {new_name} ON ", indexdef, count=1
+    )
+    if not count:
+        raise ValueError(f"Unexpected index definition: {indexdef!r}")
+    return sql
+
+
+def default_parallel_workers() -> int:
+    # One CPU stays with the leader process; Postgres caps parallel workers per operation anyway.
+    return max(0, min(7, available_cpus(None) - 1))
+
+
+def rebuild_hnsw_indexes(
+    engine: Engine,
+    names: Iterable[str] = SHOWS_HNSW_INDEXES,
+    *,
+    maintenance_work_mem: str = DEFAULT_MAINTENANCE_WORK_MEM,
+    parallel_workers: Optional[int] = None,
+) -> list[str]:
+    """Rebuild each existing index and swap it in; returns the names rebuilt. PostgreSQL only."""
+    if not _SIZE_RE.match(maintenance_work_mem):
+        raise ValueError(f"maintenance_work_mem must look like 512MB or 2GB, got {maintenance_work_mem!r}")
+    names = list(names)
+    for name in names:
+        if not _IDENTIFIER_RE.match(name):
+            raise ValueError(f"Not a plain index name: {name!r}")
+    workers = default_parallel_workers() if parallel_workers is None else max(0, int(parallel_workers))
+    rebuilt: list[str] = []
+
+    # CONCURRENTLY cannot run inside a transaction block.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"SET maintenance_work_mem = '{maintenance_work_mem}'"))
+        conn.execute(text(f"SET max_parallel_maintenance_workers = {workers}"))
+        for name in names:
+            indexdef = conn.execute(
+                text("SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND indexname = :name"),
+                {"name": name},
+            ).scalar()
+            if indexdef is None:
+                print(f"Skipping {name}: index does not exist")
+                continue
+            new_name, old_name = f"{name}_new", f"{name}_old"
+            # Leftovers of an interrupted run (a failed CONCURRENTLY build leaves an INVALID index).
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {new_name}"))
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {old_name}"))
+
+            print(f"Building {new_name} (maintenance_work_mem={maintenance_work_mem}, parallel workers={workers})...")
+            conn.execute(text(replacement_index_sql(indexdef, new_name)))
+
+            with engine.begin() as tx:
+                tx.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+                tx.execute(text(f"ALTER INDEX {name} RENAME TO {old_name}"))
+                tx.execute(text(f"ALTER INDEX {new_name} RENAME TO {name}"))
+            conn.execute(text(f"DROP INDEX CONCURRENTLY {old_name}"))
+            print(f"✅ Swapped in rebuilt {name}")
+            rebuilt.append(name)
+
+        conn.execute(text("ANALYZE shows"))
+    return rebuilt
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Rebuild the HNSW indexes on shows.embedding without blocking search.")
+    p.add_argument("--index", action="append", dest="indexes", help="Index to rebuild (repeatable; default: all)")
+    p.add_argument(
+        "--maintenance-work-mem",
+        default=DEFAULT_MAINTENANCE_WORK_MEM,
+        help="maintenance_work_mem for the build; the HNSW graph should fit in it",
+    )
+    p.add_argument(
+        "--parallel-workers",
+        type=int,
+        default=None,
+        help="max_parallel_maintenance_workers (default: CPUs - 1, at most 7)",
+    )
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    rebuilt = rebuild_hnsw_indexes(
+        default_engine,
+        args.indexes or SHOWS_HNSW_INDEXES,
+        maintenance_work_mem=args.maintenance_work_mem,
+        parallel_workers=args.parallel_workers,
+    )
+    print(f"Done: rebuilt {len(rebuilt)} index(es), ANALYZE shows complete.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
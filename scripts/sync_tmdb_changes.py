@@ -0,0 +1,220 @@
+"""
+Delta-sync shows from TMDB's /tv/changes feed (nightly refresh).
+Run from project root: python -m scripts.sync_tmdb_changes [--since YYYY-MM-DD]
+Then: python -m scripts.generate_embeddings --marked-only
+
+Pages through /tv/changes since the last successful run (tmdb_sync_state), keeps only the changed
+ids that already exist in shows, re-fetches each with the same /tv/{id}?append_to_response=
+content_ratings call as the ingest (concurrently, under the same token bucket) and bulk-upserts
+them. Shows whose embedding text changed get embedding_text_hash cleared, which marks them for
+generate_embeddings --marked-only. Cost tracks how much changed on TMDB, not the catalog size.
+A show whose /tv/{id} still fails after retries (5xx, network) is skipped and counted as failed,
+so one bad id cannot hold back the watermark; it is refreshed when it changes again.
+"""
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional
+
+import httpx
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.embeddings import embedding_text_hash
+from app.models import Show, TmdbSyncState
+from scripts.generate_embeddings import build_embedding_text
+from scripts.ingest_tmdb import (
+    REFRESH_COLUMNS,
+    REQUEST_TIMEOUT_SECONDS,
+    TMDB_API_KEY,
+    TMDB_BASE,
+    TMDB_RATE_LIMIT_PER_SECOND,
+    TMDBClient,
+    TokenBucket,
+    tv_metadata,
+    upsert_shows,
+)
+
+
+TV_CHANGES_FEED = "tv_changes"
+# /tv/changes accepts at most 14 days per request.
+CHANGES_WINDOW_DAYS = 14
+# First run without --since: look back this far.
+DEFAULT_LOOKBACK_DAYS = 1
+# Shows re-fetched concurrently and upserted together.
+DETAIL_BATCH = 100
+_LOOKUP_CHUNK = 500
+
+# A delta sync also takes renames and genre changes (both part of the embedding text).
+_SYNC_REFRESH_COLUMNS = (*REFRESH_COLUMNS, "title", "genres", "genre_names", "first_air_date")
+
+
+def change_windows(since: date, until: date) -> list[tuple[date, date]]:
+    windows = []
+    start = since
+    while start <= until:
+        end = min(until, start + timedelta(days=CHANGES_WINDOW_DAYS - 1))
+        windows.append((start, end))
+        start = end + timedelta(days=1)
+    return windows
+
+
+def details_item(details: dict) -> dict:
+    """A /tv/{id} payload in the shape of a /tv/popular result (what ingest_tmdb.show_row reads)."""
+    genre_ids = [g["id"] for g in details.get("genres") or [] if isinstance(g, dict) and isinstance(g.get("id"), int)]
+    return {
+        "id": details.get("id"),
+        "name": details.get("name"),
+        "overview": details.get("overview"),
+        "poster_path": details.get("poster_path"),
+        "genre_ids": genre_ids,
+        "popularity": details.get("popularity"),
+        "vote_average": details.get("vote_average"),
+        "vote_count": details.get("vote_count"),
+        "first_air_date": details.get("first_air_date"),
+        **tv_metadata(details),
+    }
+
+
+async def changed_tmdb_ids(client: TMDBClient, since: date, until: date) -> set[int]:
+    ids: set[int] = set()
+    for start, end in change_windows(since, until):
+        params = {"start_date": start.isoformat(), "end_date": end.isoformat()}
+        first = await client.tv_changes(1, **params)
+        rest = await asyncio.gather(
+            *(client.tv_changes(page, **params) for page in range(2, int(first.get("total_pages") or 1) + 1))
+        )
+        for data in (first, *rest):
+            for item in data.get("results") or []:
+                if isinstance(item.get("id"), int) and not item.get("adult"):
+                    ids.add(item["id"])
+    return ids
+
+
+# Returned by _show_details() for a show TMDB kept failing on (None means the show is gone).
+_FAILED: dict = {}
+
+
+async def _show_details(client: TMDBClient, tmdb_id: int) -> Optional[dict]:
+    """tv_details(), or _FAILED (with a warning) when TMDB keeps failing for this show."""
+    try:
+        return await client.tv_details(tmdb_id)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code < 500:
+            raise  # e.g. 401: every other request would fail the same way
+        print(f"⚠️ Skipping TMDB id {tmdb_id}: {e}")
+    except httpx.TransportError as e:
+        print(f"⚠️ Skipping TMDB id {tmdb_id}: {e}")
+    return _FAILED
+
+
+def existing_tmdb_ids(db: Session, tmdb_ids: Iterable[int]) -> list[int]:
+    ids = sorted(tmdb_ids)
+    found: list[int] = []
+    for i in range(0, len(ids), _LOOKUP_CHUNK):
+        found.extend(db.execute(select(Show.tmdb_id).where(Show.tmdb_id.in_(ids[i : i + _LOOKUP_CHUNK]))).scalars())
+    return sorted(found)
+
+
+def mark_changed_embeddings(db: Session, tmdb_ids: list[int]) -> int:
+    """Clear embedding_text_hash where the stored text no longer matches; returns how many were marked."""
+    rows = db.execute(
+        select(Show.id, Show.title, Show.genres, Show.overview, Show.embedding_text_hash).where(
+            Show.tmdb_id.in_(tmdb_ids)
+        )
+    ).all()
+    stale = [
+        row.id
+        for row in rows
+        if row.embedding_text_hash is not None
+        and row.embedding_text_hash != embedding_text_hash(build_embedding_text(row))
+    ]
+    if stale:
+        db.execute(update(Show).where(Show.id.in_(stale)).values(embedding_text_hash=None))
+    db.commit()
+    return len(stale)
+
+
+def _write_batch(db: Session, items: list[dict]) -> tuple[int, int]:
+    _, updated = upsert_shows(db, items, refresh=_SYNC_REFRESH_COLUMNS)
+    return updated, mark_changed_embeddings(db, [item["id"] for item in items])
+
+
+async def sync_changes(
+    *,
+    api_key: str,
+    session_factory: Callable[[], Session] = SessionLocal,
+    since: Optional[date] = None,
+    now: Optional[datetime] = None,
+    base_url: str = TMDB_BASE,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    rate_per_second: float = TMDB_RATE_LIMIT_PER_SECOND,
+) -> dict:
+    # The watermark is the start of this run, so changes made while it runs are picked up next time.
+    started = now or datetime.now(timezone.utc)
+    stats = {"changed": 0, "existing": 0, "refreshed": 0, "marked": 0, "failed": 0}
+    db = session_factory()
+    try:
+        if since is None:
+            state = db.get(TmdbSyncState, TV_CHANGES_FEED)
+            since = (state.synced_at if state else started - timedelta(days=DEFAULT_LOOKBACK_DAYS)).date()
+        stats["since"] = since.isoformat()
+
+        async with httpx.AsyncClient(base_url=base_url, timeout=REQUEST_TIMEOUT_SECONDS, transport=transport) as http:
+            client = TMDBClient(http, TokenBucket(rate_per_second), api_key=api_key)
+            changed = await changed_tmdb_ids(client, since, started.date())
+            existing = await asyncio.to_thread(existing_tmdb_ids, db, changed)
+            stats["changed"], stats["existing"] = len(changed), len(existing)
+
+            for i in range(0, len(existing), DETAIL_BATCH):
+                batch = existing[i : i + DETAIL_BATCH]
+                details = await asyncio.gather(*(_show_details(client, tmdb_id) for tmdb_id in batch))
+                stats["failed"] += sum(1 for d in details if d is _FAILED)
+                items = [details_item(d) for d in details if d is not None and d is not _FAILED]
+                if not items:
+                    continue
+                refreshed, marked = await asyncio.to_thread(_write_batch, db, items)
+                stats["refreshed"] += refreshed
+                stats["marked"] += marked
+
+        db.merge(TmdbSyncState(name=TV_CHANGES_FEED, synced_at=started))
+        db.commit()
+        return stats
+    finally:
+        db.close()
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Refresh shows that changed on TMDB since the last sync.")
+    p.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        default=None,
+        help="Start date (YYYY-MM-DD); default: the last successful sync",
+    )
+    p.add_argument(
+        "--rate",
+        type=float,
+        default=TMDB_RATE_LIMIT_PER_SECOND,
+        help="Max TMDB requests per second (token bucket)",
+    )
+    return p.parse_args()
+
+
+def main() -> int:
+    if not TMDB_API_KEY:
+        raise RuntimeError("TMDB_API_KEY is missing. Put it in your .env file")
+    args = parse_args()
+    stats = asyncio.run(sync_changes(api_key=TMDB_API_KEY, since=args.since, rate_per_second=args.rate))
+    print(
+        f"✅ Done. since={stats['since']} changed={stats['changed']} in_catalog={stats['existing']} "
+        f"refreshed={stats['refreshed']} failed={stats['failed']} marked_for_reembedding={stats['marked']}"
+    )
+    if stats["marked"]:
+        print("Run: python -m scripts.generate_embeddings --marked-only")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
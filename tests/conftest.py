@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+
+_XMAX_RETURNING = "RETURNING xmax = 0"
+
+
+def _emulate_xmax(conn, cursor, statement, parameters, context, executemany):
+    """
+    SQLite has no xmax: report rows above the current max id as inserted, which holds for the
+    monotonic ids these tests create.
+    """
+    if _XMAX_RETURNING in statement:
+        max_id = cursor.connection.execute("SELECT coalesce(max(id), 0) FROM shows").fetchone()[0]
+        statement = statement.replace(_XMAX_RETURNING, f"RETURNING shows.id > {int(max_id)}")
+    return statement, parameters
+
+
+@pytest.fixture
+def upsert_engine():
+    """In-memory SQLite engine that runs scripts.ingest_tmdb.upsert_shows (Postgres RETURNING xmax = 0)."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    event.listen(engine, "before_cursor_execute", _emulate_xmax, retval=True)
+    yield engine
+    engine.dispose()
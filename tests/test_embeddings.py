@@ -0,0 +1,294 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import embeddings
+
+
+PARITY_TEXTS = [
+    "a cozy detective show",
+    "dark sci-fi thriller about time travel",
+    "Feel-good family comedy with short episodes. Comedy, Family. A widowed dad raises three kids.",
+    "",
+]
+
+
+def test_unknown_embedding_backend_raises(monkeypatch):
+    monkeypatch.setattr(embeddings, "EMBEDDING_BACKEND", "tensorflow")
+    embeddings._get_backend.cache_clear()
+    try:
+        with pytest.raises(RuntimeError, match="Unknown EMBEDDING_BACKEND"):
+            embeddings.embed_text("anything")
+    finally:
+        embeddings._get_backend.cache_clear()
+
+
+def test_onnx_int8_backend_matches_torch_backend():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    if not (embeddings.EMBEDDING_ONNX_MODEL_DIR / "model.onnx").is_file():
+        pytest.skip("ONNX model not exported (python -m scripts.export_onnx_embedding_model)")
+    try:
+        torch_backend = embeddings.TorchEmbeddingBackend()
+    except Exception as e:  # weights not cached and hub unreachable
+        pytest.skip(f"torch embedding model unavailable: {e}")
+
+    onnx_vectors = embeddings.OnnxEmbeddingBackend().encode(PARITY_TEXTS)
+    torch_vectors = torch_backend.encode(PARITY_TEXTS)
+
+    assert onnx_vectors.shape == (len(PARITY_TEXTS), embeddings.EMBED_DIM)
+    assert np.allclose(np.linalg.norm(onnx_vectors, axis=1), 1.0, atol=1e-4)
+    cosine = (onnx_vectors * torch_vectors).sum(axis=1)
+    assert cosine.min() > 0.99
+
+
+class _FakeBackend:
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        self.release.wait(timeout=5)
+        return np.zeros((len(texts), embeddings.EMBED_DIM), dtype=np.float32)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_health_ready_is_503_until_startup_warmup_completes(monkeypatch):
+    from app.api import app
+
+    backend = _FakeBackend()
+    monkeypatch.setattr(embeddings, "EMBEDDING_WARMUP", True)
+    monkeypatch.setattr(embeddings, "_get_backend", lambda: backend)
+    monkeypatch.setattr(embeddings, "_ready", threading.Event())
+
+    with TestClient(app) as client:
+        assert _wait_for(lambda: backend.calls)
+        r = client.get("/health/ready")
+        assert r.status_code == 503
+        assert r.json()["details"] == {"embeddings": "warming_up"}
+
+        backend.release.set()
+        assert _wait_for(embeddings.is_ready)
+        r = client.get("/health/ready")
+        assert r.status_code == 200
+        assert r.json() == {"status": "ready"}
+
+    # One warmup batch, ready before any user request touched the model.
+    assert len(backend.calls) == 1
+    assert len(backend.calls[0]) > 1
+
+
+def test_health_ready_reports_failed_warmup(monkeypatch):
+    from app.api import app
+
+    def _broken_backend():
+        raise RuntimeError("model missing")
+
+    monkeypatch.setattr(embeddings, "EMBEDDING_WARMUP", True)
+    monkeypatch.setattr(embeddings, "_get_backend", _broken_backend)
+    monkeypatch.setattr(embeddings, "_ready", threading.Event())
+
+    with TestClient(app) as client:
+        assert _wait_for(lambda: app.state.embedding_warmup_error is not None)
+        r = client.get("/health/ready")
+        assert r.status_code == 503
+        assert r.json()["details"] == {"embeddings": "failed"}
+
+
+def test_embedding_text_hash_depends_on_backend(monkeypatch):
+    monkeypatch.setattr(embeddings, "EMBEDDING_BACKEND", "torch")
+    torch_hash = embeddings.embedding_text_hash("Bluey")
+    monkeypatch.setattr(embeddings, "EMBEDDING_BACKEND", "onnx")
+    onnx_hash = embeddings.embedding_text_hash("Bluey")
+    assert onnx_hash != torch_hash
+    assert onnx_hash == embeddings.embedding_text_hash("Bluey")
+
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        time.sleep(0.02)
+        return np.array([[float(len(t))] * 3 for t in texts], dtype=np.float32)
+
+    batcher = embeddings.MicroBatcher(encode, max_batch_size=8, max_wait_s=0.05)
+    texts = ["x" * n for n in range(1, 21)]
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        vectors = list(pool.map(lambda t: batcher.submit(t).result(timeout=5), texts))
+
+    # Each caller gets its own row back, and 20 calls share far fewer forward passes.
+    assert [float(v[0]) for v in vectors] == [float(len(t)) for t in texts]
+    assert len(calls) < len(texts)
+    assert max(len(c) for c in calls) <= 8
+
+
+def test_micro_batcher_propagates_encode_errors_to_every_caller():
+    def encode(_texts):
+        raise RuntimeError("boom")
+
+    batcher = embeddings.MicroBatcher(encode, max_batch_size=4, max_wait_s=0.01)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="boom"):
+            future.result(timeout=5)
+    # The dispatcher thread survives a failed batch.
+    batcher._encode = lambda texts: np.ones((len(texts), 2), dtype=np.float32)
+    assert batcher.submit("c").result(timeout=5).tolist() == [1.0, 1.0]
+
+
+def test_micro_batcher_fails_every_caller_when_backend_returns_too_few_rows():
+    release = threading.Event()
+
+    def encode(texts):
+        release.wait(5)
+        return np.ones((len(texts) - 1, 2), dtype=np.float32)
+
+    batcher = embeddings.MicroBatcher(encode, max_batch_size=4, max_wait_s=0.5)
+    futures = [batcher.submit("a"), batcher.submit("b"), batcher.submit("c")]
+    release.set()
+    for future in futures:
+        with pytest.raises(RuntimeError, match="returned"):
+            future.result(timeout=5)
+
+
+class _LengthBackend:
+    """Picklable stand-in for a model (built inside each spawned worker)."""
+
+    def encode(self, texts):
+        if "fail" in texts:
+            raise ValueError("bad text")
+        if "crash" in texts:
+            os._exit(1)  # like an OOM kill or a segfault in native code
+        if "hang" in texts:
+            time.sleep(3600)
+        return np.array([[float(len(t)), float(os.getpid())] for t in texts], dtype=np.float32)
+
+
+def test_worker_pool_returns_vectors_through_shared_memory():
+    from app.embedding_pool import EmbeddingWorkerPool
+
+    pool = EmbeddingWorkerPool(_LengthBackend, workers=2, dim=2, slot_rows=4, timeout_s=30)
+    try:
+        texts = ["x" * n for n in range(1, 11)]  # 10 texts -> 3 slot-sized chunks
+        vectors = pool.encode(texts)
+        assert vectors.dtype == np.float32
+        assert vectors[:, 0].tolist() == [float(len(t)) for t in texts]
+        # Encoded in the workers, not in this process.
+        assert os.getpid() not in set(vectors[:, 1].astype(int).tolist())
+
+        with pytest.raises(RuntimeError, match="bad text"):
+            pool.encode(["ok", "fail"])
+        assert pool.encode(["abc"])[0, 0] == 3.0
+    finally:
+        pool.close()
+
+
+def test_worker_pool_fails_fast_and_respawns_when_a_worker_dies():
+    from app.embedding_pool import EmbeddingWorkerPool
+
+    pool = EmbeddingWorkerPool(_LengthBackend, workers=1, dim=2, slot_rows=4, slots=1, timeout_s=30)
+    try:
+        start = time.monotonic()
+        with pytest.raises(RuntimeError, match="died"):
+            pool.encode(["crash"])
+        assert time.monotonic() - start < 10  # not the 30 s timeout
+
+        # The only slot was returned and the worker respawned: the pool keeps serving.
+        assert pool.encode(["abcd"])[0, 0] == 4.0
+    finally:
+        pool.close()
+
+
+def test_worker_pool_restarts_a_stuck_worker_and_reuses_its_slot():
+    from app.embedding_pool import EmbeddingWorkerPool
+
+    pool = EmbeddingWorkerPool(_LengthBackend, workers=1, dim=2, slot_rows=4, slots=1, timeout_s=30)
+    try:
+        pool._timeout_s = 1.0
+        stuck_pid = pool._workers[0].process.pid
+        for _ in range(2):  # more timeouts than slots
+            with pytest.raises(TimeoutError):
+                pool.encode(["hang"])
+        assert pool._workers[0].process.pid != stuck_pid
+
+        # The only slot came back each time; the respawned worker serves once it has loaded.
+        pool._timeout_s = 30
+        assert pool.encode(["abcd"])[0, 0] == 4.0
+    finally:
+        pool.close()
+
+
+class _BackendFailingWhen:
+    """Loads fine until `path` exists (a respawn that cannot load the model)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self):
+        if os.path.exists(self.path):
+            raise OSError("model files are gone")
+        return _LengthBackend()
+
+
+def test_worker_pool_fails_fast_once_no_worker_can_be_respawned(tmp_path):
+    from app.embedding_pool import EmbeddingWorkerPool
+
+    broken = tmp_path / "broken"
+    pool = EmbeddingWorkerPool(_BackendFailingWhen(str(broken)), workers=1, dim=2, slot_rows=4, timeout_s=30)
+    try:
+        broken.touch()
+        with pytest.raises(RuntimeError, match="died"):
+            pool.encode(["crash"])
+        assert _wait_for(lambda: all(w is None for w in pool._workers), timeout=20)
+        start = time.monotonic()
+        with pytest.raises(RuntimeError, match="No embedding workers"):
+            pool.encode(["abc"])
+        assert time.monotonic() - start < 1
+    finally:
+        pool.close()
+
+
+class _SlowLoadingBackend:
+    def __init__(self):
+        time.sleep(60)
+
+
+def test_worker_pool_startup_timeout_raises_and_stops_the_workers():
+    import multiprocessing
+
+    from app.embedding_pool import EmbeddingWorkerPool
+
+    with pytest.raises(RuntimeError, match="did not load the model"):
+        EmbeddingWorkerPool(_SlowLoadingBackend, workers=1, dim=2, timeout_s=0.5)
+    assert not [p for p in multiprocessing.active_children() if p.name.startswith("embedding-worker-")]
+
+
+def test_micro_batcher_keeps_one_batch_in_flight_per_pool_worker():
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def encode(texts):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+    batcher = embeddings.MicroBatcher(encode, max_batch_size=2, max_wait_s=0.001, concurrency=2)
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        list(pool.map(lambda t: batcher.submit(t).result(timeout=5), [str(i) for i in range(12)]))
+    assert peak[0] == 2
@@ -0,0 +1,193 @@
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.embeddings import EMBED_DIM
+from app.models import EmbeddingShard, Show
+from scripts import generate_embeddings as gen
+from scripts.embedding_cache import EmbeddingCache
+from scripts.pg_copy import binary_copy_data, binary_int4, binary_text, binary_vector
+
+
+def _setup(monkeypatch, tmp_path):
+    # A file database: the reader and writer threads each use their own connection.
+    engine = create_engine(f"sqlite:///{tmp_path / 'shows.sqlite3'}")
+    Show.__table__.create(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    db.add_all(
+        [
+            Show(tmdb_id=1, title="Bluey", genres=["Family"], overview="A puppy and her family."),
+            Show(tmdb_id=2, title="Severance", genres=["Drama"], overview="Office workers split memories."),
+            Show(tmdb_id=3, title="Taskmaster", genres=["Comedy"], overview="Comedians do silly tasks."),
+        ]
+    )
+    db.commit()
+    db.close()
+
+    embedded_texts: list[str] = []
+
+    def fake_embed_texts(texts):
+        embedded_texts.extend(texts)
+        return [[float(len(t))] * EMBED_DIM for t in texts]
+
+    monkeypatch.setattr(gen, "SessionLocal", Session)
+    monkeypatch.setattr(gen, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(gen, "refresh_show_neighbors", lambda _db, ids: len(ids))
+    monkeypatch.setattr(gen, "EmbeddingCache", lambda dim: EmbeddingCache(tmp_path / "cache.sqlite3", dim=dim))
+    monkeypatch.setattr(sys, "argv", ["generate_embeddings", "--batch-size", "2"])
+    return Session, embedded_texts
+
+
+def _set_overview(Session, tmdb_id, overview):
+    db = Session()
+    db.query(Show).filter(Show.tmdb_id == tmdb_id).one().overview = overview
+    db.commit()
+    db.close()
+
+
+def test_generate_embeddings_only_embeds_changed_texts(monkeypatch, tmp_path):
+    Session, embedded_texts = _setup(monkeypatch, tmp_path)
+
+    assert gen.main() == 0
+    assert len(embedded_texts) == 3
+
+    # Unchanged texts: nothing to do.
+    embedded_texts.clear()
+    assert gen.main() == 0
+    assert embedded_texts == []
+
+    # Changed overview: only that show is embedded.
+    _set_overview(Session, 2, "Office workers split memories at Lumon.")
+    assert gen.main() == 0
+    assert len(embedded_texts) == 1 and "Lumon" in embedded_texts[0]
+
+    # Reverted overview: vector comes from the on-disk cache, hash is updated.
+    embedded_texts.clear()
+    _set_overview(Session, 2, "Office workers split memories.")
+    assert gen.main() == 0
+    assert embedded_texts == []
+    db = Session()
+    show = db.query(Show).filter(Show.tmdb_id == 2).one()
+    assert show.embedding_text_hash == gen.embedding_text_hash(gen.build_embedding_text(show))
+    db.close()
+
+
+def test_generate_embeddings_refills_reset_rows_from_cache(monkeypatch, tmp_path):
+    Session, embedded_texts = _setup(monkeypatch, tmp_path)
+    assert gen.main() == 0
+
+    db = Session()
+    db.query(Show).update({Show.embedding: None, Show.embedding_text_hash: None})
+    db.commit()
+    db.close()
+
+    embedded_texts.clear()
+    assert gen.main() == 0
+    assert embedded_texts == []
+    db = Session()
+    assert db.query(Show).filter(Show.embedding.is_(None)).count() == 0
+    db.close()
+
+
+def test_generate_embeddings_pipeline_honours_limit_and_surfaces_errors(monkeypatch, tmp_path):
+    Session, embedded_texts = _setup(monkeypatch, tmp_path)
+    monkeypatch.setattr(sys, "argv", ["generate_embeddings", "--batch-size", "1", "--limit", "2", "--no-cache"])
+    assert gen.main() == 0
+    db = Session()
+    assert db.query(Show).filter(Show.embedding.isnot(None)).count() == 2
+    db.close()
+
+    def broken_embed_texts(texts):
+        raise ValueError("model exploded")
+
+    monkeypatch.setattr(gen, "embed_texts", broken_embed_texts)
+    monkeypatch.setattr(sys, "argv", ["generate_embeddings", "--batch-size", "1", "--no-cache"])
+    with pytest.raises(ValueError, match="model exploded"):
+        gen.main()
+
+
+def test_embedding_rows_encode_to_postgres_binary_copy():
+    vec = [0.5] * EMBED_DIM
+    data = binary_copy_data([(7, vec, "ab")], (binary_int4, binary_vector, binary_text))
+
+    assert data.startswith(b"PGCOPY\n\xff\r\n\x00") and data.endswith(struct.pack("!h", -1))
+    body = data[19:-2]
+    assert struct.unpack("!hii", body[:10]) == (3, 4, 7)
+    length, dim, unused = struct.unpack("!ihh", body[10:18])
+    assert (length, dim, unused) == (4 + 4 * EMBED_DIM, EMBED_DIM, 0)
+    assert struct.unpack(f"!{EMBED_DIM}f", body[18 : 18 + 4 * EMBED_DIM]) == tuple(vec)
+    assert body[18 + 4 * EMBED_DIM :] == struct.pack("!i", 2) + b"ab"
+
+
+def test_sharded_run_covers_every_show_and_resumes_unfinished_shards(monkeypatch, tmp_path):
+    Session, embedded_texts = _setup(monkeypatch, tmp_path)
+    EmbeddingShard.__table__.create(bind=Session.kw["bind"])
+    # Worker threads stand in for the spawned processes (which would not see the fake model).
+    monkeypatch.setattr(gen, "_shard_executor", lambda workers: ThreadPoolExecutor(workers))
+    monkeypatch.setattr(sys, "argv", ["generate_embeddings", "--batch-size", "1", "--workers", "2", "--no-cache"])
+
+    assert gen.main() == 0
+    assert len(embedded_texts) == 3
+    db = Session()
+    shards = db.query(EmbeddingShard).order_by(EmbeddingShard.shard_id).all()
+    assert [(s.start_id, s.end_id) for s in shards] == [(0, 1), (1, None)]
+    assert all(s.finished_at is not None for s in shards)
+
+    # Interrupted run: shard 0 finished, shard 1 stopped after show 2. Only show 3 is left to do.
+    db.query(Show).update({Show.embedding: None, Show.embedding_text_hash: None})
+    db.query(EmbeddingShard).filter(EmbeddingShard.shard_id == 1).update(
+        {EmbeddingShard.last_id: 2, EmbeddingShard.finished_at: None}
+    )
+    db.commit()
+    db.close()
+
+    embedded_texts.clear()
+    assert gen.main() == 0
+    assert len(embedded_texts) == 1 and "Taskmaster" in embedded_texts[0]
+
+
+def test_marked_only_scans_just_the_marked_shows(monkeypatch, tmp_path):
+    Session, embedded_texts = _setup(monkeypatch, tmp_path)
+    assert gen.main() == 0
+
+    # Changed text but still hashed (not marked) vs. marked by the delta sync.
+    _set_overview(Session, 1, "A puppy, her sister and her family.")
+    _set_overview(Session, 3, "Comedians do very silly tasks.")
+    db = Session()
+    db.query(Show).filter(Show.tmdb_id == 3).update({Show.embedding_text_hash: None})
+    db.commit()
+    db.close()
+
+    embedded_texts.clear()
+    monkeypatch.setattr(sys, "argv", ["generate_embeddings", "--marked-only", "--no-cache"])
+    assert gen.main() == 0
+    assert len(embedded_texts) == 1 and "very silly" in embedded_texts[0]
+
+
+def test_refresh_show_neighbors_raises_ef_search_to_k():
+    from scripts.build_show_neighbors import refresh_show_neighbors
+
+    class _RecordingDB:
+        def __init__(self):
+            self.statements = []
+
+        def execute(self, statement, *_args, **_kwargs):
+            self.statements.append(str(statement).strip())
+            return []
+
+        def commit(self):
+            self.statements.append("COMMIT")
+
+    db = _RecordingDB()
+    assert refresh_show_neighbors(db, [3, 1], k=300, include_referencing=False) == 2
+
+    insert = next(i for i, s in enumerate(db.statements) if s.startswith("INSERT INTO show_neighbors"))
+    ef_search = [s for s in db.statements[:insert] if "hnsw.ef_search" in s]
+    assert ef_search and int(ef_search[-1].rsplit("=", 1)[1]) >= 300
+    assert db.statements[-1] == "COMMIT"
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Cold import of app.api (FastAPI + SQLAlchemy + pydantic) is ~1s; torch alone would add several seconds.
+IMPORT_BUDGET_MS = int(os.getenv("APP_IMPORT_BUDGET_MS", "3000"))
+
+# Loaded only on the first embed (app/embeddings.py backends), never at import time.
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "onnxruntime", "tokenizers")
+
+
+def _importtime(module: str) -> dict[str, int]:
+    """Run `python -X importtime -c 'import module'` in a fresh interpreter; return {module: cumulative_us}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        cum = cum.strip()
+        if cum.isdigit():
+            cumulative[name.strip()] = int(cum)
+    return cumulative
+
+
+@pytest.mark.parametrize("module", ["app.api", "app.models", "scripts.generate_embeddings"])
+def test_import_does_not_load_ml_frameworks(module):
+    imported = _importtime(module)
+    assert not [m for m in HEAVY_MODULES if m in imported]
+
+
+def test_app_api_cold_import_within_budget():
+    # Best of two runs to keep scheduler noise out of the measurement.
+    elapsed_ms = min(_importtime("app.api")["app.api"] for _ in range(2)) / 1000
+    assert elapsed_ms < IMPORT_BUDGET_MS, f"import app.api took {elapsed_ms:.0f} ms (budget {IMPORT_BUDGET_MS} ms)"
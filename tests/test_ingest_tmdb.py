@@ -0,0 +1,262 @@
+import asyncio
+import gzip
+import json
+import time
+
+import httpx
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Show
+from scripts import ingest_tmdb
+from scripts.ingest_tmdb import Checkpoint, TokenBucket, ingest_popular, iter_export_rows, retry_after_seconds
+from scripts.pg_copy import copy_text_lines
+
+
+class FakeTMDB:
+    """Local stand-in for /tv/popular and /tv/{id}: 20 shows per page, optional scripted failures."""
+
+    def __init__(self, total_pages=5):
+        self.total_pages = total_pages
+        self.requests: list[int] = []
+        self.detail_requests: list[int] = []
+        self.failures: dict[int, list[httpx.Response]] = {}
+        self.missing_shows: set[int] = set()
+        self.broken_shows: set[int] = set()
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.params["api_key"] == "test-key"
+        if not request.url.path.endswith("/tv/popular"):
+            return self.details(request)
+        page = int(request.url.params["page"])
+        self.requests.append(page)
+        if self.failures.get(page):
+            return self.failures[page].pop(0)
+        results = [
+            {
+                "id": page * 100 + i,
+                "name": f"Show {page}-{i}",
+                "overview": "An overview.",
+                "poster_path": "/p.jpg",
+                "genre_ids": [18],
+                "popularity": 10.0,
+                "vote_average": 7.5,
+                "vote_count": 100,
+                "first_air_date": "2020-01-01",
+            }
+            for i in range(20)
+        ]
+        return httpx.Response(200, json={"page": page, "total_pages": self.total_pages, "results": results})
+
+    def details(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.params["append_to_response"] == "content_ratings"
+        tmdb_id = int(request.url.path.rsplit("/", 1)[1])
+        self.detail_requests.append(tmdb_id)
+        if tmdb_id in self.missing_shows:
+            return httpx.Response(404, json={"status_code": 34})
+        if tmdb_id in self.broken_shows:
+            return httpx.Response(500)
+        return httpx.Response(
+            200,
+            json={
+                "id": tmdb_id,
+                "number_of_seasons": 3,
+                "episode_run_time": [20, 25],
+                "original_language": "en",
+                "content_ratings": {"results": [{"iso_3166_1": "GB", "rating": "12"}, {"iso_3166_1": "US", "rating": "tv-pg"}]},
+            },
+        )
+
+
+@pytest.fixture
+def session_factory(upsert_engine):
+    Show.__table__.create(bind=upsert_engine)
+    return sessionmaker(bind=upsert_engine)
+
+
+def _ingest(fake, session_factory, checkpoint, pages, details=True):
+    return asyncio.run(
+        ingest_popular(
+            pages,
+            session_factory=session_factory,
+            checkpoint=checkpoint,
+            api_key="test-key",
+            transport=httpx.MockTransport(fake.handler),
+            rate_per_second=1000,
+            concurrency=4,
+            details=details,
+        )
+    )
+
+
+def test_ingests_pages_concurrently_and_checkpoints_them(tmp_path, session_factory):
+    fake = FakeTMDB()
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+
+    stats = _ingest(fake, session_factory, checkpoint, pages=5)
+
+    assert stats == {"pages": 5, "inserted": 100, "updated": 0}
+    assert sorted(fake.requests) == [1, 2, 3, 4, 5]
+    # Finished: the checkpoint is cleared, it only serves crash recovery.
+    assert not (tmp_path / "checkpoint.json").exists()
+    with session_factory() as db:
+        show = db.query(Show).filter(Show.tmdb_id == 301).one()
+        assert show.poster_url == "https://image.tmdb.org/t/p/w500/p.jpg"
+        assert str(show.first_air_date) == "2020-01-01"
+        assert show.short_overview == "An overview."  # display columns derived despite the Core insert
+
+
+def test_filtering_metadata_is_fetched_per_show_at_ingest(tmp_path, session_factory):
+    fake = FakeTMDB()
+    fake.missing_shows = {102}
+
+    _ingest(fake, session_factory, Checkpoint(tmp_path / "checkpoint.json"), pages=2)
+
+    assert sorted(fake.detail_requests) == sorted([*range(100, 120), *range(200, 220)])
+    with session_factory() as db:
+        show = db.query(Show).filter(Show.tmdb_id == 101).one()
+        assert (show.number_of_seasons, show.average_episode_length) == (3, 22)
+        assert (show.original_language, show.content_rating) == ("en", "TV-PG")
+        assert db.query(Show).filter(Show.tmdb_id == 102).one().number_of_seasons is None  # 404: no details
+
+    # A listing-only refresh keeps the metadata already stored.
+    fake.detail_requests.clear()
+    _ingest(fake, session_factory, Checkpoint(tmp_path / "second.json"), pages=2, details=False)
+    assert fake.detail_requests == []
+    with session_factory() as db:
+        assert db.query(Show).filter(Show.tmdb_id == 101).one().content_rating == "TV-PG"
+
+
+def test_persistently_failing_details_do_not_abort_the_ingest(tmp_path, session_factory, monkeypatch):
+    monkeypatch.setattr(ingest_tmdb, "backoff_seconds", lambda attempt: 0.0)
+    fake = FakeTMDB()
+    fake.broken_shows = {103}
+
+    stats = _ingest(fake, session_factory, Checkpoint(tmp_path / "checkpoint.json"), pages=2)
+
+    assert stats["inserted"] == 40
+    assert fake.detail_requests.count(103) == ingest_tmdb.MAX_RETRIES + 1
+    with session_factory() as db:
+        assert db.query(Show).filter(Show.tmdb_id == 103).one().number_of_seasons is None
+        assert db.query(Show).filter(Show.tmdb_id == 104).one().number_of_seasons == 3
+
+
+def test_rerun_refreshes_existing_shows_in_one_upsert(tmp_path, session_factory):
+    fake = FakeTMDB()
+    _ingest(fake, session_factory, Checkpoint(tmp_path / "first.json"), pages=2)
+
+    original = fake.handler
+
+    def changed(request):
+        response = original(request)
+        if not request.url.path.endswith("/tv/popular"):
+            return response
+        data = response.json()
+        for item in data["results"]:
+            item.update(popularity=99.0, vote_count=500, overview="Fresh overview.", poster_path=None)
+        # The listing shifted while paging and repeats a show; one statement updates it once.
+        if data["page"] == 2:
+            data["results"].append(dict(data["results"][0]))
+        return httpx.Response(200, json=data)
+
+    fake.handler = changed
+    stats = _ingest(fake, session_factory, Checkpoint(tmp_path / "second.json"), pages=3)
+
+    assert (stats["inserted"], stats["updated"]) == (20, 40)
+    with session_factory() as db:
+        assert db.query(Show).count() == 60
+        show = db.query(Show).filter(Show.tmdb_id == 105).one()
+        assert (show.popularity, show.vote_count, show.overview) == (99.0, 500, "Fresh overview.")
+        assert show.short_overview == "Fresh overview."
+        assert show.poster_url == "https://image.tmdb.org/t/p/w500/p.jpg"  # kept when TMDB drops it
+
+
+def test_retries_rate_limits_honouring_retry_after(tmp_path, session_factory, monkeypatch):
+    fake = FakeTMDB()
+    fake.failures[2] = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(503)]
+    # Retry-After wins over backoff for the 429; the 503 has none and falls back to backoff.
+    backoffs = []
+    monkeypatch.setattr(ingest_tmdb, "backoff_seconds", lambda attempt: backoffs.append(attempt) or 0.0)
+
+    stats = _ingest(fake, session_factory, Checkpoint(tmp_path / "checkpoint.json"), pages=3)
+
+    assert stats["inserted"] == 60
+    assert fake.requests.count(2) == 3
+    assert backoffs == [1]
+
+
+def test_rerun_resumes_from_checkpoint(tmp_path, session_factory, monkeypatch):
+    monkeypatch.setattr(ingest_tmdb, "backoff_seconds", lambda attempt: 0.0)
+    fake = FakeTMDB()
+    fake.failures[4] = [httpx.Response(500)] * (ingest_tmdb.MAX_RETRIES + 1)
+    checkpoint_path = tmp_path / "checkpoint.json"
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _ingest(fake, session_factory, Checkpoint(checkpoint_path), pages=5)
+    done = Checkpoint(checkpoint_path).completed
+    assert 4 not in done
+
+    fake.requests.clear()
+    stats = _ingest(fake, session_factory, Checkpoint(checkpoint_path), pages=5)
+
+    assert sorted(fake.requests) == sorted({1, 2, 3, 4, 5} - done)
+    assert Checkpoint(checkpoint_path).completed == set()
+    with session_factory() as db:
+        assert db.query(Show).count() == 100
+    assert stats["inserted"] + 20 * len(done) == 100
+
+
+def test_completed_run_does_not_skip_the_next_refresh(tmp_path, session_factory):
+    fake = FakeTMDB()
+    checkpoint_path = tmp_path / "checkpoint.json"
+    _ingest(fake, session_factory, Checkpoint(checkpoint_path), pages=3, details=False)
+
+    fake.requests.clear()
+    stats = _ingest(fake, session_factory, Checkpoint(checkpoint_path), pages=3, details=False)
+
+    assert sorted(fake.requests) == [1, 2, 3]
+    assert (stats["pages"], stats["inserted"], stats["updated"]) == (3, 0, 60)
+
+    # A stale checkpoint listing every page (older runs never cleared it) is not "all done".
+    Checkpoint(checkpoint_path).mark(1, 2, 3)
+    fake.requests.clear()
+    _ingest(fake, session_factory, Checkpoint(checkpoint_path), pages=3, details=False)
+    assert sorted(fake.requests) == [1, 2, 3]
+
+
+def test_token_bucket_limits_request_rate():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 4 / 20 * 0.9
+
+
+def test_retry_after_parsing():
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # in the past
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
+
+
+def test_export_rows_are_streamed_and_filtered(tmp_path):
+    path = tmp_path / "tv_series_ids.json.gz"
+    lines = [
+        {"id": 1, "original_name": "Popular", "popularity": 12.5},
+        {"id": 2, "original_name": "Long tail", "popularity": 0.2},
+        {"id": 3, "original_name": "Adult", "popularity": 50.0, "adult": True},
+        {"id": 4, "original_name": "", "popularity": 9.0},
+        {"id": 5, "name": "Tab\tand\\slash", "popularity": 3},
+    ]
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps(line) for line in lines) + '\n{"id": 6, "original_na')  # truncated tail
+
+    rows = list(iter_export_rows(path, min_popularity=1.0))
+
+    assert rows == [(1, "Popular", 12.5), (5, "Tab\tand\\slash", 3.0)]
+    assert copy_text_lines(rows + [(7, "No popularity", None)]) == (
+        "1\tPopular\t12.5\n5\tTab\\tand\\\\slash\t3.0\n7\tNo popularity\t\\N\n"
+    )
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import config, local_vector_index
+from app.embeddings import EMBED_DIM
+from app.local_vector_index import LocalVectorIndex, get_local_vector_index, write_vector_index
+from app.logic import _fetch_candidate_rows
+from app.models import Show
+from scripts.export_vector_index import export_vector_index
+
+
+def _random_unit_rows(n, dim=EMBED_DIM, seed=0):
+    rows = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "LOCAL_VECTOR_INDEX", "auto")
+    monkeypatch.setattr(config, "LOCAL_VECTOR_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(local_vector_index, "_RELOAD_CHECK_SECONDS", 0.0)
+    local_vector_index.reset_local_vector_index()
+    yield tmp_path
+    local_vector_index.reset_local_vector_index()
+
+
+def test_search_is_exact_and_supports_exclusions_and_keyset(tmp_path):
+    ids = np.arange(1, 201) * 10
+    matrix = _random_unit_rows(200)
+    write_vector_index(tmp_path, ids[::-1], matrix[::-1])  # unsorted input is sorted by id
+    index = LocalVectorIndex.load(tmp_path, (tmp_path / "CURRENT").read_text())
+    query = _random_unit_rows(1, seed=1)[0]
+
+    expected = sorted(zip(ids.tolist(), (1.0 - matrix @ query).tolist()), key=lambda h: (h[1], h[0]))
+    hits = index.search(query, 15)
+    assert [h[0] for h in hits] == [h[0] for h in expected[:15]]
+    assert hits[0][1] == pytest.approx(expected[0][1], abs=1e-5)
+
+    excluded = index.search(query, 5, exclude_ids=[expected[0][0]])
+    assert [h[0] for h in excluded] == [h[0] for h in expected[1:6]]
+
+    # Walking pages with the (distance, id) keyset reproduces the full ordering.
+    walked, after = [], None
+    while len(walked) < 40:
+        page = index.search(query, 10, after=after)
+        walked.extend(page)
+        after = (page[-1][1], page[-1][0])
+    assert [h[0] for h in walked] == [h[0] for h in expected[:40]]
+
+    # Same float32 arithmetic as search(), so a cursor re-derived here matches the keyset bit for bit.
+    assert index.distance(query, walked[-1][0]) == walked[-1][1]
+    assert index.distance(query, 25) is None
+
+    assert index.vector(20) == pytest.approx(matrix[1])
+    assert index.vector(25) is None
+
+
+def test_local_index_is_used_only_when_exported_and_small_enough(index_dir, monkeypatch):
+    assert get_local_vector_index() is None  # nothing exported yet
+
+    write_vector_index(index_dir, np.array([1, 2, 3]), _random_unit_rows(3))
+    index = get_local_vector_index()
+    assert index is not None and len(index) == 3
+
+    # A new export is picked up without a restart.
+    write_vector_index(index_dir, np.array([1, 2, 3, 4]), _random_unit_rows(4))
+    assert len(get_local_vector_index()) == 4
+    assert len(list(index_dir.glob("*.npy"))) == 2  # old generation cleaned up
+
+    monkeypatch.setattr(config, "LOCAL_VECTOR_INDEX_MAX_ROWS", 3)
+    assert get_local_vector_index() is None
+    monkeypatch.setattr(config, "LOCAL_VECTOR_INDEX_MAX_ROWS", 300_000)
+    monkeypatch.setattr(config, "LOCAL_VECTOR_INDEX", "off")
+    assert get_local_vector_index() is None
+
+
+def test_recommend_candidates_come_from_exported_index(index_dir):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Show.__table__.create(bind=engine)
+    db = sessionmaker(bind=engine)()
+    vectors = _random_unit_rows(5, seed=3)
+    db.add_all(
+        [Show(tmdb_id=i, title=f"Show {i}", embedding=vectors[i - 1].tolist()) for i in range(1, 6)]
+        + [Show(tmdb_id=99, title="No embedding yet")]
+    )
+    db.commit()
+
+    assert export_vector_index(db, index_dir, batch_size=2) == 5
+    rows = _fetch_candidate_rows(db, vectors[3].tolist(), 3)
+    assert rows[0].tmdb_id == 4
+    assert len(rows) == 3
+    db.close()
@@ -5,9 +5,10 @@ from app.schemas import (
     BingePreference,
     Mood,
     EpisodeLengthPreference,
+    SearchMode,
     WatchingContext,
 )
-from app.logic import recommend_shows
+from app.logic import recommend_shows, recommend_shows_with_mode
 
 
 # ---------- Safety rules ----------
@@ -415,6 +416,32 @@ def test_recommend_with_query_uses_db_candidates(monkeypatch):
     result_titles = {show.title for show in results}
     assert result_titles == {"Alpha", "Beta"}, f"Expected Alpha and Beta, got {result_titles}"
 
+    # The candidates came from the pgvector query, in the default mode.
+    _, mode = recommend_shows_with_mode(user_input, db=db, age=30, top_n=2)
+    assert mode == SearchMode.BALANCED
+
+    # Served from the local index instead: an exact in-process scan.
+    monkeypatch.setattr("app.logic.get_local_vector_index", lambda: object())
+    _, mode = recommend_shows_with_mode(user_input, db=db, age=30, top_n=2)
+    assert mode == SearchMode.EXACT
+
+
+def test_recommend_reports_no_search_mode_without_vector_candidates():
+    user_input = RecommendationInput(
+        binge_preference=BingePreference.BINGE,
+        preferred_genres=[],
+        mood=Mood.HAPPY,
+        language_preference=None,
+        episode_length_preference=EpisodeLengthPreference.ANY,
+        watching_context=WatchingContext.ALONE,
+        query="funny workplace comedy",
+    )
+
+    # No database: the static dataset is ranked, no vector search ran.
+    results, mode = recommend_shows_with_mode(user_input, age=30)
+    assert results
+    assert mode is None
+
 
 def test_static_data_is_not_mutated_across_requests():
     """
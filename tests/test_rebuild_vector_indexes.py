@@ -0,0 +1,21 @@
+import pytest
+
+from scripts.rebuild_vector_indexes import rebuild_hnsw_indexes, replacement_index_sql
+
+
+def test_replacement_keeps_the_live_definition():
+    indexdef = (
+        "CREATE INDEX ix_shows_embedding_halfvec_hnsw ON public.shows USING hnsw "
+        "(((embedding)::halfvec(384)) halfvec_cosine_ops) WITH (m='16', ef_construction='64')"
+    )
+    assert replacement_index_sql(indexdef, "ix_shows_embedding_halfvec_hnsw_new") == (
+        "CREATE INDEX CONCURRENTLY ix_shows_embedding_halfvec_hnsw_new ON public.shows USING hnsw "
+        "(((embedding)::halfvec(384)) halfvec_cosine_ops) WITH (m='16', ef_construction='64')"
+    )
+    with pytest.raises(ValueError):
+        replacement_index_sql("ALTER TABLE shows ADD COLUMN x int", "x_new")
+
+
+def test_rejects_malformed_maintenance_work_mem():
+    with pytest.raises(ValueError, match="maintenance_work_mem"):
+        rebuild_hnsw_indexes(None, maintenance_work_mem="1GB'; DROP TABLE shows; --")
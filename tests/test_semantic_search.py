@@ -25,6 +25,9 @@ class _FakeQuery:
     def filter(self, *_args, **_kwargs):
         return self
 
+    def join(self, *_args, **_kwargs):
+        return self
+
     def order_by(self, *_args, **_kwargs):
         return self
 
@@ -42,6 +45,9 @@ class FakeDB:
     def query(self, *_args, **_kwargs):
         return _FakeQuery(self._rows)
 
+    def execute(self, *_args, **_kwargs):
+        return None
+
 
 def test_semantic_search_returns_sorted_by_distance(monkeypatch):
     # Mock embeddings so no model download is required
@@ -80,30 +86,63 @@ def test_semantic_search_empty_embeddings_returns_empty_list(monkeypatch):
     app.dependency_overrides.clear()
 
 
-def test_more_like_this_excludes_original_and_sorts(monkeypatch):
-    base_show = FakeShow(id=10, title="Base", genres=[35], overview="base", first_air_date=date(2020, 1, 1))
-    base_show.embedding = [0.0] * 384
+class _FakeQueryWithFirst(_FakeQuery):
+    def __init__(self, rows, first_value=None):
+        super().__init__(rows)
+        self._first_value = first_value
 
-    rows = [
+    def first(self):
+        return self._first_value
+
+
+class _FakeMoreLikeThisDB:
+    """Answers db.query() calls in order: precomputed neighbours, then source lookup, then live ANN."""
+
+    def __init__(self, neighbor_rows, source=None, live_rows=None):
+        self._responses = [
+            _FakeQueryWithFirst(neighbor_rows),
+            _FakeQueryWithFirst([], first_value=source),
+            _FakeQueryWithFirst(live_rows or []),
+        ]
+        self.calls = 0
+
+    def query(self, *_args, **_kwargs):
+        response = self._responses[self.calls]
+        self.calls += 1
+        return response
+
+
+def test_more_like_this_reads_precomputed_neighbors():
+    neighbor_rows = [
         (FakeShow(id=11, title="A", genres=[35, 18], overview="aaa"), 0.2),
         (FakeShow(id=12, title="B", genres=["crime"], overview="bbb"), 0.5),
     ]
+    fake_db = _FakeMoreLikeThisDB(neighbor_rows)
+    app.dependency_overrides[get_db] = lambda: (yield fake_db)
+
+    client = TestClient(app)
+    res = client.post("/search/more-like-this", json={"show_id": 10, "top_k": 10})
+    assert res.status_code == 200
 
-    class FakeQueryWithFirst(_FakeQuery):
-        def __init__(self, rows, first_value=None):
-            super().__init__(rows)
-            self._first_value = first_value
+    data = res.json()
+    assert [item["id"] for item in data] == [11, 12]
+    assert [item["distance"] for item in data] == sorted([0.2, 0.5])
+    assert data[0]["genres"] == ["comedy", "drama"]
+    # Neighbour table hit: no source lookup and no live ANN query.
+    assert fake_db.calls == 1
 
-        def first(self):
-            return self._first_value
+    app.dependency_overrides.clear()
 
-    class FakeDBWithFirst(FakeDB):
-        def query(self, *args, **_kwargs):
-            if len(args) == 1:
-                return FakeQueryWithFirst([], first_value=base_show)
-            return FakeQueryWithFirst(rows)
 
-    app.dependency_overrides[get_db] = lambda: (yield FakeDBWithFirst(rows))
+def test_more_like_this_falls_back_to_live_search_and_sorts():
+    from types import SimpleNamespace
+
+    live_rows = [
+        (FakeShow(id=12, title="B", genres=["crime"], overview="bbb"), 0.5),
+        (FakeShow(id=11, title="A", genres=[35, 18], overview="aaa"), 0.2),
+    ]
+    fake_db = _FakeMoreLikeThisDB([], source=SimpleNamespace(id=10, has_embedding=True), live_rows=live_rows)
+    app.dependency_overrides[get_db] = lambda: (yield fake_db)
 
     client = TestClient(app)
     res = client.post("/search/more-like-this", json={"show_id": 10, "top_k": 10})
@@ -111,8 +150,509 @@ def test_more_like_this_excludes_original_and_sorts(monkeypatch):
 
     data = res.json()
     assert [item["id"] for item in data] == [11, 12]
-    assert [item["distance"] for item in data] == sorted([0.2, 0.5])
-    assert data[0]["genres"] == ["comedy", "drama"]
+    assert fake_db.calls == 3
 
     app.dependency_overrides.clear()
 
+
+def test_more_like_this_without_embedding_returns_400():
+    from types import SimpleNamespace
+
+    fake_db = _FakeMoreLikeThisDB([], source=SimpleNamespace(id=10, has_embedding=False))
+    app.dependency_overrides[get_db] = lambda: (yield fake_db)
+
+    client = TestClient(app)
+    res = client.post("/search/more-like-this", json={"show_id": 10})
+    assert res.status_code == 400
+    assert res.json()["error_code"] == "SHOW_NO_EMBEDDING"
+
+    app.dependency_overrides.clear()
+
+
+def test_semantic_search_batch_embeds_once_and_groups_by_query(monkeypatch):
+    from types import SimpleNamespace
+
+    embed_calls = []
+
+    def fake_embed_texts(texts):
+        embed_calls.append(list(texts))
+        return [[0.0] * 384 for _ in texts]
+
+    monkeypatch.setattr(search_router, "embed_texts", fake_embed_texts)
+
+    def _row(ord_, id_, title, distance, genres=None):
+        return SimpleNamespace(
+            ord=ord_, id=id_, title=title, genres=genres, overview=f"{title} overview",
+            poster_url=None, vote_average=None, first_air_date=date(2020, 1, 1), distance=distance,
+        )
+
+    rows = [
+        _row(1, 1, "A", 0.1, genres=[35]),
+        _row(1, 2, "B", 0.3),
+        _row(2, 3, "C", 0.2, genres=["crime"]),
+    ]
+    executed = []
+
+    class _Result:
+        def all(self):
+            return rows
+
+    class FakeBatchDB:
+        def execute(self, statement, params=None):
+            if params is None:  # SET LOCAL for the search mode
+                return None
+            executed.append(params)
+            return _Result()
+
+    app.dependency_overrides[get_db] = lambda: (yield FakeBatchDB())
+
+    client = TestClient(app)
+    res = client.post(
+        "/search/semantic/batch",
+        json={"queries": ["office comedy", " detective show ", "office comedy"], "top_k": 5},
+    )
+    assert res.status_code == 200
+
+    data = res.json()["results"]
+    assert list(data.keys()) == ["office comedy", "detective show"]
+    assert [item["id"] for item in data["office comedy"]] == [1, 2]
+    assert [item["id"] for item in data["detective show"]] == [3]
+    assert data["office comedy"][0]["genres"] == ["comedy"]
+    assert data["office comedy"][0]["first_air_date"] == "2020-01-01"
+    assert embed_calls == [["office comedy", "detective show"]]
+    assert len(executed) == 1
+    assert executed[0]["top_k"] == 5
+    assert len(executed[0]["query_vecs"]) == 2
+
+    app.dependency_overrides.clear()
+
+
+def test_semantic_search_batch_rejects_blank_query(monkeypatch):
+    monkeypatch.setattr(search_router, "embed_texts", lambda texts: [[0.0] * 384 for _ in texts])
+    app.dependency_overrides[get_db] = lambda: (yield FakeDB([]))
+
+    client = TestClient(app)
+    res = client.post("/search/semantic/batch", json={"queries": ["ok", "   "]})
+    assert res.status_code == 400
+    assert res.json()["error_code"] == "QUERY_REQUIRED"
+
+    app.dependency_overrides.clear()
+
+
+class _FakeResult:
+    def __init__(self, value):
+        self._value = value
+
+    def scalar(self):
+        return self._value
+
+
+class _FakePagingDB:
+    """
+    Vector query returns `rows`; keyword query (single entity) returns nothing; records SET LOCAL
+    and other statements, which return `scalar`.
+    """
+
+    def __init__(self, rows, scalar=None):
+        self._rows = rows
+        self._scalar = scalar
+        self.statements = []
+        self.order_by = []
+        self.joins = []
+
+    def query(self, *args, **_kwargs):
+        db = self
+
+        class _RecordingQuery(_FakeQuery):
+            def order_by(self, *clauses, **_kwargs):
+                db.order_by.append([str(c) for c in clauses])
+                return self
+
+            def join(self, target, *_args, **_kwargs):
+                db.joins.append(target)
+                return self
+
+        return _RecordingQuery(self._rows if len(args) > 1 else [])
+
+    def execute(self, statement, *_args, **_kwargs):
+        self.statements.append(str(statement))
+        return _FakeResult(self._scalar)
+
+
+def test_semantic_search_first_page_returns_cursor_and_next_page_reuses_embedding(monkeypatch):
+    embed_calls = []
+
+    def fake_embed(q):
+        embed_calls.append(q)
+        return [0.0] * 384
+
+    monkeypatch.setattr(search_router, "embed_text", fake_embed)
+
+    page1_rows = [
+        (FakeShow(id=1, title="A", overview="aaa"), 0.1),
+        (FakeShow(id=2, title="B", overview="bbb"), 0.15),
+        (FakeShow(id=3, title="C", overview="ccc"), 0.2),
+    ]
+    app.dependency_overrides[get_db] = lambda: (yield _FakePagingDB(page1_rows))
+    client = TestClient(app)
+
+    res = client.post("/search/semantic", json={"query": "space opera", "top_k": 2})
+    assert res.status_code == 200
+    assert [item["id"] for item in res.json()] == [1, 2]
+    cursor = res.headers.get("X-Next-Cursor")
+    assert cursor
+
+    page2_db = _FakePagingDB([(FakeShow(id=3, title="C", overview="ccc"), 0.2)])
+    app.dependency_overrides[get_db] = lambda: (yield page2_db)
+
+    res = client.post("/search/semantic", json={"query": "space opera", "top_k": 2, "cursor": cursor})
+    assert res.status_code == 200
+    assert [item["id"] for item in res.json()] == [3]
+    # Short page: no further cursor, and the query was embedded only once.
+    assert "X-Next-Cursor" not in res.headers
+    assert embed_calls == ["space opera"]
+    assert any("hnsw.ef_search" in s for s in page2_db.statements)
+
+    app.dependency_overrides.clear()
+
+
+def test_next_page_orders_by_distance_then_id_and_tags_cursor_with_backend(monkeypatch):
+    monkeypatch.setattr(search_router, "embed_text", lambda _q: [0.0] * 384)
+    state = {"s": "abc", "q": "space opera", "d": 0.2, "i": 2, "b": "pgvector", "n": 2, "x": [1, 2]}
+    rows = [(FakeShow(id=3, title="C", overview="ccc"), 0.25), (FakeShow(id=4, title="D", overview="ddd"), 0.3)]
+    db = _FakePagingDB(rows)
+    app.dependency_overrides[get_db] = lambda: (yield db)
+    client = TestClient(app)
+
+    res = client.post("/search/semantic", json={"query": "space opera", "top_k": 2, "cursor": search_router._encode_cursor(state)})
+    assert res.status_code == 200
+    # The inner query orders by distance alone (servable by the HNSW index); the outer one
+    # applies the (distance, id) order of the keyset predicate.
+    inner_sql = str(db.joins[-1].element)
+    assert "ORDER BY (shows.embedding <=> :embedding_1) ASC\n LIMIT" in inner_sql
+    assert "shows.id" not in inner_sql.split("ORDER BY")[1]
+    assert db.order_by[-1] == ["ann_page.distance ASC", "ann_page.id ASC"]
+    next_state = search_router._decode_cursor(res.headers["X-Next-Cursor"])
+    assert (next_state["d"], next_state["i"], next_state["b"]) == (0.3, 4, "pgvector")
+    # Same backend: the keyset is used as is, no distance lookup.
+    assert not any("WHERE shows.id" in s for s in db.statements)
+
+    app.dependency_overrides.clear()
+
+
+def test_cursor_from_other_backend_recomputes_the_boundary_distance(monkeypatch):
+    monkeypatch.setattr(search_router, "embed_text", lambda _q: [0.0] * 384)
+    seen_after = []
+    real_fetch = search_router._fetch_semantic_page
+
+    def recording_fetch(db, query_vec, *, after, **kwargs):
+        seen_after.append(after)
+        return real_fetch(db, query_vec, after=after, **kwargs)
+
+    monkeypatch.setattr(search_router, "_fetch_semantic_page", recording_fetch)
+    # Issued by a worker serving from the local float32 index.
+    state = {"s": "abc", "q": "space opera", "d": 0.2000001, "i": 2, "b": "local", "n": 2, "x": [1, 2]}
+    db = _FakePagingDB([], scalar=0.2)
+    app.dependency_overrides[get_db] = lambda: (yield db)
+    client = TestClient(app)
+
+    res = client.post("/search/semantic", json={"query": "space opera", "top_k": 2, "cursor": search_router._encode_cursor(state)})
+    assert res.status_code == 200
+    assert seen_after == [(0.2, 2)]
+    assert any("WHERE shows.id" in s for s in db.statements)
+
+    app.dependency_overrides.clear()
+
+
+def test_semantic_search_rejects_cursor_for_other_query(monkeypatch):
+    monkeypatch.setattr(search_router, "embed_text", lambda _q: [0.0] * 384)
+    cursor = search_router._encode_cursor({"s": "abc", "q": "space opera", "d": None, "i": None, "n": 2, "x": [1, 2]})
+    app.dependency_overrides[get_db] = lambda: (yield _FakePagingDB([]))
+
+    client = TestClient(app)
+    res = client.post("/search/semantic", json={"query": "cooking show", "cursor": cursor})
+    assert res.status_code == 400
+    assert res.json()["error_code"] == "INVALID_CURSOR"
+
+    res = client.post("/search/semantic", json={"query": "cooking show", "cursor": "not-a-cursor"})
+    assert res.status_code == 400
+
+    app.dependency_overrides.clear()
+
+
+def test_ef_search_grows_with_page_depth():
+    from app import config
+    from app.schemas import SearchMode
+    from app.vector_search import hnsw_ef_search
+
+    def ef(rows_to_skip, top_k):
+        return hnsw_ef_search(SearchMode.BALANCED, search_router._rows_needed_for_depth(rows_to_skip, top_k))
+
+    shallow = ef(0, 10)
+    deep = ef(200, 10)
+    assert shallow == config.HNSW_EF_SEARCH_BALANCED
+    assert deep > shallow
+    assert ef(10_000, 50) == config.HNSW_EF_SEARCH_MAX
+
+
+def test_search_mode_is_applied_and_reported(monkeypatch):
+    monkeypatch.setattr(search_router, "embed_text", lambda _q: [0.0] * 384)
+    client = TestClient(app)
+
+    fast_db = _FakePagingDB([])
+    app.dependency_overrides[get_db] = lambda: (yield fast_db)
+    res = client.post("/search/semantic", json={"query": "anything", "mode": "fast"})
+    assert res.status_code == 200
+    assert res.headers["X-Search-Mode"] == "fast"
+    assert any("hnsw.ef_search" in s for s in fast_db.statements)
+
+    exact_db = _FakePagingDB([])
+    app.dependency_overrides[get_db] = lambda: (yield exact_db)
+    res = client.post("/search/semantic", json={"query": "anything", "mode": "exact"})
+    assert res.headers["X-Search-Mode"] == "exact"
+    assert any("enable_indexscan = off" in s for s in exact_db.statements)
+    assert not any("hnsw.ef_search" in s for s in exact_db.statements)
+
+    default_db = _FakePagingDB([])
+    app.dependency_overrides[get_db] = lambda: (yield default_db)
+    res = client.post("/search/semantic", json={"query": "anything"})
+    assert res.headers["X-Search-Mode"] == "balanced"
+
+    app.dependency_overrides.clear()
+
+
+def test_search_from_local_index_reports_exact_mode(monkeypatch):
+    monkeypatch.setattr(search_router, "embed_text", lambda _q: [0.0] * 384)
+
+    class _FakeLocalIndex:
+        def search(self, _query, top_k, **_kwargs):
+            return [(1, 0.1), (2, 0.2), (3, 0.3)][:top_k]
+
+    rows = {1: FakeShow(id=1, title="A"), 2: FakeShow(id=2, title="B"), 3: FakeShow(id=3, title="C")}
+    monkeypatch.setattr(search_router, "get_local_vector_index", lambda: _FakeLocalIndex())
+    monkeypatch.setattr(search_router, "rows_for_hits", lambda _db, hits: [(rows[i], d) for i, d in hits])
+    db = _FakePagingDB([])
+    app.dependency_overrides[get_db] = lambda: (yield db)
+    client = TestClient(app)
+
+    res = client.post("/search/semantic", json={"query": "anything", "mode": "fast", "top_k": 2})
+    assert res.status_code == 200
+    assert res.headers["X-Search-Mode"] == "exact"
+    assert not any("SET LOCAL" in s for s in db.statements)
+
+    res = client.post(
+        "/search/semantic",
+        json={"query": "anything", "mode": "fast", "top_k": 2, "cursor": res.headers["X-Next-Cursor"]},
+    )
+    assert res.status_code == 200
+    assert res.headers["X-Search-Mode"] == "exact"
+
+    app.dependency_overrides.clear()
+
+
+def test_resolve_search_mode_defaults_to_exact_for_family_context():
+    from app.schemas import SearchMode
+    from app.vector_search import resolve_search_mode
+
+    assert resolve_search_mode(None, family_context=True) == SearchMode.EXACT
+    assert resolve_search_mode(None) == SearchMode.BALANCED
+    assert resolve_search_mode(SearchMode.FAST, family_context=True) == SearchMode.FAST
+
+
+def test_search_result_uses_precomputed_display_fields():
+    from app.shared import show_display_fields
+
+    show = FakeShow(id=5, title="Night Desk", genres=[35, 9648], overview="  A newsroom after midnight.  ")
+    for name, value in show_display_fields(show.genres, show.overview).items():
+        setattr(show, name, value)
+    assert show.genre_names == ["comedy", "mystery"]
+    assert show.short_overview == "A newsroom after midnight."
+    assert "newsroom" in show.overview_tokens
+
+    # Raw fields are not consulted once the precomputed ones are present.
+    show.genres = None
+    result = search_router._to_search_result(show, query="newsroom drama", distance=0.3)
+    assert result.genres == ["comedy", "mystery"]
+    assert result.overview == "A newsroom after midnight."
+    assert "newsroom" in result.ai_match_reason
+
+
+def _similar_row(id_, title, distance):
+    from types import SimpleNamespace
+
+    return SimpleNamespace(
+        id=id_, title=title, genres=[35], overview=f"{title} overview", poster_url=None,
+        vote_average=None, first_air_date=None, distance=distance,
+    )
+
+
+class _FakeSimilarDB:
+    """execute() returns `rows` for the ANN statement; query() returns `seed_rows` (embeddings)."""
+
+    def __init__(self, rows, seed_rows=None):
+        self._rows = rows
+        self._seed_rows = seed_rows or []
+        self.params = []
+        self.statements = []
+
+    def query(self, *_args, **_kwargs):
+        return _FakeQuery(self._seed_rows)
+
+    def execute(self, statement, params=None):
+        if params is None:  # SET LOCAL for the search mode
+            self.statements.append(str(statement))
+            return None
+        self.params.append(params)
+        rows = self._rows
+
+        class _Result:
+            def all(self):
+                return rows
+
+        return _Result()
+
+
+def test_more_like_these_uses_one_centroid_query_and_excludes_seeds():
+    fake_db = _FakeSimilarDB([_similar_row(7, "G", 0.1), _similar_row(8, "H", 0.3)])
+    app.dependency_overrides[get_db] = lambda: (yield fake_db)
+
+    client = TestClient(app)
+    res = client.post("/search/more-like-these", json={"show_ids": [3, 1, 3], "top_k": 5})
+    assert res.status_code == 200
+    assert [item["id"] for item in res.json()] == [7, 8]
+    assert res.json()[0]["genres"] == ["comedy"]
+    assert fake_db.params == [{"seed_ids": [1, 3], "top_k": 5}]
+
+    app.dependency_overrides.clear()
+
+
+def test_more_like_these_sizes_ef_search_for_the_excluded_seeds():
+    from app import config
+
+    seed_ids = list(range(1, 201))
+    fake_db = _FakeSimilarDB([_similar_row(900, "Z", 0.1)])
+    app.dependency_overrides[get_db] = lambda: (yield fake_db)
+
+    client = TestClient(app)
+    res = client.post("/search/more-like-these", json={"show_ids": seed_ids, "top_k": 10, "mode": "fast"})
+    assert res.status_code == 200
+    ef_search = [s for s in fake_db.statements if "hnsw.ef_search =" in s and "DEFAULT" not in s]
+    # The seeds are discarded after the index scan: it must yield them plus top_k.
+    assert int(ef_search[0].rsplit("=", 1)[1]) >= min(config.HNSW_EF_SEARCH_MAX, 210)
+
+    app.dependency_overrides.clear()
+
+
+def test_more_like_these_with_clusters_sends_kmeans_centroids():
+    import numpy as np
+
+    seeds = [
+        (np.eye(384, dtype=np.float32)[0],),
+        (np.eye(384, dtype=np.float32)[1],),
+        (np.eye(384, dtype=np.float32)[1] * 2,),
+    ]
+    fake_db = _FakeSimilarDB([_similar_row(9, "I", 0.2)], seed_rows=seeds)
+    app.dependency_overrides[get_db] = lambda: (yield fake_db)
+
+    client = TestClient(app)
+    res = client.post("/search/more-like-these", json={"show_ids": [1, 2, 3], "clusters": 2})
+    assert res.status_code == 200
+    assert [item["id"] for item in res.json()] == [9]
+    assert len(fake_db.params) == 1
+    assert len(fake_db.params[0]["centroids"]) == 2
+
+    app.dependency_overrides.clear()
+
+
+def test_more_like_these_requires_login_without_show_ids():
+    app.dependency_overrides[get_db] = lambda: (yield _FakeSimilarDB([]))
+
+    client = TestClient(app)
+    res = client.post("/search/more-like-these", json={})
+    assert res.status_code == 401
+
+    app.dependency_overrides.clear()
+
+
+def test_spherical_kmeans_separates_tastes():
+    import numpy as np
+    from app.vector_search import spherical_kmeans
+
+    a = np.array([[1.0, 0.0, 0.0], [0.9, 0.1, 0.0]])
+    b = np.array([[0.0, 1.0, 0.0], [0.0, 0.9, 0.1]])
+    centroids = spherical_kmeans(np.vstack([a, b]), 2)
+    assert centroids.shape == (2, 3)
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+    assert {int(np.argmax(c)) for c in centroids} == {0, 1}
+    # k is capped by the number of seeds
+    assert spherical_kmeans(a, 5).shape == (2, 3)
+
+
+def _compile_pg(clause):
+    from sqlalchemy.dialects import postgresql
+
+    return str(clause.compile(dialect=postgresql.dialect()))
+
+
+def test_ann_candidates_use_compact_index_expression_per_tier(monkeypatch):
+    from sqlalchemy import select
+
+    from app import config
+    from app.models import Show
+    from app.schemas import SearchMode
+    from app.vector_search import ann_candidates, candidate_distance, hnsw_ef_search, search_mode_settings
+
+    query_vec = [0.1] * 384
+
+    monkeypatch.setattr(config, "VECTOR_STORAGE_TIER", "full")
+    assert ann_candidates(query_vec, rows_needed=20) is None
+    assert "shows.embedding <=>" in _compile_pg(candidate_distance(query_vec, None))
+
+    monkeypatch.setattr(config, "VECTOR_STORAGE_TIER", "halfvec")
+    candidates = ann_candidates(query_vec, rows_needed=20)
+    sql = _compile_pg(
+        select(Show.id)
+        .join(candidates, candidates.c.id == Show.id)
+        .order_by(candidate_distance(query_vec, candidates))
+    )
+    assert "WITH ann_candidates AS MATERIALIZED" in sql
+    assert "CAST(shows.embedding AS HALFVEC(384)) <=> CAST(" in sql
+    assert "LIMIT" in sql
+    # The exact re-rank orders the materialized candidates, not shows (whose full HNSW index could serve it).
+    assert "ORDER BY ann_candidates.embedding <=>" in sql
+    # Oversampled candidates need a matching ef_search.
+    assert hnsw_ef_search(SearchMode.BALANCED, 80) == 80 * config.VECTOR_RERANK_OVERSAMPLE["halfvec"]
+
+    monkeypatch.setattr(config, "VECTOR_STORAGE_TIER", "bit")
+    sql = _compile_pg(select(ann_candidates(query_vec, rows_needed=20)))
+    assert "CAST(binary_quantize(shows.embedding) AS BIT(384)) <~> binary_quantize(" in sql
+
+    # Exact mode ranks every row on the full vector.
+    with search_mode_settings(FakeDB([]), SearchMode.EXACT, rows_needed=20):
+        assert ann_candidates(query_vec, rows_needed=20) is None
+
+
+def test_semantic_search_reranks_compact_candidates_on_full_vectors(monkeypatch):
+    from app import config
+
+    monkeypatch.setattr(config, "VECTOR_STORAGE_TIER", "halfvec")
+    monkeypatch.setattr(search_router, "embed_text", lambda _q: [0.0] * 384)
+    captured = []
+
+    class _CapturingQuery(_FakeQuery):
+        def join(self, target, *_args, **_kwargs):
+            captured.append(target)
+            return self
+
+    class _CapturingDB(FakeDB):
+        def query(self, *_args, **_kwargs):
+            return _CapturingQuery([])
+
+    app.dependency_overrides[get_db] = lambda: (yield _CapturingDB([]))
+    try:
+        res = TestClient(app).post("/search/semantic", json={"query": "space opera"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert res.status_code == 200
+    assert any("HALFVEC(384)" in _compile_pg(target) for target in captured)
@@ -0,0 +1,165 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+import httpx
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.embeddings import embedding_text_hash
+from app.models import Show, TmdbSyncState
+from scripts.generate_embeddings import build_embedding_text
+from scripts import ingest_tmdb
+from scripts.sync_tmdb_changes import TV_CHANGES_FEED, change_windows, sync_changes
+
+
+class FakeTMDB:
+    """Serves /tv/changes (two pages) and /tv/{id} details."""
+
+    def __init__(self):
+        self.changes = [[1, 2, 900], [3, 901, 902]]
+        self.change_params: list[dict] = []
+        self.detail_requests: list[int] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/tv/changes"):
+            params = dict(request.url.params)
+            self.change_params.append(params)
+            page = int(params["page"])
+            results = [{"id": i, "adult": i == 902} for i in self.changes[page - 1]]
+            return httpx.Response(200, json={"page": page, "results": results, "total_pages": len(self.changes)})
+        tmdb_id = int(path.rsplit("/", 1)[-1])
+        self.detail_requests.append(tmdb_id)
+        if tmdb_id == 3:
+            return httpx.Response(404, json={"status_code": 34})
+        return httpx.Response(
+            200,
+            json={
+                "id": tmdb_id,
+                "name": "Bluey (Renamed)" if tmdb_id == 1 else "Severance",
+                "overview": "A puppy and her family." if tmdb_id == 1 else "Office workers split memories.",
+                "genres": [{"id": 16, "name": "Animation"}, {"id": 10751, "name": "Family"}],
+                "popularity": 77.0,
+                "vote_average": 8.5,
+                "vote_count": 1200,
+                "first_air_date": "2018-10-01",
+                "number_of_seasons": 3,
+                "original_language": "en",
+                "content_ratings": {"results": [{"iso_3166_1": "US", "rating": "TV-Y"}]},
+            },
+        )
+
+
+@pytest.fixture
+def session_factory(upsert_engine):
+    Show.__table__.create(bind=upsert_engine)
+    TmdbSyncState.__table__.create(bind=upsert_engine)
+    Session = sessionmaker(bind=upsert_engine)
+
+    with Session() as db:
+        shows = [
+            Show(tmdb_id=1, title="Bluey", genres=[16, 10751], overview="A puppy and her family."),
+            Show(tmdb_id=2, title="Severance", genres=[16, 10751], overview="Office workers split memories."),
+            Show(tmdb_id=3, title="Gone", genres=[18], overview="Removed from TMDB."),
+            Show(tmdb_id=4, title="Unchanged", genres=[18], overview="Not in the feed."),
+        ]
+        for show in shows:
+            show.embedding_text_hash = embedding_text_hash(build_embedding_text(show))
+        db.add_all(shows)
+        db.commit()
+    return Session
+
+
+def _sync(fake, session_factory, **kwargs):
+    return asyncio.run(
+        sync_changes(
+            api_key="test-key",
+            session_factory=session_factory,
+            transport=httpx.MockTransport(fake.handler),
+            rate_per_second=1000,
+            **kwargs,
+        )
+    )
+
+
+def test_refetches_only_changed_shows_in_catalog_and_marks_changed_texts(session_factory):
+    fake = FakeTMDB()
+    now = datetime(2026, 3, 10, 4, 0, tzinfo=timezone.utc)
+
+    stats = _sync(fake, session_factory, now=now)
+
+    assert stats["since"] == "2026-03-09"  # no stored state: one day back
+    assert [p["page"] for p in fake.change_params] == ["1", "2"]
+    assert sorted(fake.detail_requests) == [1, 2, 3]  # 900/901 are not in shows, 902 is adult
+    assert (stats["changed"], stats["existing"], stats["refreshed"], stats["marked"]) == (5, 3, 2, 1)
+    with session_factory() as db:
+        bluey = db.query(Show).filter(Show.tmdb_id == 1).one()
+        assert (bluey.title, bluey.popularity, bluey.content_rating) == ("Bluey (Renamed)", 77.0, "TV-Y")
+        assert bluey.embedding_text_hash is None  # renamed: marked for re-embedding
+        severance = db.query(Show).filter(Show.tmdb_id == 2).one()
+        assert severance.embedding_text_hash == embedding_text_hash(build_embedding_text(severance))
+        assert db.query(Show).filter(Show.tmdb_id == 4).one().popularity is None
+        assert db.get(TmdbSyncState, TV_CHANGES_FEED).synced_at.replace(tzinfo=timezone.utc) == now
+
+
+def test_next_run_starts_from_stored_watermark(session_factory):
+    _sync(FakeTMDB(), session_factory, now=datetime(2026, 3, 1, 4, 0, tzinfo=timezone.utc))
+
+    fake = FakeTMDB()
+    fake.changes = [[]]
+    stats = _sync(fake, session_factory, now=datetime(2026, 3, 20, 4, 0, tzinfo=timezone.utc))
+
+    assert stats["since"] == "2026-03-01"
+    # 20 days is more than /tv/changes allows per request: two windows.
+    assert [(p["start_date"], p["end_date"]) for p in fake.change_params] == [
+        ("2026-03-01", "2026-03-14"),
+        ("2026-03-15", "2026-03-20"),
+    ]
+    assert fake.detail_requests == []
+
+
+def test_failed_sync_keeps_the_watermark(session_factory):
+    fake = FakeTMDB()
+    original = fake.handler
+
+    def broken(request):
+        if request.url.path.endswith("/tv/2"):
+            return httpx.Response(401, json={"status_code": 7})
+        return original(request)
+
+    fake.handler = broken
+    with pytest.raises(httpx.HTTPStatusError):
+        _sync(fake, session_factory, since=date(2026, 3, 1))
+    with session_factory() as db:
+        assert db.get(TmdbSyncState, TV_CHANGES_FEED) is None
+
+
+def test_persistently_failing_show_is_skipped_and_the_watermark_advances(session_factory, monkeypatch):
+    monkeypatch.setattr(ingest_tmdb, "backoff_seconds", lambda attempt: 0.0)
+    fake = FakeTMDB()
+    original = fake.handler
+
+    def flaky(request):
+        if request.url.path.endswith("/tv/2"):
+            fake.detail_requests.append(2)
+            return httpx.Response(503)
+        return original(request)
+
+    fake.handler = flaky
+    now = datetime(2026, 3, 10, 4, 0, tzinfo=timezone.utc)
+    stats = _sync(fake, session_factory, now=now)
+
+    assert fake.detail_requests.count(2) == ingest_tmdb.MAX_RETRIES + 1
+    assert (stats["refreshed"], stats["failed"]) == (1, 1)
+    with session_factory() as db:
+        assert db.query(Show).filter(Show.tmdb_id == 1).one().title == "Bluey (Renamed)"
+        assert db.query(Show).filter(Show.tmdb_id == 2).one().popularity is None
+        assert db.get(TmdbSyncState, TV_CHANGES_FEED).synced_at.replace(tzinfo=timezone.utc) == now
+
+
+def test_change_windows_cover_range_in_14_day_steps():
+    assert change_windows(date(2026, 1, 1), date(2026, 1, 1)) == [(date(2026, 1, 1), date(2026, 1, 1))]
+    windows = change_windows(date(2026, 1, 1), date(2026, 2, 1))
+    assert windows[0] == (date(2026, 1, 1), date(2026, 1, 14))
+    assert windows[-1] == (date(2026, 1, 29), date(2026, 2, 1))
+    assert len(windows) == 3
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import thread_budget
+from app.thread_budget import apply_thread_budget, cgroup_cpu_quota, compute_thread_budget
+
+
+def _cgroup(tmp_path, cpu_max):
+    (tmp_path / "cpu.max").write_text(cpu_max)
+    return tmp_path
+
+
+def test_cgroup_quota_parsing(tmp_path):
+    assert cgroup_cpu_quota(_cgroup(tmp_path, "250000 100000\n")) == 2.5
+    assert cgroup_cpu_quota(_cgroup(tmp_path, "max 100000\n")) is None
+    assert cgroup_cpu_quota(tmp_path / "missing") is None
+
+    v1 = tmp_path / "v1"
+    (v1 / "cpu").mkdir(parents=True)
+    (v1 / "cpu" / "cpu.cfs_quota_us").write_text("150000")
+    (v1 / "cpu" / "cpu.cfs_period_us").write_text("100000")
+    assert cgroup_cpu_quota(v1) == 1.5
+
+
+def test_auto_budget_splits_cgroup_cpus_across_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(thread_budget, "available_cpus", lambda quota: min(16, int(quota or 16)))
+    monkeypatch.setenv("EMBEDDING_THREADS", "auto")
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    monkeypatch.delenv("EMBEDDING_WORKERS", raising=False)
+
+    budget = compute_thread_budget(cgroup_root=_cgroup(tmp_path, "400000 100000"))
+    assert (budget.cpus, budget.processes, budget.intra_op_threads, budget.inter_op_threads) == (4, 2, 2, 1)
+
+    # Embedding pool workers multiply the processes that run the model; never below one thread.
+    monkeypatch.setenv("EMBEDDING_WORKERS", "4")
+    assert compute_thread_budget(cgroup_root=tmp_path).intra_op_threads == 1
+
+    monkeypatch.setenv("EMBEDDING_THREADS", "3")
+    assert compute_thread_budget(cgroup_root=tmp_path).intra_op_threads == 3
+
+    monkeypatch.setenv("EMBEDDING_THREADS", "off")
+    assert compute_thread_budget(cgroup_root=tmp_path).intra_op_threads is None
+
+    monkeypatch.setenv("EMBEDDING_THREADS", "lots")
+    with pytest.raises(RuntimeError, match="EMBEDDING_THREADS"):
+        compute_thread_budget(cgroup_root=tmp_path)
+
+
+def test_apply_budget_respects_explicit_env(monkeypatch):
+    for name in thread_budget.BLAS_THREAD_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("MKL_NUM_THREADS", "7")
+    apply_thread_budget(thread_budget.ThreadBudget("auto", 8, None, 4, 2, 1))
+    assert os.environ["OMP_NUM_THREADS"] == "2"
+    assert os.environ["MKL_NUM_THREADS"] == "7"
+
+
+def test_metrics_reports_thread_budget():
+    from app.api import app
+
+    res = TestClient(app).get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    assert 'moodflix_embedding_threads{setting="cpus_available"' in res.text
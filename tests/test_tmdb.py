@@ -10,7 +10,7 @@ import app.tmdb as tmdb
 
 class MockResponse:
     """
-    Simple mock response object for requests.get
+    Simple mock response object for the TMDB session's get
     """
 
     def __init__(self, json_data, status_code=200):
@@ -45,7 +45,7 @@ def test_no_results_returns_none(monkeypatch):
     def mock_get(*args, **kwargs):
         return MockResponse({"results": []})
 
-    monkeypatch.setattr(tmdb.requests, "get", mock_get)
+    monkeypatch.setattr(tmdb._session(), "get", mock_get)
 
     result = tmdb.search_tv_show("asdasd_qwe_12345")
 
@@ -73,7 +73,7 @@ def test_no_poster_returns_none_poster_url(monkeypatch):
             }
         )
 
-    monkeypatch.setattr(tmdb.requests, "get", mock_get)
+    monkeypatch.setattr(tmdb._session(), "get", mock_get)
 
     result = tmdb.search_tv_show("Test Show")
 
@@ -102,7 +102,7 @@ def test_valid_result_structure(monkeypatch):
             }
         )
 
-    monkeypatch.setattr(tmdb.requests, "get", mock_get)
+    monkeypatch.setattr(tmdb._session(), "get", mock_get)
 
     result = tmdb.search_tv_show("Valid Show")
 
@@ -121,17 +121,44 @@ def test_valid_result_structure(monkeypatch):
 
 def test_network_failure_returns_none(monkeypatch):
     """
-    When requests.get raises an exception,
+    When the HTTP request raises an exception,
     search_tv_show should return None and not crash.
     """
 
     def mock_get(*args, **kwargs):
         raise requests.RequestException("Network error")
 
-    monkeypatch.setattr(tmdb.requests, "get", mock_get)
+    monkeypatch.setattr(tmdb._session(), "get", mock_get)
 
     result = tmdb.search_tv_show("Network Failure Show")
 
     assert result is None
 
 
+def test_requests_share_one_pooled_session_with_get_retries(monkeypatch):
+    """
+    All TMDB calls go through one session whose adapter is sized to the
+    enrichment pool and retries idempotent GETs on 5xx (not on 429).
+    """
+    calls = []
+
+    def mock_get(url, **kwargs):
+        calls.append(url)
+        return MockResponse({"results": [{"id": 7, "poster_path": None}]})
+
+    session = tmdb._session()
+    monkeypatch.setattr(session, "get", mock_get)
+
+    tmdb.search_tv_show("Pooled Show")
+
+    # Search, content ratings and details: all through the shared session.
+    assert len(calls) == 3
+    assert tmdb._session() is session
+
+    adapter = session.get_adapter("https://api.themoviedb.org/3")
+    assert adapter._pool_maxsize == tmdb.TMDB_HTTP_POOL_SIZE
+    retry = adapter.max_retries
+    assert retry.total == tmdb.TMDB_HTTP_RETRIES
+    assert retry.read == 0  # a read timeout is not retried: (2, 5) stays the worst case
+    assert retry.allowed_methods == frozenset({"GET"})
+    assert 503 in retry.status_forcelist and 429 not in retry.status_forcelist